@@ -10,9 +10,14 @@ from flask import Flask, render_template, session, redirect, url_for, request, j
 import os
 from datetime import timedelta
 from werkzeug.utils import secure_filename
-from materials_store import add_material, get_all_materials, delete_material, get_material, increment_downloads
+from materials_store import add_material, delete_material, get_material, get_materials_page, CURSOR_SORTS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from download_counters import store_downloads
+from audit_log import audit
 from enrollments_store import get_all_courses, get_student_enrollments
 from config import Config
+import db_utils
+import db_routing
+import sql_profiler
 from routes.teacher_routes import teacher
 from routes.student_routes import student
 from routes.auth_routes import auth
@@ -40,6 +45,11 @@ def before_request():
     session.permanent = True
     app.permanent_session_lifetime = timedelta(hours=24)
 
+# Request-scoped pooled MySQL connections and per-request query stats
+db_utils.init_app(app)
+db_routing.init_app(app)
+sql_profiler.init_app(app)
+
 # Register blueprints
 app.register_blueprint(teacher)
 app.register_blueprint(student)
@@ -59,6 +69,43 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# Columns rendered by the dashboard material tables
+DASHBOARD_MATERIAL_FIELDS = ['title', 'description', 'teacher', 'uploaded_at', 'downloads']
+
+
+def materials_page_from_request():
+    """
+    Get the page of materials selected by the query string
+    
+    Query parameters:
+        page: 1-based page number (default 1)
+        limit: materials per page (default DEFAULT_PAGE_SIZE)
+        sort: newest, oldest, title or downloads (default newest)
+        cursor: next_cursor of the previous page, instead of page (newest/oldest only)
+        before: prev_cursor of the following page, instead of page (newest/oldest only)
+    
+    The result's page is None on cursor requests; keyset is True for the sorts
+    the templates page through with cursor links.
+    """
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    sort = request.args.get('sort', 'newest')
+    cursor = request.args.get('cursor', type=int)
+    before = request.args.get('before', type=int)
+    
+    try:
+        result = get_materials_page(offset=(page - 1) * limit, cursor=cursor, limit=limit,
+                                    sort=sort, fields=DASHBOARD_MATERIAL_FIELDS, before=before)
+    except ValueError:
+        result = get_materials_page(limit=DEFAULT_PAGE_SIZE, fields=DASHBOARD_MATERIAL_FIELDS)
+        page = 1
+    
+    result['page'] = page if result['offset'] is not None else None
+    result['keyset'] = result['sort'] in CURSOR_SORTS
+    result['total_pages'] = max((result['total'] + result['limit'] - 1) // result['limit'], 1)
+    return result
+
+
 # Routes
 @app.route('/')
 def home():
@@ -118,8 +165,11 @@ def student_dashboard():
     session['user_name'] = 'Student User'
     session['user_role'] = 'student'
     
-    materials = get_all_materials()
-    return render_template('student_dashboard.html', user_name='Student User', materials=materials, material_count=len(materials))
+    pagination = materials_page_from_request()
+    return render_template('student_dashboard.html', user_name='Student User',
+                         materials=pagination['materials'],
+                         material_count=pagination['total'],
+                         pagination=pagination)
 
 
 @app.route('/teacher-dashboard')
@@ -132,8 +182,11 @@ def teacher_dashboard():
     session['user_name'] = 'Teacher User'
     session['user_role'] = 'teacher'
     
-    materials = get_all_materials()
-    return render_template('teacher_dashboard.html', user_name='Teacher User', materials=materials, material_count=len(materials))
+    pagination = materials_page_from_request()
+    return render_template('teacher_dashboard.html', user_name='Teacher User',
+                         materials=pagination['materials'],
+                         material_count=pagination['total'],
+                         pagination=pagination)
 
 
 @app.route('/admin-dashboard')
@@ -261,6 +314,9 @@ def teacher_upload_material():
             file_path=f'/static/uploads/materials/{unique_filename}',
             teacher_name='Teacher User'
         )
+        # File-store materials have their own IDs, separate from study_materials
+        audit('material_upload', 'stored_material', material['id'],
+              new_value={'title': title, 'file_path': material['file_path']})
 
         # Return success response
         return jsonify({
@@ -292,6 +348,7 @@ def teacher_delete_material(material_id):
         
         # Delete from database
         delete_material(material_id)
+        audit('material_delete', 'stored_material', material_id, old_value={'file_path': material['file_path']})
         
         return jsonify({
             'success': True,
@@ -310,6 +367,9 @@ def view_material(material_id):
     if not material:
         return render_template('error.html', message='Material not found'), 404
     
+    # Include downloads that are still buffered in memory
+    material['downloads'] += store_downloads.pending(material_id)
+    
     return render_template('view_material.html', material=material)
 
 
@@ -322,8 +382,8 @@ def download_material(material_id):
         if not material:
             return 'Material not found', 404
         
-        # Increment download count
-        increment_downloads(material_id)
+        # Count the download (written to the store in batches)
+        store_downloads.record(material_id)
         
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], material['filename'])
         
@@ -0,0 +1,223 @@
+"""
+Asynchronous audit log
+
+audit() puts an event on a bounded in-memory queue and returns at once; a
+background thread takes up to AUDIT_BATCH_SIZE events at a time and writes
+them to audit_logs with one multi-row INSERT. A partial batch is written
+AUDIT_FLUSH_INTERVAL seconds after its first event.
+
+- Bounded memory: at most AUDIT_QUEUE_SIZE events are held. When the queue
+  is full, audit() waits up to AUDIT_ENQUEUE_TIMEOUT seconds for room
+  (backpressure on the request), then drops the event and counts it.
+- A batch that fails is retried once after AUDIT_RETRY_DELAY seconds, then
+  written row by row so one bad row does not lose the others.
+- Queued events are written when the interpreter shuts down; events queued
+  since the last write are lost if the process is killed.
+
+metrics() (GET /admin/audit/metrics) reports the queue depth, dropped
+events and write counts of this worker process.
+"""
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import has_request_context, request, session
+from config import Config
+
+
+class AuditLog:
+    """Bounded queue of audit_logs rows drained by a background writer thread"""
+
+    def __init__(self, write_func, capacity=None, batch_size=None, interval=None,
+                 enqueue_timeout=None, retry_delay=None):
+        self.write_func = write_func
+        self.capacity = Config.AUDIT_QUEUE_SIZE if capacity is None else capacity
+        self.batch_size = Config.AUDIT_BATCH_SIZE if batch_size is None else batch_size
+        self.interval = Config.AUDIT_FLUSH_INTERVAL if interval is None else interval
+        self.enqueue_timeout = Config.AUDIT_ENQUEUE_TIMEOUT if enqueue_timeout is None else enqueue_timeout
+        self.retry_delay = Config.AUDIT_RETRY_DELAY if retry_delay is None else retry_delay
+
+        self._queue = queue.Queue(maxsize=self.capacity)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._counts = {'enqueued': 0, 'blocked': 0, 'dropped': 0, 'written': 0, 'failed': 0, 'batches': 0}
+        self._last_error = None
+        self._last_write_at = None
+
+    def record(self, row):
+        """Queue one row (a tuple in models.audit_model.COLUMNS order); returns False if it was dropped"""
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._start()
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count('blocked')
+            try:
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                self._count('dropped')
+                return False
+        self._count('enqueued')
+
+        if self._stopped.is_set():
+            # Recorded during shutdown: nothing else will write it
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write everything queued so far, in batches, on the calling thread"""
+        while True:
+            batch = self._take(wait=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        """Stop the writer thread and write what is left"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def metrics(self):
+        """Queue depth and counters for this process"""
+        with self._lock:
+            metrics = dict(self._counts)
+            metrics.update({
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self.capacity,
+                'batch_size': self.batch_size,
+                'writer_running': self._thread is not None and self._thread.is_alive(),
+                'last_write_at': self._last_write_at.isoformat() if self._last_write_at else None,
+                'last_error': self._last_error
+            })
+        return metrics
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def _start(self):
+        """Start the writer thread. Caller holds the lock."""
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _take(self, wait):
+        """
+        Up to batch_size queued rows
+
+        With wait, block for a first row and then give the batch up to interval
+        seconds to fill; without, only take what is already queued.
+        """
+        try:
+            # Poll so the writer notices stop()
+            batch = [self._queue.get(timeout=max(self.interval, 0.5)) if wait else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            try:
+                if wait and self.interval > 0:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            self.write_func(batch)
+            self._written(len(batch))
+            return
+        except Exception as e:
+            print(f"Error writing {len(batch)} audit log rows, retrying: {e}")
+            self._last_error = str(e)
+
+        time.sleep(self.retry_delay)
+        try:
+            self.write_func(batch)
+            self._written(len(batch))
+            return
+        except Exception as e:
+            print(f"Error writing {len(batch)} audit log rows, writing them one by one: {e}")
+            self._last_error = str(e)
+
+        for row in batch:
+            try:
+                self.write_func([row])
+                self._written(1)
+            except Exception as e:
+                print(f"Error writing audit log row {row[1]!r}: {e}")
+                self._last_error = str(e)
+                self._count('failed')
+
+    def _written(self, n):
+        with self._lock:
+            self._counts['written'] += n
+            self._counts['batches'] += 1
+            self._last_write_at = datetime.now()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._take(wait=True)
+            if batch:
+                self._write(batch)
+
+
+def _write_audit_logs(rows):
+    """Insert audit rows in one transaction"""
+    from db_pool import get_pool
+    from models.audit_model import insert_audit_logs
+
+    with get_pool().connection() as connection:
+        cursor = connection.cursor()
+        result = insert_audit_logs(cursor, rows)
+        cursor.close()
+        if not result['success']:
+            connection.rollback()
+            raise RuntimeError(result['message'])
+        connection.commit()
+
+
+audit_log = AuditLog(_write_audit_logs)
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+def audit(action, entity_type=None, entity_id=None, old_value=None, new_value=None, user_id=None):
+    """
+    Queue an audit event without waiting for the database
+
+    user_id, ip_address and user_agent default to the current request's;
+    old_value / new_value that are not strings are stored as JSON.
+    Returns False if the event was dropped (queue full or logging disabled).
+    """
+    if not Config.AUDIT_LOG_ENABLED:
+        return False
+
+    ip_address = user_agent = None
+    if has_request_context():
+        if user_id is None:
+            user_id = session.get('user_id')
+        ip_address = request.remote_addr
+        user_agent = request.user_agent.string or None
+
+    return audit_log.record((user_id, action, entity_type, entity_id, _text(old_value), _text(new_value),
+                             ip_address, user_agent, datetime.now()))
+
+
+def metrics():
+    """Audit queue metrics of this process"""
+    return audit_log.metrics()
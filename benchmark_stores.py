@@ -0,0 +1,369 @@
+"""
+Scaling benchmarks for materials_store and enrollments_store
+
+Generates synthetic stores of each requested size in a temporary
+directory, then times the store operations app.py relies on, serially,
+from several threads and from several processes. Results are written as
+JSON so runs from different releases can be diffed.
+
+Every (backend, size) case runs in a freshly spawned interpreter, so the
+backend is selected through the same environment variables as in
+production and no state leaks between cases. A case whose child process
+fails, crashes or times out is listed under 'failures' in the output
+and the run goes on with the next one.
+
+The journal backend only allows one process per store (see
+materials_journal.py), so its multi-process runs are skipped and reported
+with a 'skipped' reason.
+
+Usage:
+    python benchmark_stores.py
+    python benchmark_stores.py --sizes 1000,10000 --backends json,sqlite --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_SIZES = '1000,10000,100000,1000000'
+DEFAULT_BACKENDS = 'json,journal,sqlite'
+OPERATIONS = ('get_material', 'add_material', 'increment_downloads', 'get_materials_page',
+              'get_course_enrollments', 'get_student_enrollments', 'get_all_courses')
+COURSE_COUNT = 50
+# Backends a second process cannot open while the case process holds them
+SINGLE_PROCESS_BACKENDS = {'journal': 'the journal backend allows one process per store'}
+DEFAULT_WORKER_TIMEOUT = 600.0
+
+
+# ----------------------------------------------------------------------
+# Store setup (runs inside spawned processes)
+# ----------------------------------------------------------------------
+
+def _open_stores(backend, directory):
+    """Point the stores at directory with the given backend and import them"""
+    os.chdir(directory)
+    os.environ['MATERIALS_STORE_BACKEND'] = backend
+    os.environ['ENROLLMENTS_STORE_BACKEND'] = 'sqlite' if backend == 'sqlite' else 'json'
+    os.environ['STORE_SQLITE_PATH'] = os.path.join(directory, 'lms_store.db')
+    os.environ['DOWNLOAD_FLUSH_INTERVAL'] = '0'
+
+    import materials_store
+    import enrollments_store
+    return materials_store, enrollments_store
+
+
+def _synthetic_material(material_id):
+    return {
+        'id': material_id,
+        'title': f'Material {material_id}',
+        'description': 'Synthetic benchmark material',
+        'filename': f'{material_id:08d}.pdf',
+        'original_name': f'material-{material_id}.pdf',
+        'file_path': f'/static/uploads/materials/{material_id:08d}.pdf',
+        'teacher': 'Benchmark Teacher',
+        'uploaded_at': '2024-01-01 00:00:00',
+        'downloads': material_id % 100
+    }
+
+
+def _synthetic_enrollment(enrollment_id, size):
+    student_count = max(size // 5, 1)
+    return {
+        'id': enrollment_id,
+        'student_id': f'S{enrollment_id % student_count:07d}',
+        'student_name': f'Student {enrollment_id % student_count}',
+        'course_name': f'Course {enrollment_id % COURSE_COUNT}',
+        'enrollment_date': '2024-01-15',
+        'status': 'Active'
+    }
+
+
+def generate(backend, size, directory):
+    """Write size materials and size enrollments for backend into directory"""
+    materials = [_synthetic_material(i) for i in range(1, size + 1)]
+    enrollments = [_synthetic_enrollment(i, size) for i in range(1, size + 1)]
+
+    if backend == 'sqlite':
+        os.environ['STORE_SQLITE_PATH'] = os.path.join(directory, 'lms_store.db')
+        from sqlite_store import get_database, MATERIAL_COLUMNS, ENROLLMENT_COLUMNS
+        conn = get_database(os.environ['STORE_SQLITE_PATH']).connection()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO materials ({', '.join(MATERIAL_COLUMNS)}) VALUES ({', '.join('?' for _ in MATERIAL_COLUMNS)})",
+                [[m[c] for c in MATERIAL_COLUMNS] for m in materials]
+            )
+            conn.executemany(
+                f"INSERT INTO enrollments ({', '.join(ENROLLMENT_COLUMNS)}) VALUES ({', '.join('?' for _ in ENROLLMENT_COLUMNS)})",
+                [[e[c] for c in ENROLLMENT_COLUMNS] for e in enrollments]
+            )
+        return
+
+    with open(os.path.join(directory, 'materials_data.json'), 'w') as f:
+        json.dump(materials, f, indent=2)
+    with open(os.path.join(directory, 'enrollments_data.json'), 'w') as f:
+        json.dump(enrollments, f, indent=2)
+
+
+def _operation(name, materials_store, enrollments_store, size, rng):
+    """Build a zero-argument callable performing one operation"""
+    if name == 'get_material':
+        return lambda: materials_store.get_material(rng.randint(1, size))
+    if name == 'add_material':
+        return lambda: materials_store.add_material('Benchmark upload', 'desc', 'bench.pdf',
+                                                    'bench.pdf', '/static/uploads/materials/bench.pdf')
+    if name == 'increment_downloads':
+        return lambda: materials_store.increment_downloads(rng.randint(1, size))
+    if name == 'get_materials_page':
+        return lambda: materials_store.get_materials_page(offset=rng.randint(0, 10) * 20, limit=20)
+    if name == 'get_course_enrollments':
+        return lambda: enrollments_store.get_course_enrollments(f'course {rng.randrange(COURSE_COUNT)}')
+    if name == 'get_student_enrollments':
+        return lambda: enrollments_store.get_student_enrollments(f'S{rng.randrange(max(size // 5, 1)):07d}')
+    if name == 'get_all_courses':
+        return enrollments_store.get_all_courses
+    raise ValueError(f"Unknown operation: {name}")
+
+
+def _timed_loop(func, iterations, max_seconds):
+    """Run func up to iterations times (at least once) within max_seconds; return latencies"""
+    latencies = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return latencies
+
+
+def _summarize(latencies, wall_seconds):
+    ordered = sorted(latencies)
+    return {
+        'iterations': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 4),
+        'median_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 4),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 4),
+        'ops_per_sec': round(len(ordered) / wall_seconds, 2) if wall_seconds else None
+    }
+
+
+def _process_worker(backend, directory, size, name, iterations, max_seconds, seed, barrier, results):
+    """Put (latencies, wall_seconds) on results, or (None, error) if the worker fails"""
+    try:
+        materials_store, enrollments_store = _open_stores(backend, directory)
+        func = _operation(name, materials_store, enrollments_store, size, random.Random(seed))
+        func()  # warm caches before the clock starts
+        barrier.wait()
+        start = time.perf_counter()
+        latencies = _timed_loop(func, iterations, max_seconds)
+        results.put((latencies, time.perf_counter() - start))
+    except BaseException as e:
+        barrier.abort()  # release the workers still waiting to start
+        results.put((None, f"{type(e).__name__}: {e}"))
+        raise
+
+
+def _collect(queue, processes, count, timeout=None):
+    """
+    Take count results from queue while the processes run
+
+    Raises RuntimeError if a process exits without putting its result
+    (crashed, killed by the OOM killer) or timeout seconds pass; the other
+    processes are then terminated.
+    """
+    import queue as queue_module
+    deadline = None if timeout is None else time.monotonic() + timeout
+    outcomes = []
+    try:
+        while len(outcomes) < count:
+            try:
+                outcomes.append(queue.get(timeout=1))
+                continue
+            except queue_module.Empty:
+                pass
+            # Anything put before the process exited has arrived by now
+            exited = [p for p in processes if p.exitcode is not None]
+            if len(exited) == len(processes) or any(p.exitcode != 0 for p in exited):
+                try:
+                    outcomes.append(queue.get(timeout=1))
+                    continue
+                except queue_module.Empty:
+                    codes = ', '.join(str(p.exitcode) for p in processes)
+                    raise RuntimeError(f"benchmark process exited without a result (exit codes {codes})")
+            if deadline is not None and time.monotonic() > deadline:
+                raise RuntimeError(f"benchmark process timed out after {timeout:g}s")
+    finally:
+        if len(outcomes) < count:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+    return outcomes
+
+
+def run_case(backend, size, directory, operations, iterations, max_seconds, threads, processes,
+             worker_timeout=DEFAULT_WORKER_TIMEOUT):
+    """Time every operation for one (backend, size) case; runs in its own process"""
+    materials_store, enrollments_store = _open_stores(backend, directory)
+    results = []
+
+    def record(name, mode, workers, latencies, wall_seconds):
+        row = {'backend': backend, 'size': size, 'operation': name, 'mode': mode, 'workers': workers}
+        row.update(_summarize(latencies, wall_seconds))
+        results.append(row)
+        print(f"  {backend:8} {size:>8} {name:24} {mode:9} x{workers:<2} "
+              f"median {row['median_ms']:>10} ms  {row['ops_per_sec']} ops/s", flush=True)
+
+    for name in operations:
+        # Serial
+        func = _operation(name, materials_store, enrollments_store, size, random.Random(1))
+        func()
+        start = time.perf_counter()
+        latencies = _timed_loop(func, iterations, max_seconds)
+        record(name, 'serial', 1, latencies, time.perf_counter() - start)
+
+        # Threads in this process
+        if threads > 1:
+            barrier = threading.Barrier(threads)
+            per_thread = [None] * threads
+
+            def thread_worker(index):
+                worker_func = _operation(name, materials_store, enrollments_store, size, random.Random(index))
+                barrier.wait()
+                per_thread[index] = _timed_loop(worker_func, iterations, max_seconds)
+
+            workers = [threading.Thread(target=thread_worker, args=(i,)) for i in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            record(name, 'threads', threads, [l for lat in per_thread for l in lat], time.perf_counter() - start)
+
+        # Separate processes sharing the same files
+        if processes > 1 and backend in SINGLE_PROCESS_BACKENDS:
+            reason = SINGLE_PROCESS_BACKENDS[backend]
+            results.append({'backend': backend, 'size': size, 'operation': name, 'mode': 'processes',
+                            'workers': processes, 'skipped': reason})
+            print(f"  {backend:8} {size:>8} {name:24} processes skipped: {reason}", flush=True)
+        elif processes > 1:
+            ctx = multiprocessing.get_context('spawn')
+            barrier = ctx.Barrier(processes)
+            queue = ctx.Queue()
+            workers = [ctx.Process(target=_process_worker,
+                                   args=(backend, directory, size, name, iterations, max_seconds, i, barrier, queue))
+                       for i in range(processes)]
+            for worker in workers:
+                worker.start()
+            outcomes = _collect(queue, workers, processes, timeout=worker_timeout)
+            for worker in workers:
+                worker.join()
+            errors = [error for latencies, error in outcomes if latencies is None]
+            if errors:
+                raise RuntimeError(f"{name} worker failed: {errors[0]}")
+            record(name, 'processes', processes, [l for lat, _ in outcomes for l in lat],
+                   max(wall for _, wall in outcomes))
+
+    return results
+
+
+def _child_entry(queue, func, args):
+    try:
+        queue.put((True, func(*args)))
+    except BaseException as e:
+        queue.put((False, f"{type(e).__name__}: {e}"))
+        raise
+
+
+def _run_in_child(func, *args):
+    """Run func(*args) in a freshly spawned interpreter and return its result"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    child = ctx.Process(target=_child_entry, args=(queue, func, args))
+    child.start()
+    [(ok, result)] = _collect(queue, [child], 1)
+    child.join()
+    if not ok:
+        raise RuntimeError(f"Benchmark child failed: {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark materials_store and enrollments_store")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"comma-separated record counts (default {DEFAULT_SIZES})")
+    parser.add_argument('--backends', default=DEFAULT_BACKENDS, help=f"comma-separated backends (default {DEFAULT_BACKENDS})")
+    parser.add_argument('--operations', default=','.join(OPERATIONS), help="comma-separated operations")
+    parser.add_argument('--iterations', type=int, default=200, help="operations per worker (default 200)")
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help="time budget per operation and worker; slow cases stop early (default 10)")
+    parser.add_argument('--threads', type=int, default=4, help="threads for the threaded run, 1 to skip (default 4)")
+    parser.add_argument('--processes', type=int, default=4, help="processes for the multi-process run, 1 to skip (default 4)")
+    parser.add_argument('--worker-timeout', type=float, default=DEFAULT_WORKER_TIMEOUT,
+                        help=f"seconds to wait for a multi-process run before failing the case (default {DEFAULT_WORKER_TIMEOUT:g})")
+    parser.add_argument('--output', help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    backends = [b for b in args.backends.split(',') if b]
+    operations = [o for o in args.operations.split(',') if o]
+    for name in operations:
+        if name not in OPERATIONS:
+            parser.error(f"unknown operation {name}")
+
+    # Spawned children import the stores from the repository root
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [repo_root, os.environ.get('PYTHONPATH')]))
+    sys.path.insert(0, repo_root)
+
+    results, failures = [], []
+    for backend in backends:
+        for size in sizes:
+            directory = tempfile.mkdtemp(prefix=f'lms-bench-{backend}-{size}-')
+            try:
+                print(f"Generating {size} records for {backend}...", flush=True)
+                _run_in_child(generate, backend, size, directory)
+                results.extend(_run_in_child(run_case, backend, size, directory, operations,
+                                             args.iterations, args.max_seconds, args.threads, args.processes,
+                                             args.worker_timeout))
+            except RuntimeError as e:
+                print(f"✗ {backend} {size}: {e}", flush=True)
+                failures.append({'backend': backend, 'size': size, 'error': str(e)})
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'iterations': args.iterations,
+            'max_seconds': args.max_seconds,
+        },
+        'results': results,
+        'failures': failures
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Wrote {len(results)} results to {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Cached admin dashboard statistics
+
+All six dashboard counts come from one read of the counters that
+models.statistics_model maintains in the statistics table, and are kept
+in memory for Config.ADMIN_STATS_CACHE_SECONDS. The routes that
+create, approve, reject or delete users and materials call invalidate()
+after committing, so the next dashboard load in this worker reads fresh
+numbers. Other workers catch up when their copy expires.
+"""
+import threading
+import time
+from config import Config
+from models.statistics_model import get_counters
+
+_lock = threading.Lock()
+_cache = {'stats': None, 'expires_at': 0.0, 'generation': 0}
+
+
+def load_stats(cursor):
+    """Read the dashboard counters (one round trip)"""
+    counters = get_counters(cursor)
+    return {
+        'total_users': counters['users_total'],
+        'total_students': counters['users_student'],
+        'total_teachers': counters['users_teacher'],
+        'total_materials': counters['materials_total'],
+        'pending_materials': counters['materials_pending'],
+        'approved_materials': counters['materials_approved']
+    }
+
+
+def get_stats(cursor):
+    """Dashboard statistics, from the cache while it is fresh"""
+    with _lock:
+        if _cache['stats'] is not None and time.monotonic() < _cache['expires_at']:
+            return dict(_cache['stats'])
+        generation = _cache['generation']
+
+    stats = load_stats(cursor)
+
+    with _lock:
+        # Don't cache numbers read before a concurrent invalidate()
+        if generation == _cache['generation']:
+            _cache['stats'] = stats
+            _cache['expires_at'] = time.monotonic() + Config.ADMIN_STATS_CACHE_SECONDS
+    return dict(stats)
+
+
+def invalidate():
+    """Drop the cached statistics (call after committing a change to users or materials)"""
+    with _lock:
+        _cache['stats'] = None
+        _cache['generation'] += 1
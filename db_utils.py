@@ -1,70 +1,221 @@
 """
 Database utility functions for common operations
+
+Every request gets one pooled connection (db_pool.get_db) and one cursor,
+both kept on flask.g and cleaned up when the request ends. The cursor
+records how many queries the request ran, how many rows they touched and
+how long they took; init_app reports the totals in a Server-Timing header.
+
+Write handlers group their statements with transaction():
+
+    with transaction() as cursor:
+        cursor.execute(...)
+        cursor.execute(...)
 """
 
-from app import mysql
+import re
+import time
+from contextlib import contextmanager
 from flask import g
+from config import Config
+from db_pool import PRIMARY, get_db, init_app as init_pool
+
+
+# Statements that never modify data; anything else marks the request as a write (see db_routing)
+_READ_STATEMENT = re.compile(r'\s*\(?\s*(SELECT|SHOW|DESCRIBE|DESC|EXPLAIN|WITH)\b', re.I)
+
+
+class RequestCursor:
+    """DictCursor wrapper that counts queries, rows and time for the current request"""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def _record(self, started):
+        self._stats['queries'] += 1
+        self._stats['rows'] += max(self._cursor.rowcount or 0, 0)
+        self._stats['time_ms'] += (time.perf_counter() - started) * 1000
+
+    def _writing(self):
+        if g.get('db_connection_target', PRIMARY) != PRIMARY:
+            raise RuntimeError("Write statement in a @read_only route would run on a replica")
+        g.db_wrote = True
+
+    def execute(self, query, params=None):
+        if not _READ_STATEMENT.match(query):
+            self._writing()
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            self._record(started)
+
+    def executemany(self, query, seq_params):
+        self._writing()
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_params)
+        finally:
+            self._record(started)
+
+    def close(self):
+        """No-op: the request's cursor is shared and closed at teardown"""
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _new_stats():
+    return {'queries': 0, 'rows': 0, 'time_ms': 0.0}
+
 
 def get_db_connection():
-    """Get database connection"""
-    return mysql.connection
+    """Get the request's database connection"""
+    return get_db()
 
 def get_cursor():
-    """Get database cursor"""
-    return mysql.connection.cursor()
+    """Get the request's database cursor"""
+    if 'db_cursor' not in g:
+        if 'db_stats' not in g:
+            g.db_stats = _new_stats()
+        cursor = RequestCursor(get_db().cursor(), g.db_stats)
+        if Config.SQL_PROFILER_ENABLED:
+            from sql_profiler import ProfilingCursor
+            cursor = ProfilingCursor(cursor)
+        g.db_cursor = cursor
+    return g.db_cursor
+
+def get_request_stats():
+    """Queries, rows and milliseconds spent in the database so far in this request"""
+    return dict(g.get('db_stats') or _new_stats())
+
+@contextmanager
+def transaction():
+    """
+    Run a block of statements atomically
+
+    Commits when the outermost block exits normally and rolls back if it
+    raises. Nested blocks join the outer transaction.
+    """
+    if g.get('db_target', PRIMARY) != PRIMARY:
+        raise RuntimeError("transaction() in a @read_only route would write to a replica")
+    depth = g.get('db_transaction_depth', 0)
+    g.db_transaction_depth = depth + 1
+    try:
+        yield get_cursor()
+        if depth == 0:
+            get_db().commit()
+    except BaseException:
+        if depth == 0:
+            get_db().rollback()
+        raise
+    finally:
+        g.db_transaction_depth = depth
+
+def _in_transaction():
+    return g.get('db_transaction_depth', 0) > 0
 
 def execute_query(query, params=None, fetch_one=False, fetch_all=False):
     """
     Execute a database query
-    
+
     Args:
         query: SQL query string
         params: Query parameters (tuple or list)
         fetch_one: If True, return one row
         fetch_all: If True, return all rows
-    
+
     Returns:
-        Query result or None
+        Query result, or the affected row count for writes (committed unless
+        inside transaction()); None on error
     """
     try:
         cursor = get_cursor()
-        
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
+        cursor.execute(query, params)
+
         if fetch_one:
             return cursor.fetchone()
         elif fetch_all:
             return cursor.fetchall()
         else:
-            mysql.connection.commit()
+            if not _in_transaction():
+                get_db().commit()
             return cursor.rowcount
-            
+
     except Exception as e:
         print(f"Database error: {e}")
-        mysql.connection.rollback()
+        if _in_transaction():
+            raise
+        get_db().rollback()
+        return None
+
+def executemany(query, seq_params):
+    """
+    Execute a statement once per parameter set in a single round of batching
+
+    Returns:
+        Affected row count (committed unless inside transaction()); None on error
+    """
+    try:
+        cursor = get_cursor()
+        cursor.executemany(query, list(seq_params))
+        if not _in_transaction():
+            get_db().commit()
+        return cursor.rowcount
+
+    except Exception as e:
+        print(f"Database error: {e}")
+        if _in_transaction():
+            raise
+        get_db().rollback()
         return None
-    finally:
-        if cursor:
-            cursor.close()
 
 def commit_transaction():
     """Commit database transaction"""
     try:
-        mysql.connection.commit()
+        get_db().commit()
         return True
     except Exception as e:
         print(f"Commit error: {e}")
-        mysql.connection.rollback()
+        get_db().rollback()
         return False
 
 def rollback_transaction():
     """Rollback database transaction"""
     try:
-        mysql.connection.rollback()
+        get_db().rollback()
         return True
     except Exception as e:
         print(f"Rollback error: {e}")
         return False
+
+
+def _close_cursor(exception=None):
+    request_cursor = g.pop('db_cursor', None)
+    while request_cursor is not None and not isinstance(request_cursor, RequestCursor):
+        request_cursor = request_cursor._cursor
+    if request_cursor is not None:
+        try:
+            request_cursor._cursor.close()
+        except Exception:
+            pass
+
+def _add_timing_header(response):
+    stats = g.get('db_stats')
+    if stats and stats['queries']:
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["time_ms"]:.1f};desc="{stats["queries"]} queries, {stats["rows"]} rows"'
+        )
+    return response
+
+def init_app(app):
+    """Set up request-scoped connections, cursors and per-request query stats"""
+    init_pool(app)
+    # Registered after db_pool's teardown, so it runs before the connection is returned
+    app.teardown_appcontext(_close_cursor)
+    app.after_request(_add_timing_header)
@@ -0,0 +1,120 @@
+"""
+Write-behind download counters
+
+Downloads are counted in memory and written out as one batched update,
+either every DOWNLOAD_FLUSH_INTERVAL seconds or as soon as
+DOWNLOAD_FLUSH_THRESHOLD downloads are pending, whichever comes first.
+Pending counts are also flushed when the interpreter shuts down.
+
+DOWNLOAD_FLUSH_INTERVAL is the durability window: counts recorded since
+the last flush are lost if the process is killed. Set it to 0 to write
+every download through immediately.
+"""
+import atexit
+import threading
+from config import Config
+
+
+class DownloadCounter:
+    """Buffer of per-material download deltas flushed by a background thread"""
+
+    def __init__(self, name, flush_func, interval=None, threshold=None):
+        self.name = name
+        self.flush_func = flush_func
+        self.interval = Config.DOWNLOAD_FLUSH_INTERVAL if interval is None else interval
+        self.threshold = Config.DOWNLOAD_FLUSH_THRESHOLD if threshold is None else threshold
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._deltas = {}
+        self._pending_total = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, material_id, count=1):
+        """Count a download of material_id"""
+        material_id = int(material_id)
+        if self.interval <= 0:
+            self.flush_func({material_id: count})
+            return
+
+        with self._lock:
+            self._deltas[material_id] = self._deltas.get(material_id, 0) + count
+            self._pending_total += count
+            if self._thread is None:
+                self._start()
+            if self._pending_total >= self.threshold:
+                self._wakeup.set()
+
+    def pending(self, material_id):
+        """Downloads of material_id recorded but not yet flushed"""
+        with self._lock:
+            return self._deltas.get(int(material_id), 0)
+
+    def flush(self):
+        """Write all pending deltas in one batch"""
+        with self._flush_lock:
+            with self._lock:
+                deltas = self._deltas
+                self._deltas = {}
+                self._pending_total = 0
+            if not deltas:
+                return
+
+            try:
+                self.flush_func(deltas)
+            except Exception as e:
+                print(f"Error flushing {self.name} download counts: {e}")
+                # Put the deltas back so the next flush retries them
+                with self._lock:
+                    for material_id, count in deltas.items():
+                        self._deltas[material_id] = self._deltas.get(material_id, 0) + count
+                        self._pending_total += count
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _start(self):
+        """Start the flusher thread. Caller holds the lock."""
+        self._thread = threading.Thread(target=self._run, name=f'{self.name}-download-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def _flush_materials_store(deltas):
+    """Apply download deltas to the file-based materials store"""
+    from materials_store import add_downloads
+    add_downloads(deltas)
+
+
+def _flush_study_materials(deltas):
+    """Apply download deltas to study_materials in one transaction"""
+    from db_pool import get_pool
+    from models.material_model import add_download_counts
+
+    with get_pool().connection() as connection:
+        cursor = connection.cursor()
+        result = add_download_counts(cursor, deltas)
+        cursor.close()
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        connection.commit()
+
+
+# Downloads served from materials_store by app.py
+store_downloads = DownloadCounter('materials_store', _flush_materials_store)
+
+# Downloads of approved study_materials served by the student blueprint
+db_downloads = DownloadCounter('study_materials', _flush_study_materials)
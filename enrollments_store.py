@@ -1,78 +1,335 @@
 """
 Simple file-based storage for course enrollments
+
+The storage engine is picked by Config.ENROLLMENTS_STORE_BACKEND:
+- 'json': all enrollments live in ENROLLMENTS_FILE, with per-course counts
+  kept up to date in COURSE_COUNTS_FILE
+- 'sqlite': rows in the enrollments table of Config.STORE_SQLITE_PATH (see sqlite_store.py)
 """
 import json
 import os
+import threading
 from datetime import datetime
+from config import Config
+from store_files import locked, atomic_write_json, allocate_id
 
 ENROLLMENTS_FILE = 'enrollments_data.json'
+COURSE_COUNTS_FILE = 'enrollments_courses.json'
+STORE_BACKEND = Config.ENROLLMENTS_STORE_BACKEND
+
+_engine_instance = None
+_engine_lock = threading.Lock()
+
+
+def _engine():
+    """Return the configured storage engine, or None for the plain JSON file"""
+    global _engine_instance
+    if STORE_BACKEND == 'json':
+        return None
+    if _engine_instance is None:
+        with _engine_lock:
+            if _engine_instance is None:
+                if STORE_BACKEND == 'sqlite':
+                    from sqlite_store import SqliteEnrollments, get_database
+                    _engine_instance = SqliteEnrollments(get_database(Config.STORE_SQLITE_PATH))
+                else:
+                    raise ValueError(f"Unknown enrollments store backend: {STORE_BACKEND}")
+    return _engine_instance
+
+
+# Parsed copy of ENROLLMENTS_FILE for the JSON backend, keyed by the file's stat signature,
+# with indexes by student_id and by case-folded course name
+_cache = {'signature': None, 'enrollments': [], 'by_student': {}, 'by_course': {}}
+_cache_lock = threading.Lock()
+
+
+def _file_signature(path=None):
+    """Identify the current version of a store file without reading it"""
+    try:
+        st = os.stat(path or ENROLLMENTS_FILE)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _course_key(course_name):
+    return course_name.casefold()
+
+
+def _index(enrollment):
+    """Add one enrollment to the cache indexes. Caller holds the cache lock."""
+    _cache['by_student'].setdefault(enrollment['student_id'], []).append(enrollment)
+    _cache['by_course'].setdefault(_course_key(enrollment['course_name']), []).append(enrollment)
+
+
+def _remember(enrollments, signature):
+    """Replace the cached enrollments and rebuild the indexes. Caller holds the cache lock."""
+    _cache['signature'] = signature
+    _cache['enrollments'] = enrollments
+    _cache['by_student'] = {}
+    _cache['by_course'] = {}
+    for enrollment in enrollments:
+        _index(enrollment)
+
+
+def _cached_enrollments():
+    """Return the cache for ENROLLMENTS_FILE, re-parsing only when the file changed.
+
+    The cached records are shared and must not be modified.
+    """
+    signature = _file_signature()
+    with _cache_lock:
+        if signature != _cache['signature']:
+            enrollments = []
+            if signature is not None:
+                try:
+                    with open(ENROLLMENTS_FILE, 'r') as f:
+                        enrollments = json.load(f)
+                except:
+                    enrollments = []
+            _remember(enrollments, signature)
+        return _cache
+
 
 def load_enrollments():
-    """Load enrollments from JSON file"""
-    if os.path.exists(ENROLLMENTS_FILE):
-        try:
-            with open(ENROLLMENTS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    """Load enrollments from JSON file (a private copy that is safe to modify)"""
+    return [dict(e) for e in _cached_enrollments()['enrollments']]
 
 def save_enrollments(enrollments):
-    """Save enrollments to JSON file"""
-    with open(ENROLLMENTS_FILE, 'w') as f:
-        json.dump(enrollments, f, indent=2)
+    """Save enrollments to JSON file (atomically; callers hold locked(ENROLLMENTS_FILE))"""
+    with _cache_lock:
+        atomic_write_json(ENROLLMENTS_FILE, enrollments)
+        _remember(enrollments, _file_signature())
+    _save_course_counts(_count_courses(enrollments))
 
-def add_enrollment(student_id, student_name, course_name, enrollment_date=None):
-    """Add a new enrollment"""
-    enrollments = load_enrollments()
-    
-    enrollment = {
-        'id': len(enrollments) + 1,
+
+# Persisted course name -> enrollment count, in first-enrollment order
+_course_cache = {'signature': None, 'counts': None}
+
+
+def _count_courses(enrollments):
+    """Count enrollments per course from scratch"""
+    counts = {}
+    for enrollment in enrollments:
+        _adjust_course_count(counts, enrollment['course_name'], 1)
+    return counts
+
+
+def _adjust_course_count(counts, course_name, delta):
+    """Apply an O(1) change to the course aggregate (adds, removals, status changes)"""
+    count = counts.get(course_name, 0) + delta
+    if count > 0:
+        counts[course_name] = count
+    else:
+        counts.pop(course_name, None)
+
+
+def _read_course_counts():
+    """Return the persisted course aggregate, or None if it has not been built yet"""
+    signature = _file_signature(COURSE_COUNTS_FILE)
+    if signature is None:
+        return None
+    with _cache_lock:
+        if signature != _course_cache['signature']:
+            try:
+                with open(COURSE_COUNTS_FILE, 'r') as f:
+                    counts = json.load(f)
+            except (OSError, ValueError):
+                return None
+            _course_cache['signature'] = signature
+            _course_cache['counts'] = counts
+        return _course_cache['counts']
+
+
+def _save_course_counts(counts):
+    """Persist the course aggregate (callers hold locked(ENROLLMENTS_FILE))"""
+    with _cache_lock:
+        atomic_write_json(COURSE_COUNTS_FILE, counts)
+        _course_cache['signature'] = _file_signature(COURSE_COUNTS_FILE)
+        _course_cache['counts'] = counts
+
+def _new_enrollment(student_id, student_name, course_name, enrollment_date=None, status=None):
+    """Build an unsaved enrollment record"""
+    return {
+        'id': None,
         'student_id': student_id,
         'student_name': student_name,
         'course_name': course_name,
         'enrollment_date': enrollment_date or datetime.now().strftime('%Y-%m-%d'),
-        'status': 'Active'
+        'status': status or 'Active'
     }
+
+def _validate_enrollment(record):
+    """Turn one incoming record (dict) into an unsaved enrollment, or raise ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+    values = {}
+    for field in ('student_id', 'student_name', 'course_name', 'enrollment_date', 'status'):
+        value = record.get(field)
+        values[field] = str(value).strip() if value is not None else ''
+    if not values['student_id']:
+        raise ValueError('student_id is required')
+    if not values['course_name']:
+        raise ValueError('course_name is required')
+    if values['enrollment_date']:
+        try:
+            datetime.strptime(values['enrollment_date'], '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Invalid enrollment_date {values['enrollment_date']!r} (expected YYYY-MM-DD)")
+    return _new_enrollment(values['student_id'], values['student_name'], values['course_name'],
+                           values['enrollment_date'] or None, values['status'] or None)
+
+def add_enrollment(student_id, student_name, course_name, enrollment_date=None):
+    """Add a new enrollment"""
+    enrollment = _new_enrollment(student_id, student_name, course_name, enrollment_date)
+    
+    engine = _engine()
+    if engine:
+        return engine.add(enrollment)
     
-    enrollments.append(enrollment)
-    save_enrollments(enrollments)
-    return enrollment
+    with locked(ENROLLMENTS_FILE):
+        # The write lock keeps the cache (validated here) in step with the file
+        enrollments = list(_cached_enrollments()['enrollments'])
+        enrollment['id'] = allocate_id(ENROLLMENTS_FILE, floor=max((e['id'] for e in enrollments), default=0))
+        enrollments.append(enrollment)
+        with _cache_lock:
+            atomic_write_json(ENROLLMENTS_FILE, enrollments)
+            _cache['signature'] = _file_signature()
+            _cache['enrollments'] = enrollments
+            _index(enrollment)
+        
+        counts = _read_course_counts()
+        counts = dict(counts) if counts is not None else _count_courses(enrollments[:-1])
+        _adjust_course_count(counts, course_name, 1)
+        _save_course_counts(counts)
+    return dict(enrollment)
+
+def add_enrollments(records):
+    """
+    Validate and add a batch of enrollments with a single write
+    
+    Args:
+        records: Iterable of dicts with student_id, student_name, course_name and
+                 optionally enrollment_date (YYYY-MM-DD) and status
+    
+    Returns:
+        Dictionary with 'added' (the saved enrollments) and 'errors'
+        (list of {'index', 'message'} for records that were skipped)
+    """
+    batch, errors = [], []
+    for index, record in enumerate(records):
+        try:
+            batch.append(_validate_enrollment(record))
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+    
+    if not batch:
+        return {'added': [], 'errors': errors}
+    
+    engine = _engine()
+    if engine:
+        return {'added': engine.add_many(batch), 'errors': errors}
+    
+    with locked(ENROLLMENTS_FILE):
+        enrollments = list(_cached_enrollments()['enrollments'])
+        first_id = allocate_id(ENROLLMENTS_FILE, floor=max((e['id'] for e in enrollments), default=0),
+                               count=len(batch))
+        for offset, enrollment in enumerate(batch):
+            enrollment['id'] = first_id + offset
+        enrollments.extend(batch)
+        with _cache_lock:
+            atomic_write_json(ENROLLMENTS_FILE, enrollments)
+            _cache['signature'] = _file_signature()
+            _cache['enrollments'] = enrollments
+            for enrollment in batch:
+                _index(enrollment)
+        
+        counts = _read_course_counts()
+        counts = dict(counts) if counts is not None else _count_courses(enrollments[:-len(batch)])
+        for enrollment in batch:
+            _adjust_course_count(counts, enrollment['course_name'], 1)
+        _save_course_counts(counts)
+    return {'added': [dict(e) for e in batch], 'errors': errors}
 
 def get_course_enrollments(course_name):
     """Get all students enrolled in a course"""
-    enrollments = load_enrollments()
-    return [e for e in enrollments if e['course_name'].lower() == course_name.lower()]
+    engine = _engine()
+    if engine:
+        return engine.for_course(course_name)
+    
+    by_course = _cached_enrollments()['by_course']
+    return [dict(e) for e in by_course.get(_course_key(course_name), [])]
 
 def get_student_enrollments(student_id):
     """Get all courses a student is enrolled in"""
-    enrollments = load_enrollments()
-    return [e for e in enrollments if e['student_id'] == student_id]
+    engine = _engine()
+    if engine:
+        return engine.for_student(student_id)
+    
+    by_student = _cached_enrollments()['by_student']
+    return [dict(e) for e in by_student.get(student_id, [])]
 
 def get_enrollment_count(course_name):
     """Get total students enrolled in a course"""
-    return len(get_course_enrollments(course_name))
+    engine = _engine()
+    if engine:
+        return engine.count_for_course(course_name)
+    
+    by_course = _cached_enrollments()['by_course']
+    return len(by_course.get(_course_key(course_name), []))
 
 def get_all_courses():
     """Get all unique courses with enrollment counts"""
-    enrollments = load_enrollments()
-    courses_dict = {}
+    engine = _engine()
+    if engine:
+        return engine.courses()
     
-    for enrollment in enrollments:
-        course_name = enrollment['course_name']
-        if course_name not in courses_dict:
-            courses_dict[course_name] = {
-                'name': course_name,
-                'students_count': 0
-            }
-        courses_dict[course_name]['students_count'] += 1
+    counts = _read_course_counts()
+    if counts is None:
+        counts = rebuild_course_counts()
     
-    return list(courses_dict.values())
+    return [{'name': name, 'students_count': count} for name, count in counts.items()]
 
-# Initialize sample data
+def verify_course_counts():
+    """
+    Compare the persisted course aggregate with a fresh count of all enrollments
+    
+    Returns:
+        Dictionary of course name -> (stored count, actual count) for every course that drifted
+    """
+    engine = _engine()
+    if engine:
+        return engine.verify_course_counts()
+    
+    stored = _read_course_counts() or {}
+    actual = _count_courses(_cached_enrollments()['enrollments'])
+    return {
+        name: (stored.get(name, 0), actual.get(name, 0))
+        for name in set(stored) | set(actual)
+        if stored.get(name, 0) != actual.get(name, 0)
+    }
+
+def rebuild_course_counts():
+    """Recount enrollments per course and persist the result"""
+    engine = _engine()
+    if engine:
+        return engine.rebuild_course_counts()
+    
+    with locked(ENROLLMENTS_FILE):
+        counts = _count_courses(_cached_enrollments()['enrollments'])
+        if _file_signature() is not None:
+            _save_course_counts(counts)
+    return counts
+
+# Sample data (run seed_sample_data.py; importing this module never touches the disk)
 def init_sample_data():
-    """Initialize with sample enrollment data"""
-    if not os.path.exists(ENROLLMENTS_FILE):
+    """Initialize with sample enrollment data if the store is empty; returns True if it seeded"""
+    engine = _engine()
+    with locked(ENROLLMENTS_FILE):
+        if engine and not engine.is_empty():
+            return False
+        if not engine and os.path.exists(ENROLLMENTS_FILE):
+            return False
         sample_enrollments = [
             {
                 'id': 1,
@@ -115,7 +372,9 @@ def init_sample_data():
                 'status': 'Active'
             }
         ]
-        save_enrollments(sample_enrollments)
-
-# Initialize on import
-init_sample_data()
+        if engine:
+            for enrollment in sample_enrollments:
+                engine.add(enrollment)
+        else:
+            save_enrollments(sample_enrollments)
+    return True
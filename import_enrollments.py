@@ -0,0 +1,161 @@
+"""
+Bulk enrollment import from CSV or NDJSON
+
+Reads the input as a stream and hands it to enrollments_store.add_enrollments
+in chunks of Config.ENROLLMENT_IMPORT_CHUNK_SIZE records, so memory use is
+bounded by the chunk size rather than the file size. That needs the SQLite
+enrollments backend: the JSON backend rewrites its whole file on every write,
+so there the import is written in one batch and files with more than
+Config.ENROLLMENT_IMPORT_JSON_MAX_ROWS records are rejected before anything
+is written.
+
+CSV files need a header row with student_id, student_name, course_name and
+optionally enrollment_date and status. NDJSON files hold one JSON object
+with the same keys per line.
+
+Used by the admin endpoint POST /admin/enrollments/import and from the command line:
+    python import_enrollments.py enrollments.csv
+    python import_enrollments.py enrollments.ndjson --chunk-size 5000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from itertools import islice
+from config import Config
+
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, or None"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return None
+
+
+def iter_records(stream, fmt):
+    """
+    Yield (line number, record) pairs from a text stream
+
+    Malformed NDJSON lines are yielded as (line number, ValueError).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f'Invalid JSON: {e}')
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def import_enrollments(stream, fmt, chunk_size=None, progress=None):
+    """
+    Import enrollments from a text stream, one chunk at a time
+
+    Args:
+        stream: Text file object (CSV or NDJSON)
+        fmt: 'csv' or 'ndjson'
+        chunk_size: Records per batch (default Config.ENROLLMENT_IMPORT_CHUNK_SIZE)
+        progress: Optional callable receiving the running summary after each chunk
+
+    Returns:
+        Dictionary with rows, added, failed and the first MAX_REPORTED_ERRORS errors
+
+    Raises:
+        ValueError: more than Config.ENROLLMENT_IMPORT_JSON_MAX_ROWS records for the JSON backend
+    """
+    import enrollments_store
+
+    chunk_size = chunk_size or Config.ENROLLMENT_IMPORT_CHUNK_SIZE
+    summary = {'rows': 0, 'added': 0, 'failed': 0, 'errors': []}
+
+    def report(line, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'message': message})
+
+    records = iter_records(stream, fmt)
+    if enrollments_store.STORE_BACKEND == 'json':
+        max_rows = Config.ENROLLMENT_IMPORT_JSON_MAX_ROWS
+        chunk = list(islice(records, max_rows + 1))
+        if len(chunk) > max_rows:
+            raise ValueError(f"At most {max_rows} enrollments per import with the json enrollments backend; "
+                             "set ENROLLMENTS_STORE_BACKEND=sqlite to import larger files")
+        chunks = [chunk] if chunk else []
+    else:
+        chunks = iter(lambda: list(islice(records, chunk_size)), [])
+
+    for chunk in chunks:
+        summary['rows'] += len(chunk)
+
+        lines, batch = [], []
+        for line, record in chunk:
+            if isinstance(record, ValueError):
+                report(line, str(record))
+            else:
+                lines.append(line)
+                batch.append(record)
+
+        result = enrollments_store.add_enrollments(batch)
+        summary['added'] += len(result['added'])
+        for error in result['errors']:
+            report(lines[error['index']], error['message'])
+
+        if progress:
+            progress(summary)
+
+    return summary
+
+
+def import_upload(file_storage, fmt=None, chunk_size=None):
+    """Import an uploaded werkzeug FileStorage without reading it into memory"""
+    fmt = fmt or detect_format(file_storage.filename)
+    if fmt not in FORMATS:
+        raise ValueError('Unsupported file type. Upload a .csv or .ndjson file')
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    try:
+        return import_enrollments(stream, fmt, chunk_size)
+    finally:
+        stream.detach()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import enrollments from a CSV or NDJSON file")
+    parser.add_argument('path', help="file to import")
+    parser.add_argument('--format', choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, help=f"records per batch (default {Config.ENROLLMENT_IMPORT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    def show_progress(summary):
+        print(f"  {summary['rows']} rows read, {summary['added']} added, {summary['failed']} failed", flush=True)
+
+    with open(args.path, 'r', encoding='utf-8-sig', newline='') as f:
+        try:
+            summary = import_enrollments(f, fmt, args.chunk_size, progress=show_progress)
+        except ValueError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+
+    for error in summary['errors']:
+        print(f"  line {error['line']}: {error['message']}")
+    if summary['failed'] > len(summary['errors']):
+        print(f"  ... and {summary['failed'] - len(summary['errors'])} more errors")
+    print(f"✓ Imported {summary['added']} of {summary['rows']} enrollments")
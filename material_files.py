@@ -0,0 +1,50 @@
+"""
+Material files on disk
+
+Bulk deletes remove their files on a small background thread pool after
+the database transaction commits, so the request does not wait for the
+filesystem. Pending removals finish when the interpreter shuts down.
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def resolve_path(file_path):
+    """Filesystem path of a study_materials.file_path value"""
+    if file_path.startswith('/'):
+        return '.' + file_path
+    return os.path.join(Config.UPLOAD_FOLDER, file_path)
+
+
+def remove_file(file_path):
+    """Delete one material file; returns True if it was removed"""
+    try:
+        actual_path = resolve_path(file_path)
+        if os.path.exists(actual_path):
+            os.remove(actual_path)
+            return True
+    except Exception as e:
+        print(f"Error deleting file {file_path}: {e}")
+    return False
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.FILE_REMOVAL_WORKERS,
+                                           thread_name_prefix='material-files')
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def remove_files_later(file_paths):
+    """Queue material files for removal off the request path; returns the futures"""
+    executor = _get_executor()
+    return [executor.submit(remove_file, path) for path in file_paths if path]
@@ -0,0 +1,277 @@
+"""
+Append-only journal backend for uploaded materials
+
+Every mutation is appended as one JSON line to a journal file next to the
+snapshot (materials_data.json -> materials_data.journal). Once the journal
+grows past a threshold it is rotated and folded into the snapshot by a
+background thread. On startup the snapshot is loaded and the journal(s)
+are replayed on top of it.
+
+IDs never go back: the journal starts above the '.seq' high-water mark the
+JSON store keeps (store_files.allocate_id) and raises that mark with every
+compaction, before the records that used the IDs leave the journal.
+
+Journal records only ever assign state (put a whole record, delete an id,
+set a download count), so replaying a journal that was already folded into
+the snapshot is harmless. That is what makes a crash in the middle of a
+compaction safe.
+
+The catalog lives in the memory of one process, so only one process may
+open a journal: a second MaterialsJournal on the same files (another
+gunicorn worker, say) raises RuntimeError. Run the journal backend with a
+single worker process, or use the 'sqlite' backend.
+"""
+import atexit
+import json
+import os
+import threading
+from store_files import locked, read_high_water, raise_high_water
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use is not enforced
+    fcntl = None
+
+
+class MaterialsJournal:
+    """In-memory materials catalog backed by a JSON snapshot plus an append-only journal"""
+
+    def __init__(self, snapshot_file, compact_every=1000, fsync=False):
+        self.snapshot_file = snapshot_file
+        self.journal_file = os.path.splitext(snapshot_file)[0] + '.journal'
+        self.compacting_file = self.journal_file + '.compacting'
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._owner = self._claim_files()
+
+        self._lock = threading.Lock()
+        self._materials = {}
+        self._last_id = 0
+        self._pending_records = 0
+        self._version = 0
+        self._compactor = None
+
+        self._replay()
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+
+        # A leftover rotated journal means the last compaction never finished
+        if os.path.exists(self.compacting_file):
+            self._write_snapshot(list(self._materials.values()), self._last_id)
+
+        # Let a running compaction finish instead of leaving .compacting / .tmp files behind
+        atexit.register(self.close)
+
+    def _claim_files(self):
+        """Lock the journal for this process; raises RuntimeError if another process has it open"""
+        if fcntl is None:
+            return None
+        owner = open(self.journal_file + '.lock', 'a')
+        try:
+            fcntl.flock(owner.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            owner.close()
+            raise RuntimeError(f"{self.journal_file} is open in another process; "
+                               "the journal backend supports a single worker process")
+        return owner
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _replay(self):
+        """Load the snapshot, then apply any rotated and live journal records"""
+        # Includes IDs of materials deleted before the last compaction or under the JSON store
+        self._last_id = read_high_water(self.snapshot_file)
+        for material in self._read_snapshot():
+            self._materials[material['id']] = material
+            self._last_id = max(self._last_id, material['id'])
+
+        for path in (self.compacting_file, self.journal_file):
+            for record in self._read_journal(path):
+                self._apply(record)
+                if path == self.journal_file:
+                    self._pending_records += 1
+
+    def _read_snapshot(self):
+        """Read the snapshot file written by compaction (or by the plain JSON store)"""
+        if not os.path.exists(self.snapshot_file):
+            return []
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading materials snapshot: {e}")
+            return []
+
+    def _read_journal(self, path):
+        """Yield journal records, skipping a torn last line left by a crash"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Skipping unreadable journal record in {path}")
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def _apply(self, record):
+        """Apply one journal record to the in-memory catalog"""
+        self._version += 1
+        op = record.get('op')
+        if op == 'put':
+            material = record['material']
+            self._materials[material['id']] = material
+            self._last_id = max(self._last_id, material['id'])
+        elif op == 'delete':
+            self._materials.pop(record['id'], None)
+        elif op == 'downloads':
+            material = self._materials.get(record['id'])
+            if material is not None:
+                # Replace rather than mutate so snapshot copies stay consistent
+                self._materials[record['id']] = dict(material, downloads=record['downloads'])
+
+    def _append(self, record):
+        """Apply a record and append it to the journal. Caller holds the lock."""
+        self._apply(record)
+        self._journal.write(json.dumps(record) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+        self._pending_records += 1
+        if self._pending_records >= self.compact_every:
+            self._start_compaction()
+
+    def add(self, material):
+        """Assign the next ID to a new material and journal it"""
+        with self._lock:
+            material['id'] = self._last_id + 1
+            self._append({'op': 'put', 'material': material})
+            return dict(material)
+
+    def delete(self, material_id):
+        """Journal the removal of a material"""
+        with self._lock:
+            self._append({'op': 'delete', 'id': int(material_id)})
+        return True
+
+    def increment_downloads(self, material_id, count=1):
+        """Journal the new download count of a material"""
+        self.add_downloads({material_id: count})
+
+    def add_downloads(self, deltas):
+        """Journal new download counts for a batch of {material_id: count}"""
+        with self._lock:
+            for material_id, count in deltas.items():
+                material = self._materials.get(int(material_id))
+                if material is None:
+                    continue
+                self._append({'op': 'downloads', 'id': int(material_id),
+                              'downloads': material.get('downloads', 0) + count})
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def last_id(self):
+        """Highest material ID handed out so far, including deleted ones"""
+        return self._last_id
+
+    def get(self, material_id):
+        """Get a copy of one material, or None"""
+        material = self._materials.get(int(material_id))
+        return dict(material) if material is not None else None
+
+    def all(self):
+        """Get all materials in upload order"""
+        with self._lock:
+            return [dict(m) for m in self._materials.values()]
+
+    def ordered(self):
+        """Return (materials, version) without copying the records.
+
+        Records are replaced, never modified, so the list stays valid; the
+        version changes with every applied record.
+        """
+        with self._lock:
+            return list(self._materials.values()), ('journal', self._version)
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _start_compaction(self):
+        """Rotate the live journal and fold it into the snapshot in the background.
+
+        Caller holds the lock. While a compaction is running this is retried on
+        the next append; after a failed one the rotated journal is still there,
+        and the live journal is appended to it before the snapshot is retried.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        self._journal.close()
+        if os.path.exists(self.compacting_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as live, \
+                    open(self.compacting_file, 'a', encoding='utf-8') as rotated:
+                for line in live:
+                    rotated.write(line)
+                rotated.flush()
+                os.fsync(rotated.fileno())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.compacting_file)
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._pending_records = 0
+
+        snapshot = list(self._materials.values())
+        self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot, self._last_id),
+                                           name='materials-journal-compactor', daemon=True)
+        self._compactor.start()
+
+    def _write_snapshot(self, materials, last_id):
+        """Record the high-water mark, atomically replace the snapshot, then drop the rotated journal"""
+        tmp_file = self.snapshot_file + '.tmp'
+        try:
+            with locked(self.snapshot_file):
+                raise_high_water(self.snapshot_file, last_id)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(materials, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.snapshot_file)
+            os.remove(self.compacting_file)
+        except OSError as e:
+            # The rotated journal stays; the next compaction folds into it and retries
+            print(f"Materials journal compaction failed: {e}")
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+    def compact(self):
+        """Force a compaction and wait for it to finish"""
+        with self._lock:
+            self._start_compaction()
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        """Wait for a running compaction, close the journal file and release it to other processes"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._journal.close()
+            if self._owner is not None:
+                self._owner.close()
+                self._owner = None
@@ -1,34 +1,114 @@
 """
 Simple file-based storage for uploaded materials
+
+The storage engine is picked by Config.MATERIALS_STORE_BACKEND:
+- 'json': the whole catalog lives in MATERIALS_FILE and is rewritten on every change
+- 'journal': changes are appended to a journal and compacted into MATERIALS_FILE
+  in the background (see materials_journal.py)
+- 'sqlite': rows in the materials table of Config.STORE_SQLITE_PATH (see sqlite_store.py)
 """
 import json
 import os
+import threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 from pathlib import Path
+from config import Config
+from store_files import locked, atomic_write_json, allocate_id
 
 MATERIALS_FILE = 'materials_data.json'
+STORE_BACKEND = Config.MATERIALS_STORE_BACKEND
+
+MATERIAL_FIELDS = ('id', 'title', 'description', 'filename', 'original_name',
+                   'file_path', 'teacher', 'uploaded_at', 'downloads')
+MATERIAL_SORTS = ('newest', 'oldest', 'title', 'downloads')
+CURSOR_SORTS = ('newest', 'oldest')
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+_engine_instance = None
+_engine_lock = threading.Lock()
+
+
+def _engine():
+    """Return the configured storage engine, or None for the plain JSON file"""
+    global _engine_instance
+    if STORE_BACKEND == 'json':
+        return None
+    if _engine_instance is None:
+        with _engine_lock:
+            if _engine_instance is None:
+                if STORE_BACKEND == 'journal':
+                    from materials_journal import MaterialsJournal
+                    _engine_instance = MaterialsJournal(
+                        MATERIALS_FILE,
+                        compact_every=Config.MATERIALS_JOURNAL_COMPACT_EVERY,
+                        fsync=Config.MATERIALS_JOURNAL_FSYNC
+                    )
+                elif STORE_BACKEND == 'sqlite':
+                    from sqlite_store import SqliteMaterials, get_database
+                    _engine_instance = SqliteMaterials(get_database(Config.STORE_SQLITE_PATH))
+                else:
+                    raise ValueError(f"Unknown materials store backend: {STORE_BACKEND}")
+    return _engine_instance
+
+
+# Parsed copy of MATERIALS_FILE for the JSON backend, keyed by the file's stat signature
+_cache = {'signature': None, 'materials': [], 'by_id': {}}
+_cache_lock = threading.Lock()
+
+
+def _file_signature():
+    """Identify the current version of MATERIALS_FILE without reading it"""
+    try:
+        st = os.stat(MATERIALS_FILE)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _remember(materials, signature):
+    """Replace the cached catalog. Caller holds the cache lock."""
+    _cache['signature'] = signature
+    _cache['materials'] = materials
+    _cache['by_id'] = {m['id']: m for m in materials}
+
+
+def _cached_materials():
+    """Return (materials, by_id) for MATERIALS_FILE, re-parsing only when the file changed.
+
+    The returned records are shared with the cache and must not be modified.
+    """
+    signature = _file_signature()
+    with _cache_lock:
+        if signature != _cache['signature']:
+            materials = []
+            if signature is not None:
+                try:
+                    with open(MATERIALS_FILE, 'r') as f:
+                        materials = json.load(f)
+                except:
+                    materials = []
+            _remember(materials, signature)
+        return _cache['materials'], _cache['by_id']
+
 
 def load_materials():
-    """Load materials from JSON file"""
-    if os.path.exists(MATERIALS_FILE):
-        try:
-            with open(MATERIALS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    """Load materials from JSON file (a private copy that is safe to modify)"""
+    materials, _ = _cached_materials()
+    return [dict(m) for m in materials]
 
 def save_materials(materials):
-    """Save materials to JSON file"""
-    with open(MATERIALS_FILE, 'w') as f:
-        json.dump(materials, f, indent=2)
+    """Save materials to JSON file (atomically; callers hold locked(MATERIALS_FILE))"""
+    with _cache_lock:
+        atomic_write_json(MATERIALS_FILE, materials)
+        # Cache copies so the caller's records stay theirs to modify
+        _remember([dict(m) for m in materials], _file_signature())
 
 def add_material(title, description, filename, original_name, file_path, teacher_name="Teacher"):
     """Add a new material"""
-    materials = load_materials()
-    
     material = {
-        'id': len(materials) + 1,
+        'id': None,
         'title': title,
         'description': description,
         'filename': filename,
@@ -38,35 +118,168 @@ def add_material(title, description, filename, original_name, file_path, teacher
         'uploaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'downloads': 0
     }
-    
-    materials.append(material)
-    save_materials(materials)
+
+    engine = _engine()
+    if engine:
+        return engine.add(material)
+
+    with locked(MATERIALS_FILE):
+        materials = load_materials()
+        material['id'] = allocate_id(MATERIALS_FILE, floor=max((m['id'] for m in materials), default=0))
+        materials.append(material)
+        save_materials(materials)
     return material
 
 def get_all_materials():
-    """Get all materials"""
+    """Get all materials (copies that are safe to modify)"""
+    engine = _engine()
+    if engine:
+        return engine.all()
     return load_materials()
 
 def get_material(material_id):
     """Get a specific material"""
-    materials = load_materials()
-    for material in materials:
-        if material['id'] == int(material_id):
-            return material
-    return None
+    engine = _engine()
+    if engine:
+        return engine.get(material_id)
+
+    _, by_id = _cached_materials()
+    material = by_id.get(int(material_id))
+    return dict(material) if material is not None else None
 
 def delete_material(material_id):
     """Delete a material"""
-    materials = load_materials()
-    materials = [m for m in materials if m['id'] != int(material_id)]
-    save_materials(materials)
+    engine = _engine()
+    if engine:
+        return engine.delete(material_id)
+
+    with locked(MATERIALS_FILE):
+        materials = load_materials()
+        materials = [m for m in materials if m['id'] != int(material_id)]
+        save_materials(materials)
     return True
 
 def increment_downloads(material_id):
     """Increment download count"""
-    materials = load_materials()
-    for material in materials:
-        if material['id'] == int(material_id):
-            material['downloads'] += 1
-            break
-    save_materials(materials)
+    add_downloads({material_id: 1})
+
+def add_downloads(deltas):
+    """Add a batch of download counts ({material_id: count}) in one write"""
+    engine = _engine()
+    if engine:
+        engine.add_downloads(deltas)
+        return
+
+    deltas = {int(material_id): count for material_id, count in deltas.items()}
+    with locked(MATERIALS_FILE):
+        materials = load_materials()
+        for material in materials:
+            if material['id'] in deltas:
+                material['downloads'] += deltas[material['id']]
+        save_materials(materials)
+
+
+# Sorted views of the in-memory catalog, rebuilt when the catalog version changes
+_orders = {'version': None, 'views': {}}
+_orders_lock = threading.Lock()
+
+
+def _sort_key(sort):
+    if sort == 'title':
+        return lambda m: ((m.get('title') or '').lower(), m['id'])
+    if sort == 'downloads':
+        return lambda m: (-m.get('downloads', 0), m['id'])
+    return lambda m: m['id']
+
+
+def _sorted_view(materials, version, sort):
+    """Return materials in the requested order, sorting at most once per catalog version"""
+    with _orders_lock:
+        if _orders['version'] != version:
+            _orders['version'] = version
+            _orders['views'] = {}
+        views = _orders['views']
+        if sort not in views:
+            if sort in ('newest', 'oldest'):
+                if 'oldest' not in views:
+                    views['oldest'] = sorted(materials, key=_sort_key('oldest'))
+                    views['ids'] = [m['id'] for m in views['oldest']]
+                if sort == 'newest':
+                    views['newest'] = views['oldest'][::-1]
+            else:
+                views[sort] = sorted(materials, key=_sort_key(sort))
+        return views[sort], views.get('ids')
+
+
+def _page_in_memory(materials, version, offset, cursor, limit, sort, before=None):
+    """Slice one page out of an in-memory catalog. Returns (page, total, has_more, has_previous)."""
+    ordered, ids = _sorted_view(materials, version, sort)
+    total = len(ordered)
+
+    if cursor is not None:
+        if sort == 'oldest':
+            offset = bisect_right(ids, cursor)
+        else:
+            offset = total - bisect_left(ids, cursor)
+    elif before is not None:
+        # The page ends just before the row `before`
+        if sort == 'oldest':
+            end = bisect_left(ids, before)
+        else:
+            end = total - bisect_right(ids, before)
+        offset = max(end - limit, 0)
+        limit = end - offset
+
+    page = ordered[offset:offset + limit]
+    return page, total, offset + limit < total, offset > 0
+
+
+def get_materials_page(offset=0, cursor=None, limit=DEFAULT_PAGE_SIZE, sort='newest', fields=None, before=None):
+    """
+    Get one page of materials
+    
+    Args:
+        offset: Number of materials to skip (ignored when cursor or before is given)
+        cursor: next_cursor from the previous page; only for 'newest' and 'oldest'
+        limit: Page size, capped at MAX_PAGE_SIZE
+        sort: 'newest', 'oldest', 'title' or 'downloads'
+        fields: Material keys to return ('id' is always included), or None for all
+        before: prev_cursor from the following page (the page before it); only for 'newest' and 'oldest'
+        
+    Returns:
+        Dictionary with materials, total, offset, limit, sort, next_cursor and prev_cursor
+    """
+    if sort not in MATERIAL_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    if (cursor is not None or before is not None) and sort not in CURSOR_SORTS:
+        raise ValueError(f"Cursor pagination is only supported for {', '.join(CURSOR_SORTS)}")
+    fields = tuple(MATERIAL_FIELDS if fields is None else ['id'] + [f for f in fields if f != 'id'])
+    unknown = set(fields) - set(MATERIAL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    offset = max(0, int(offset))
+    cursor = int(cursor) if cursor is not None else None
+    before = int(before) if before is not None and cursor is None else None
+
+    engine = _engine()
+    if engine and hasattr(engine, 'page'):
+        page, total, has_more, has_previous = engine.page(offset, cursor, limit, sort, fields, before)
+    else:
+        if engine:
+            materials, version = engine.ordered()
+        else:
+            materials, _ = _cached_materials()
+            version = ('json', _cache['signature'])
+        page, total, has_more, has_previous = _page_in_memory(materials, version, offset, cursor, limit, sort, before)
+        page = [{f: m.get(f) for f in fields} for m in page]
+
+    return {
+        'materials': page,
+        'total': total,
+        'offset': offset if cursor is None and before is None else None,
+        'limit': limit,
+        'sort': sort,
+        'next_cursor': page[-1]['id'] if has_more and page and sort in CURSOR_SORTS else None,
+        'prev_cursor': page[0]['id'] if has_previous and page and sort in CURSOR_SORTS else None
+    }
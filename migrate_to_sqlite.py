@@ -0,0 +1,94 @@
+"""
+One-shot migration of the JSON stores into SQLite
+
+Copies materials_data.json and enrollments_data.json into the database at
+Config.STORE_SQLITE_PATH, keeping every record's ID. Materials written by
+the journal backend are replayed from materials_data.journal and folded
+into the snapshot first, so uncompacted changes are not lost. Stop the app
+before migrating. Afterwards set MATERIALS_STORE_BACKEND=sqlite and
+ENROLLMENTS_STORE_BACKEND=sqlite.
+
+Usage:
+    python migrate_to_sqlite.py [--force]
+"""
+import argparse
+import json
+import os
+from config import Config
+from store_files import read_high_water
+from sqlite_store import get_database, SqliteEnrollments, MATERIAL_COLUMNS, ENROLLMENT_COLUMNS
+from materials_journal import MaterialsJournal
+from materials_store import MATERIALS_FILE
+from enrollments_store import ENROLLMENTS_FILE
+
+
+def _read_json(path):
+    """Read a JSON store file, or an empty list if it does not exist"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _read_materials():
+    """(materials, highest ID used) including journal records not yet compacted into the snapshot"""
+    journal_file = os.path.splitext(MATERIALS_FILE)[0] + '.journal'
+    if not (os.path.exists(journal_file) or os.path.exists(journal_file + '.compacting')):
+        return _read_json(MATERIALS_FILE), 0
+
+    journal = MaterialsJournal(MATERIALS_FILE)
+    try:
+        journal.compact()
+        return journal.all(), journal.last_id
+    finally:
+        journal.close()
+
+
+def _copy_table(conn, table, columns, rows, high_water):
+    """Insert rows with their original IDs and carry over the ID high-water mark"""
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [[row.get(c) for c in columns] for row in rows]
+    )
+
+    # Never reuse IDs the JSON store already handed out and deleted
+    high_water = max([high_water] + [row['id'] for row in rows])
+    if high_water:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, high_water))
+
+
+def migrate(force=False):
+    """Copy both JSON stores into SQLite"""
+    db = get_database(Config.STORE_SQLITE_PATH)
+    conn = db.connection()
+
+    existing = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM materials) + (SELECT COUNT(*) FROM enrollments)"
+    ).fetchone()[0]
+    if existing and not force:
+        print(f"✗ {Config.STORE_SQLITE_PATH} already has data. Re-run with --force to replace it.")
+        return False
+
+    materials, journal_high_water = _read_materials()
+    enrollments = _read_json(ENROLLMENTS_FILE)
+
+    with conn:
+        conn.execute("DELETE FROM materials")
+        conn.execute("DELETE FROM enrollments")
+        _copy_table(conn, 'materials', MATERIAL_COLUMNS, materials,
+                    max(read_high_water(MATERIALS_FILE), journal_high_water))
+        _copy_table(conn, 'enrollments', ENROLLMENT_COLUMNS, enrollments, read_high_water(ENROLLMENTS_FILE))
+
+    SqliteEnrollments(db).rebuild_course_counts()
+
+    print(f"✓ Migrated {len(materials)} materials and {len(enrollments)} enrollments "
+          f"into {Config.STORE_SQLITE_PATH}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the JSON stores into SQLite")
+    parser.add_argument('--force', action='store_true', help="replace data already in the database")
+    args = parser.parse_args()
+    migrate(force=args.force)
@@ -0,0 +1,218 @@
+"""
+Daily analytics rollups for /admin/analytics
+
+rollup() aggregates users and study_materials into two summary tables:
+- analytics_daily_signups(day, role, signups): users by signup day
+- analytics_daily_materials(day, subject, approval_status, materials):
+  materials by upload day, subject and current status
+
+Each run only recomputes the days touched since the previous run: days
+with users created, or materials uploaded or updated, after the stored
+watermark (minus Config.ANALYTICS_ROLLUP_OVERLAP_MINUTES, to catch rows
+committed late). Every recomputation uses a created_at / upload_date
+range, never DATE(column) = ..., so it stays on the indexes. Deleted
+rows touch no timestamp, so the totals are then checked against the
+statistics counters and a table is rebuilt in full if they disagree.
+
+The analytics page reads only these tables (see rollup_analytics.py).
+"""
+from datetime import date, datetime, timedelta
+from config import Config
+from models.dialect import get_dialect
+from models.statistics_model import get_counters
+
+
+def _as_date(value):
+    """DATE() result as a date (MySQL returns date, SQLite returns text)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_range(day):
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def _get_watermark(cursor, name):
+    cursor.execute("SELECT watermark FROM analytics_rollup_state WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    if not row or row['watermark'] is None:
+        return None
+    value = row['watermark']
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def _set_watermark(cursor, name, watermark):
+    cursor.execute(
+        get_dialect().upsert('analytics_rollup_state', ('name', 'watermark', 'updated_at'), key=('name',)),
+        (name, watermark, datetime.now())
+    )
+
+
+# ----------------------------------------------------------------------
+# Signups
+# ----------------------------------------------------------------------
+
+def _rebuild_signups(cursor):
+    cursor.execute("DELETE FROM analytics_daily_signups")
+    cursor.execute(
+        """INSERT INTO analytics_daily_signups (day, role, signups)
+           SELECT DATE(created_at), role, COUNT(*) FROM users
+           WHERE created_at IS NOT NULL GROUP BY DATE(created_at), role"""
+    )
+
+
+def _refresh_signup_day(cursor, day):
+    start, end = _day_range(day)
+    cursor.execute("DELETE FROM analytics_daily_signups WHERE day = %s", (day,))
+    cursor.execute(
+        """INSERT INTO analytics_daily_signups (day, role, signups)
+           SELECT %s, role, COUNT(*) FROM users
+           WHERE created_at >= %s AND created_at < %s GROUP BY role""",
+        (day, start, end)
+    )
+
+
+def _rollup_signups(cursor, since):
+    cursor.execute("SELECT MAX(created_at) AS latest FROM users")
+    latest = cursor.fetchone()['latest']
+
+    if since is None:
+        _rebuild_signups(cursor)
+        return None, latest
+
+    cursor.execute(
+        "SELECT DISTINCT DATE(created_at) AS day FROM users WHERE created_at >= %s",
+        (since,)
+    )
+    days = sorted(_as_date(row['day']) for row in cursor.fetchall())
+    for day in days:
+        _refresh_signup_day(cursor, day)
+    return days, latest
+
+
+# ----------------------------------------------------------------------
+# Materials
+# ----------------------------------------------------------------------
+
+def _rebuild_materials(cursor):
+    cursor.execute("DELETE FROM analytics_daily_materials")
+    cursor.execute(
+        """INSERT INTO analytics_daily_materials (day, subject, approval_status, materials)
+           SELECT DATE(upload_date), subject, approval_status, COUNT(*) FROM study_materials
+           WHERE upload_date IS NOT NULL GROUP BY DATE(upload_date), subject, approval_status"""
+    )
+
+
+def _refresh_material_day(cursor, day):
+    start, end = _day_range(day)
+    cursor.execute("DELETE FROM analytics_daily_materials WHERE day = %s", (day,))
+    cursor.execute(
+        """INSERT INTO analytics_daily_materials (day, subject, approval_status, materials)
+           SELECT %s, subject, approval_status, COUNT(*) FROM study_materials
+           WHERE upload_date >= %s AND upload_date < %s GROUP BY subject, approval_status""",
+        (day, start, end)
+    )
+
+
+def _rollup_materials(cursor, since):
+    cursor.execute("SELECT MAX(updated_date) AS latest FROM study_materials")
+    latest = cursor.fetchone()['latest']
+
+    if since is None:
+        _rebuild_materials(cursor)
+        return None, latest
+
+    # Uploads and status changes both set updated_date
+    cursor.execute(
+        "SELECT DISTINCT DATE(upload_date) AS day FROM study_materials WHERE updated_date >= %s",
+        (since,)
+    )
+    days = sorted(_as_date(row['day']) for row in cursor.fetchall())
+    for day in days:
+        _refresh_material_day(cursor, day)
+    return days, latest
+
+
+# ----------------------------------------------------------------------
+# Job
+# ----------------------------------------------------------------------
+
+_ROLLUPS = {
+    'signups': (_rollup_signups, _rebuild_signups,
+                "SELECT COALESCE(SUM(signups), 0) AS total FROM analytics_daily_signups", 'users_total'),
+    'materials': (_rollup_materials, _rebuild_materials,
+                  "SELECT COALESCE(SUM(materials), 0) AS total FROM analytics_daily_materials", 'materials_total'),
+}
+
+
+def rollup(cursor, full: bool = False) -> dict:
+    """
+    Bring the rollup tables up to date (the caller commits)
+
+    Args:
+        cursor: MySQL cursor
+        full: Rebuild every day instead of only the days touched since the last run
+
+    Returns:
+        {name: {'days': days recomputed or 'all', 'rebuilt': reason or None}}
+    """
+    overlap = timedelta(minutes=Config.ANALYTICS_ROLLUP_OVERLAP_MINUTES)
+    counters = get_counters(cursor, [counter for _, _, _, counter in _ROLLUPS.values()])
+    summary = {}
+
+    for name, (incremental, rebuild, total_query, counter) in _ROLLUPS.items():
+        watermark = None if full else _get_watermark(cursor, name)
+        days, latest = incremental(cursor, watermark - overlap if watermark else None)
+        result = {'days': 'all' if days is None else [day.isoformat() for day in days], 'rebuilt': None}
+
+        if days is not None:
+            cursor.execute(total_query)
+            total = int(cursor.fetchone()['total'])
+            if total != counters[counter]:
+                # Rows were deleted (or the counters drifted): recount everything
+                rebuild(cursor)
+                result['days'] = 'all'
+                result['rebuilt'] = f"total {total} != {counter} {counters[counter]}"
+
+        if latest is not None:
+            _set_watermark(cursor, name, latest if isinstance(latest, datetime) else datetime.fromisoformat(str(latest)))
+        summary[name] = result
+
+    return summary
+
+
+# ----------------------------------------------------------------------
+# Readers for the analytics page
+# ----------------------------------------------------------------------
+
+def get_user_growth(cursor, days: int = 30) -> list:
+    """Signups per day, latest day first"""
+    cursor.execute(
+        """SELECT day AS date, SUM(signups) AS count FROM analytics_daily_signups
+           GROUP BY day ORDER BY day DESC LIMIT %s""",
+        (days,)
+    )
+    return cursor.fetchall()
+
+
+def get_material_status(cursor) -> list:
+    """Materials per approval status"""
+    cursor.execute(
+        """SELECT SUM(materials) AS count, approval_status FROM analytics_daily_materials
+           GROUP BY approval_status"""
+    )
+    return cursor.fetchall()
+
+
+def get_top_subjects(cursor, limit: int = 10) -> list:
+    """Subjects with the most materials"""
+    cursor.execute(
+        """SELECT subject, SUM(materials) AS count FROM analytics_daily_materials
+           GROUP BY subject ORDER BY count DESC LIMIT %s""",
+        (limit,)
+    )
+    return cursor.fetchall()
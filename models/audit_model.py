@@ -0,0 +1,29 @@
+"""Audit log model for database operations"""
+
+COLUMNS = ('user_id', 'action', 'entity_type', 'entity_id', 'old_value', 'new_value',
+           'ip_address', 'user_agent', 'created_at')
+
+
+def insert_audit_logs(cursor, rows: list) -> dict:
+    """
+    Insert audit_logs rows in one statement
+    
+    Args:
+        cursor: MySQL cursor
+        rows: Tuples of values in COLUMNS order
+        
+    Returns:
+        Dictionary with success status and the number of rows inserted
+    """
+    try:
+        if rows:
+            # pymysql sends an executemany INSERT ... VALUES as a single multi-row INSERT
+            cursor.executemany(
+                f"INSERT INTO audit_logs ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})",
+                rows
+            )
+        return {"success": True, "inserted": len(rows)}
+    except Exception as e:
+        print(f"Error inserting audit logs: {e}")
+        return {"success": False, "message": str(e)}
+
@@ -1,5 +1,4 @@
 """Authentication utilities for secure password handling"""
-import bcrypt
 from config import Config
 
 
@@ -16,6 +15,8 @@ def hash_password(password: str) -> str:
     if not password or len(password) < Config.MIN_PASSWORD_LENGTH:
         raise ValueError(f"Password must be at least {Config.MIN_PASSWORD_LENGTH} characters long")
     
+    import bcrypt
+    
     salt = bcrypt.gensalt(rounds=Config.BCRYPT_LOG_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
@@ -32,6 +33,8 @@ def verify_password(password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
+    import bcrypt
+    
     try:
         return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
     except Exception as e:
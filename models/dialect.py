@@ -0,0 +1,362 @@
+"""
+SQL dialects for the models package
+
+The models are written against pymysql: %s placeholders and dict rows.
+Config.DB_ENGINE picks the database behind them:
+- 'mysql' (default): the MySQL server from Config.MYSQL_*
+- 'sqlite': an embedded database file at Config.DB_SQLITE_PATH, for small
+  single-node installs and for load tests and benchmarks on a laptop.
+  connect_sqlite() returns connections whose cursors translate %s to ?
+  and return dict rows, so model code runs unchanged.
+
+The few statements that really differ between engines are built by the
+current dialect, e.g.
+
+    cursor.execute(get_dialect().upsert('admin_profiles', columns, key=('user_id',)), values)
+
+Create the SQLite schema once with setup_sqlite_database.py.
+"""
+import re
+import sqlite3
+from datetime import date, datetime
+from config import Config
+
+
+def like_escape(term):
+    """term with the LIKE wildcards escaped, for patterns used with ESCAPE '!'"""
+    return term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+
+class MySQLDialect:
+    """MySQL / MariaDB"""
+
+    name = 'mysql'
+    for_update = ' FOR UPDATE'
+
+    @property
+    def skip_locked(self):
+        """Row-lock clause that skips rows other transactions hold (MySQL 8.0+ / MariaDB 10.6+)"""
+        return ' FOR UPDATE SKIP LOCKED' if Config.MYSQL_SKIP_LOCKED else ' FOR UPDATE'
+
+    def translate(self, sql):
+        """Rewrite a %s-style statement for this engine"""
+        return sql
+
+    def upsert(self, table, columns, key, increment=()):
+        """
+        INSERT of columns (%s placeholders) that updates the other columns when key already exists
+        
+        Columns in increment are added to the existing value instead of replacing it.
+        """
+        updates = ', '.join(f"{c} = {c} + VALUES({c})" if c in increment else f"{c} = VALUES({c})"
+                            for c in columns if c not in key)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}")
+
+    def contains(self, column, term, fulltext=True):
+        """
+        (condition, params) matching rows whose column contains term
+
+        Answered from the FULLTEXT ngram index on the column (see setup_database.py);
+        the LIKE rechecks the candidates, so the match is an exact substring.
+        With fulltext=False it is the LIKE alone, a scan.
+        """
+        if not fulltext:
+            return f"{column} LIKE %s ESCAPE '!'", ['%' + like_escape(term) + '%']
+        phrase = '"' + term.replace('"', ' ') + '"'
+        return (f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE) AND {column} LIKE %s ESCAPE '!'",
+                [phrase, '%' + like_escape(term) + '%'])
+
+    def is_fulltext_error(self, error):
+        """True if error says the FULLTEXT index is missing or unsupported (1191, 1214)"""
+        args = getattr(error, 'args', ())
+        return bool(args) and args[0] in (1191, 1214)
+
+
+# A quoted literal (left untouched), a %s placeholder or an escaped %%
+_PARAM_TOKENS = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")|%s|%%")
+
+
+class SQLiteDialect:
+    """Embedded SQLite (standard library sqlite3)"""
+
+    name = 'sqlite'
+    for_update = ''  # writers are serialized by the database lock
+    skip_locked = None  # no row locks; claim with a single UPDATE instead
+
+    def translate(self, sql):
+        """Rewrite a %s-style statement for this engine"""
+        def replace(match):
+            if match.group(1):
+                return match.group(1)
+            return '?' if match.group(0) == '%s' else '%'
+        return _PARAM_TOKENS.sub(replace, sql)
+
+    def upsert(self, table, columns, key, increment=()):
+        """
+        INSERT of columns (%s placeholders) that updates the other columns when key already exists
+        
+        Columns in increment are added to the existing value instead of replacing it.
+        """
+        updates = ', '.join(f"{c} = {c} + excluded.{c}" if c in increment else f"{c} = excluded.{c}"
+                            for c in columns if c not in key)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+
+    def contains(self, column, term, fulltext=True):
+        """(condition, params) matching rows whose column contains term (a scan; no full-text index)"""
+        return f"{column} LIKE %s ESCAPE '!'", ['%' + like_escape(term) + '%']
+
+    def is_fulltext_error(self, error):
+        return False
+
+
+_DIALECTS = {'mysql': MySQLDialect(), 'sqlite': SQLiteDialect()}
+
+
+def get_dialect(engine=None):
+    """Dialect for engine (default Config.DB_ENGINE)"""
+    engine = engine or Config.DB_ENGINE
+    if engine not in _DIALECTS:
+        raise ValueError(f"Unknown database engine: {engine}")
+    return _DIALECTS[engine]
+
+
+# ----------------------------------------------------------------------
+# SQLite connections with the pymysql interface used by the app
+# ----------------------------------------------------------------------
+
+# Store datetimes the way MySQL prints them, so DATE(created_at) and ORDER BY work the same
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' ', 'seconds'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+
+def _params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return params
+    return tuple(params)
+
+
+class SqliteCursor:
+    """sqlite3 cursor taking %s placeholders and returning dict rows"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        self._cursor.execute(_DIALECTS['sqlite'].translate(query), _params(params))
+        return self._cursor.rowcount
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(_DIALECTS['sqlite'].translate(query), [_params(p) for p in seq_params])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+        return [dict(row) for row in rows]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def __iter__(self):
+        return (dict(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """sqlite3 connection with the pymysql methods used by db_pool and the routes"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        # MySQL functions used in the routes' SQL
+        self._conn.create_function('CONCAT', -1, lambda *parts: ''.join('' if p is None else str(p) for p in parts))
+        self._conn.create_function('NOW', 0, lambda: datetime.now().isoformat(' ', 'seconds'))
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+
+def connect_sqlite(path=None):
+    """Open the embedded database (default Config.DB_SQLITE_PATH)"""
+    return SqliteConnection(path or Config.DB_SQLITE_PATH)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT UNIQUE NOT NULL COLLATE NOCASE,  -- case-insensitive like MySQL's, so LIKE 'prefix%' uses the index
+    password TEXT NOT NULL,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('student', 'teacher', 'admin')),
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    is_active INTEGER DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_role ON users (role);
+CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_users_role_created ON users (role, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_users_role_email ON users (role, email);
+
+CREATE TABLE IF NOT EXISTS courses (
+    course_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_name TEXT NOT NULL,
+    course_code TEXT UNIQUE NOT NULL,
+    description TEXT,
+    teacher_id INTEGER,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS student_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE REFERENCES users (id) ON DELETE CASCADE,
+    role TEXT DEFAULT 'student',
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    register_number TEXT,
+    department TEXT,
+    course_details TEXT,
+    photo_path TEXT,
+    profile_photo TEXT,
+    bio TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS teacher_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE REFERENCES users (id) ON DELETE CASCADE,
+    role TEXT DEFAULT 'teacher',
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    department TEXT,
+    posting TEXT,
+    specialization TEXT,
+    bio TEXT,
+    experience_years INTEGER,
+    photo_path TEXT,
+    profile_photo TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS admin_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE REFERENCES users (id) ON DELETE CASCADE,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    department TEXT,
+    designation TEXT,
+    photo_path TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS study_materials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    description TEXT,
+    file_path TEXT NOT NULL,
+    file_type TEXT,
+    uploaded_by INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    approval_status TEXT DEFAULT 'pending' CHECK (approval_status IN ('pending', 'approved', 'rejected')),
+    upload_date TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_date TEXT DEFAULT CURRENT_TIMESTAMP,
+    download_count INTEGER DEFAULT 0,
+    approved_by INTEGER REFERENCES users (id) ON DELETE SET NULL,
+    approval_date TEXT,
+    claimed_by INTEGER REFERENCES users (id) ON DELETE SET NULL,
+    claim_expires_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_subject ON study_materials (subject);
+CREATE INDEX IF NOT EXISTS idx_uploaded_by ON study_materials (uploaded_by);
+CREATE INDEX IF NOT EXISTS idx_approval_status ON study_materials (approval_status);
+CREATE INDEX IF NOT EXISTS idx_materials_upload_date ON study_materials (upload_date, id);
+CREATE INDEX IF NOT EXISTS idx_materials_status_upload_date ON study_materials (approval_status, upload_date, id);
+CREATE INDEX IF NOT EXISTS idx_materials_updated ON study_materials (updated_date);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+    action TEXT NOT NULL,
+    entity_type TEXT,
+    entity_id INTEGER,
+    old_value TEXT,
+    new_value TEXT,
+    ip_address TEXT,
+    user_agent TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_audit_user_id ON audit_logs (user_id);
+CREATE INDEX IF NOT EXISTS idx_audit_created_at ON audit_logs (created_at);
+
+CREATE TABLE IF NOT EXISTS analytics_daily_signups (
+    day TEXT NOT NULL,
+    role TEXT NOT NULL,
+    signups INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, role)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_daily_materials (
+    day TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    approval_status TEXT NOT NULL,
+    materials INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, subject, approval_status)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+    name TEXT PRIMARY KEY,
+    watermark TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS statistics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    metric_name TEXT NOT NULL,
+    metric_value INTEGER DEFAULT 0,
+    metric_date TEXT,
+    UNIQUE (metric_name, metric_date)
+);
+"""
+
+
+def create_sqlite_schema(connection):
+    """Create every table the models use (idempotent)"""
+    connection._conn.executescript(SQLITE_SCHEMA)
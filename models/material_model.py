@@ -1,5 +1,8 @@
 """Study materials model for database operations"""
-from datetime import datetime
+from datetime import datetime, timedelta
+from models.dialect import get_dialect
+from models.pagination import fetch_page
+from models.statistics_model import adjust_counters, combine_deltas, material_deltas
 
 
 def add_material(cursor, title: str, subject: str, description: str, file_path: str, uploaded_by: int, approval_status: str = 'pending') -> dict:
@@ -27,6 +30,7 @@ def add_material(cursor, title: str, subject: str, description: str, file_path:
         )
         
         material_id = cursor.lastrowid
+        adjust_counters(cursor, material_deltas(approval_status))
         return {"success": True, "material_id": material_id, "message": "Material uploaded successfully"}
     
     except Exception as e:
@@ -97,6 +101,25 @@ def get_all_materials(cursor, approval_status: str = None) -> list:
         return []
 
 
+def get_materials_page(cursor, approval_status: str = None, after: str = None, before: str = None,
+                       per_page: int = 20) -> dict:
+    """
+    One page of materials with uploader names, newest first, using keyset pagination on (upload_date, id)
+    
+    Returns:
+        {'rows', 'next_cursor', 'prev_cursor'} (see models.pagination.fetch_page);
+        raises ValueError for a malformed cursor
+    """
+    return fetch_page(
+        cursor,
+        """SELECT m.*, u.name as uploader_name 
+           FROM study_materials m 
+           JOIN users u ON m.uploaded_by = u.id""",
+        ["m.approval_status = %s"] if approval_status else [], [approval_status] if approval_status else [],
+        'm.upload_date', 'm.id', after=after, before=before, per_page=per_page
+    )
+
+
 def update_material(cursor, material_id: int, title: str = None, subject: str = None, 
                    description: str = None, approval_status: str = None) -> dict:
     """Update material details"""
@@ -117,8 +140,9 @@ def update_material(cursor, material_id: int, title: str = None, subject: str =
             params.append(description)
         
         if approval_status:
-            updates.append("approval_status = %s")
-            params.append(approval_status)
+            result = set_material_status(cursor, material_id, approval_status)
+            if not result['success']:
+                return result
         
         updates.append("updated_date = %s")
         params.append(datetime.now())
@@ -136,10 +160,216 @@ def update_material(cursor, material_id: int, title: str = None, subject: str =
         return {"success": False, "message": str(e)}
 
 
-def delete_material(cursor, material_id: int) -> dict:
-    """Delete material from database"""
+def set_material_status(cursor, material_id: int, approval_status: str, approved_by: int = None,
+                        reviewer_id: int = None) -> dict:
+    """
+    Move a material to approval_status and update the status counters
+    
+    Args:
+        cursor: MySQL cursor
+        material_id: Material ID
+        approval_status: New status (pending/approved/rejected)
+        approved_by: Admin user ID recorded with an approval or rejection
+        reviewer_id: Reviewer making the change; a material another reviewer
+            has claimed (see claim_pending_materials) is left alone
+        
+    Returns:
+        Dictionary with result; 'claimed' is True when another reviewer holds it
+    """
+    try:
+        held, params = _held_by_other(reviewer_id)
+        cursor.execute(
+            f"SELECT approval_status, {held} FROM study_materials WHERE id = %s" + get_dialect().for_update,
+            params + [material_id]
+        )
+        material = cursor.fetchone()
+        if not material:
+            return {"success": False, "message": "Material not found"}
+        if material['held']:
+            return {"success": False, "claimed": True, "message": "Material is claimed by another reviewer"}
+        
+        old_status = material['approval_status']
+        now = datetime.now()
+        if approved_by is not None:
+            cursor.execute(
+                """UPDATE study_materials SET approval_status = %s, approved_by = %s, approval_date = %s, updated_date = %s,
+                       claimed_by = NULL, claim_expires_at = NULL 
+                   WHERE id = %s""",
+                (approval_status, approved_by, now, now, material_id)
+            )
+        else:
+            cursor.execute(
+                "UPDATE study_materials SET approval_status = %s, updated_date = %s, claimed_by = NULL, claim_expires_at = NULL WHERE id = %s",
+                (approval_status, now, material_id)
+            )
+        
+        if old_status != approval_status:
+            adjust_counters(cursor, {f'materials_{old_status}': -1, f'materials_{approval_status}': 1})
+        return {"success": True, "message": "Material status updated"}
+    
+    except Exception as e:
+        print(f"Error updating material status: {e}")
+        return {"success": False, "message": str(e)}
+
+
+def _placeholders(values) -> str:
+    return ', '.join(['%s'] * len(values))
+
+
+def _held_by_other(reviewer_id) -> tuple:
+    """SELECT column (and its params) that is 1 while another reviewer holds a live claim"""
+    if reviewer_id is None:
+        return "0 AS held", []
+    return ("(claimed_by IS NOT NULL AND claimed_by <> %s AND claim_expires_at >= %s) AS held",
+            [reviewer_id, datetime.now()])
+
+
+def set_materials_status(cursor, material_ids: list, approval_status: str, approved_by: int = None,
+                         reviewer_id: int = None) -> dict:
+    """
+    Move a batch of materials to approval_status with one UPDATE
+    
+    Args:
+        cursor: MySQL cursor
+        material_ids: Material IDs (one statement for the whole list)
+        approval_status: New status (pending/approved/rejected)
+        approved_by: Admin user ID recorded with an approval or rejection
+        reviewer_id: Reviewer making the change; materials another reviewer
+            has claimed are skipped
+        
+    Returns:
+        Dictionary with result; 'updated', 'claimed' and 'not_found' list the IDs
+    """
+    try:
+        ids = sorted(set(material_ids))
+        if not ids:
+            return {"success": True, "updated": [], "claimed": [], "not_found": [], "message": "No materials given"}
+        
+        held, params = _held_by_other(reviewer_id)
+        cursor.execute(
+            f"""SELECT id, approval_status, {held} FROM study_materials 
+                WHERE id IN ({_placeholders(ids)}){get_dialect().for_update}""",
+            params + ids
+        )
+        rows = cursor.fetchall()
+        claimed = sorted(row['id'] for row in rows if row['held'])
+        old_statuses = {row['id']: row['approval_status'] for row in rows if not row['held']}
+        found = sorted(old_statuses)
+        
+        if found:
+            now = datetime.now()
+            if approved_by is not None:
+                cursor.execute(
+                    f"""UPDATE study_materials SET approval_status = %s, approved_by = %s, approval_date = %s, updated_date = %s,
+                       claimed_by = NULL, claim_expires_at = NULL 
+                        WHERE id IN ({_placeholders(found)})""",
+                    [approval_status, approved_by, now, now] + found
+                )
+            else:
+                cursor.execute(
+                    f"""UPDATE study_materials SET approval_status = %s, updated_date = %s, claimed_by = NULL, claim_expires_at = NULL 
+                        WHERE id IN ({_placeholders(found)})""",
+                    [approval_status, now] + found
+                )
+            
+            moved = [status for status in old_statuses.values() if status != approval_status]
+            deltas = {f'materials_{approval_status}': len(moved)}
+            for status in moved:
+                deltas[f'materials_{status}'] = deltas.get(f'materials_{status}', 0) - 1
+            adjust_counters(cursor, deltas)
+        
+        return {"success": True, "updated": found, "claimed": claimed,
+                "not_found": [i for i in ids if i not in old_statuses and i not in claimed],
+                "message": f"{len(found)} materials updated"}
+    
+    except Exception as e:
+        print(f"Error updating material statuses: {e}")
+        return {"success": False, "message": str(e)}
+
+
+def delete_materials(cursor, material_ids: list, reviewer_id: int = None) -> dict:
+    """
+    Delete a batch of materials with one DELETE
+    
+    With reviewer_id, materials another reviewer has claimed are skipped.
+    
+    Returns:
+        Dictionary with result; 'deleted' maps each deleted ID to its file_path
+        (the caller removes the files after committing), 'claimed' lists the
+        skipped IDs and 'not_found' the rest
+    """
     try:
+        ids = sorted(set(material_ids))
+        if not ids:
+            return {"success": True, "deleted": {}, "claimed": [], "not_found": [], "message": "No materials given"}
+        
+        held, params = _held_by_other(reviewer_id)
+        cursor.execute(
+            f"""SELECT id, file_path, approval_status, download_count, {held} FROM study_materials 
+                WHERE id IN ({_placeholders(ids)}){get_dialect().for_update}""",
+            params + ids
+        )
+        rows = cursor.fetchall()
+        claimed = sorted(row['id'] for row in rows if row['held'])
+        rows = [row for row in rows if not row['held']]
+        deleted = {row['id']: row['file_path'] for row in rows}
+        
+        if rows:
+            cursor.execute(f"DELETE FROM study_materials WHERE id IN ({_placeholders(sorted(deleted))})", sorted(deleted))
+            adjust_counters(cursor, combine_deltas(*(
+                material_deltas(row['approval_status'], -1, -int(row['download_count'] or 0)) for row in rows
+            )))
+        
+        return {"success": True, "deleted": deleted, "claimed": claimed,
+                "not_found": [i for i in ids if i not in deleted and i not in claimed],
+                "message": f"{len(deleted)} materials deleted"}
+    
+    except Exception as e:
+        print(f"Error deleting materials: {e}")
+        return {"success": False, "message": str(e)}
+
+
+def add_download_counts(cursor, deltas: dict) -> dict:
+    """
+    Add a batch of download counts in one statement
+    
+    Args:
+        cursor: MySQL cursor
+        deltas: Mapping of material ID to number of new downloads
+        
+    Returns:
+        Dictionary with result
+    """
+    try:
+        # Sorted so concurrent flushes lock rows in the same order
+        cursor.executemany(
+            "UPDATE study_materials SET download_count = download_count + %s WHERE id = %s",
+            [(count, material_id) for material_id, count in sorted(deltas.items())]
+        )
+        adjust_counters(cursor, {'downloads_total': sum(deltas.values())})
+        return {"success": True, "message": "Download counts updated"}
+    
+    except Exception as e:
+        print(f"Error updating download counts: {e}")
+        return {"success": False, "message": str(e)}
+
+
+def delete_material(cursor, material_id: int, reviewer_id: int = None) -> dict:
+    """Delete material from database (left alone if another reviewer than reviewer_id has claimed it)"""
+    try:
+        held, params = _held_by_other(reviewer_id)
+        cursor.execute(
+            f"SELECT approval_status, download_count, {held} FROM study_materials WHERE id = %s" + get_dialect().for_update,
+            params + [material_id]
+        )
+        material = cursor.fetchone()
+        if not material:
+            return {"success": False, "message": "Material not found"}
+        if material['held']:
+            return {"success": False, "claimed": True, "message": "Material is claimed by another reviewer"}
+        
         cursor.execute("DELETE FROM study_materials WHERE id = %s", (material_id,))
+        adjust_counters(cursor, material_deltas(material['approval_status'], -1, -int(material['download_count'] or 0)))
         return {"success": True, "message": "Material deleted successfully"}
     
     except Exception as e:
@@ -147,6 +377,93 @@ def delete_material(cursor, material_id: int) -> dict:
         return {"success": False, "message": str(e)}
 
 
+def claim_pending_materials(cursor, reviewer_id: int, limit: int, lease_seconds: int) -> dict:
+    """
+    Lease the next pending materials to a reviewer
+    
+    Claims up to limit pending materials, oldest upload first, that nobody
+    holds or whose lease has expired, and renews the reviewer's own live
+    claims. On MySQL the candidates are locked with SKIP LOCKED, so
+    concurrent reviewers never wait on each other or get the same rows.
+    While the lease lasts, set_material_status, set_materials_status,
+    delete_material and delete_materials refuse other reviewers' changes
+    to these rows.
+    The caller commits.
+    
+    Returns:
+        Dictionary with result; 'materials' are the claimed rows (with
+        uploader_name), 'ids' their IDs and 'expires_at' the end of the lease
+    """
+    try:
+        now = datetime.now().replace(microsecond=0)
+        expires_at = now + timedelta(seconds=lease_seconds)
+        claimable = """approval_status = 'pending' 
+                       AND (claimed_by IS NULL OR claimed_by = %s OR claim_expires_at < %s)"""
+        dialect = get_dialect()
+        
+        if dialect.skip_locked:
+            cursor.execute(
+                f"""SELECT id FROM study_materials WHERE {claimable} 
+                    ORDER BY upload_date, id LIMIT %s{dialect.skip_locked}""",
+                (reviewer_id, now, limit)
+            )
+            ids = [row['id'] for row in cursor.fetchall()]
+            if ids:
+                cursor.execute(
+                    f"UPDATE study_materials SET claimed_by = %s, claim_expires_at = %s WHERE id IN ({_placeholders(ids)})",
+                    [reviewer_id, expires_at] + ids
+                )
+        else:
+            cursor.execute(
+                f"""UPDATE study_materials SET claimed_by = %s, claim_expires_at = %s 
+                    WHERE id IN (SELECT id FROM study_materials WHERE {claimable} 
+                                 ORDER BY upload_date, id LIMIT %s) 
+                    RETURNING id""",
+                (reviewer_id, expires_at, reviewer_id, now, limit)
+            )
+            ids = [row['id'] for row in cursor.fetchall()]
+        
+        if not ids:
+            return {"success": True, "materials": [], "ids": [], "expires_at": expires_at,
+                    "message": "0 materials claimed"}
+        
+        # Fetch exactly the rows claimed above
+        cursor.execute(
+            f"""SELECT m.*, u.name as uploader_name 
+               FROM study_materials m 
+               JOIN users u ON m.uploaded_by = u.id 
+               WHERE m.id IN ({_placeholders(ids)}) 
+               ORDER BY m.upload_date, m.id""",
+            ids
+        )
+        materials = cursor.fetchall()
+        return {"success": True, "materials": materials, "ids": [m['id'] for m in materials], "expires_at": expires_at,
+                "message": f"{len(materials)} materials claimed"}
+    
+    except Exception as e:
+        print(f"Error claiming materials: {e}")
+        return {"success": False, "message": str(e)}
+
+
+def release_claims(cursor, reviewer_id: int, material_ids: list = None) -> dict:
+    """Give back a reviewer's claims (all of them, or only material_ids) before the lease ends"""
+    try:
+        query = "UPDATE study_materials SET claimed_by = NULL, claim_expires_at = NULL WHERE claimed_by = %s"
+        params = [reviewer_id]
+        if material_ids is not None:
+            ids = sorted(set(material_ids))
+            if not ids:
+                return {"success": True, "released": 0, "message": "No materials given"}
+            query += f" AND id IN ({_placeholders(ids)})"
+            params += ids
+        cursor.execute(query, params)
+        return {"success": True, "released": cursor.rowcount, "message": f"{cursor.rowcount} claims released"}
+    
+    except Exception as e:
+        print(f"Error releasing claims: {e}")
+        return {"success": False, "message": str(e)}
+
+
 def get_pending_materials(cursor) -> list:
     """Get all materials pending approval"""
     try:
@@ -0,0 +1,85 @@
+"""
+Keyset (seek) pagination helpers
+
+Pages are addressed by an opaque cursor holding the (sort value, id) of
+the row at the page boundary, so every page is one indexed range scan of
+per_page + 1 rows however deep it is, unlike OFFSET.
+
+The sort column and id must be covered by a composite index together
+with any equality filter, e.g. (role, created_at, id).
+"""
+import base64
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    """Opaque URL-safe token for the row (sort_value, row_id)"""
+    raw = f"{sort_value}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """(sort_value, row_id) from encode_cursor(); raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        sort_value, row_id = raw.rsplit('|', 1)
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("Invalid page cursor")
+
+
+def fetch_page(cursor, select_sql: str, filters: list, params: list, sort_column: str, id_column: str,
+               after: str = None, before: str = None, per_page: int = 20) -> dict:
+    """
+    One page of rows ordered newest first by (sort_column, id_column)
+
+    Args:
+        cursor: MySQL cursor
+        select_sql: SELECT ... FROM ... without WHERE/ORDER BY/LIMIT
+        filters: WHERE conditions (%s placeholders) ANDed with the seek condition
+        params: Parameters for filters
+        sort_column, id_column: Qualified column names, e.g. 'm.upload_date', 'm.id'
+        after: Cursor of the next page (next_cursor of the previous response)
+        before: Cursor of the previous page (prev_cursor of the previous response)
+        per_page: Rows per page
+
+    Returns:
+        {'rows', 'next_cursor', 'prev_cursor'}; a cursor is None at either end
+    """
+    filters = list(filters)
+    params = list(params)
+    backwards = before is not None and after is None
+
+    if after is not None or backwards:
+        sort_value, row_id = decode_cursor(before if backwards else after)
+        op = '>' if backwards else '<'
+        filters.append(f"({sort_column} {op} %s OR ({sort_column} = %s AND {id_column} {op} %s))")
+        params += [sort_value, sort_value, row_id]
+
+    direction = 'ASC' if backwards else 'DESC'
+    query = select_sql
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+    query += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT %s"
+    cursor.execute(query, params + [per_page + 1])
+    rows = cursor.fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    sort_key = sort_column.rsplit('.', 1)[-1]
+    id_key = id_column.rsplit('.', 1)[-1]
+
+    def token(row):
+        return encode_cursor(row[sort_key], row[id_key])
+
+    if not rows:
+        return {'rows': [], 'next_cursor': None, 'prev_cursor': None}
+    more_before = has_more if backwards else after is not None
+    more_after = before is not None if backwards else has_more
+    return {
+        'rows': rows,
+        'next_cursor': token(rows[-1]) if more_after else None,
+        'prev_cursor': token(rows[0]) if more_before else None
+    }
@@ -1,4 +1,5 @@
 """Profile Model for Student, Teacher, and Admin profiles"""
+from models.dialect import get_dialect
 
 def create_profile(cursor, user_id, role, name, phone=None, email=None, photo_path=None, **kwargs):
     """
@@ -9,32 +10,19 @@ def create_profile(cursor, user_id, role, name, phone=None, email=None, photo_pa
     - Admin: department, designation
     """
     if role == 'student':
-        cursor.execute("""
-            INSERT INTO student_profiles (user_id, name, phone, email, register_number, department, course_details, photo_path)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-            name=%s, phone=%s, email=%s, register_number=%s, department=%s, course_details=%s, photo_path=%s
-        """, (user_id, name, phone, email, kwargs.get('register_number'), kwargs.get('department'), 
-              kwargs.get('course_details'), photo_path, name, phone, email, 
-              kwargs.get('register_number'), kwargs.get('department'), kwargs.get('course_details'), photo_path))
-    
+        table, extra = 'student_profiles', ('register_number', 'department', 'course_details')
     elif role == 'teacher':
-        cursor.execute("""
-            INSERT INTO teacher_profiles (user_id, name, phone, email, department, posting, photo_path)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-            name=%s, phone=%s, email=%s, department=%s, posting=%s, photo_path=%s
-        """, (user_id, name, phone, email, kwargs.get('department'), kwargs.get('posting'), photo_path,
-              name, phone, email, kwargs.get('department'), kwargs.get('posting'), photo_path))
-    
+        table, extra = 'teacher_profiles', ('department', 'posting')
     elif role == 'admin':
-        cursor.execute("""
-            INSERT INTO admin_profiles (user_id, name, phone, email, department, designation, photo_path)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE 
-            name=%s, phone=%s, email=%s, department=%s, designation=%s, photo_path=%s
-        """, (user_id, name, phone, email, kwargs.get('department'), kwargs.get('designation'), photo_path,
-              name, phone, email, kwargs.get('department'), kwargs.get('designation'), photo_path))
+        table, extra = 'admin_profiles', ('department', 'designation')
+    else:
+        return
+    
+    columns = ('user_id', 'name', 'phone', 'email') + extra + ('photo_path',)
+    cursor.execute(
+        get_dialect().upsert(table, columns, key=('user_id',)),
+        (user_id, name, phone, email) + tuple(kwargs.get(c) for c in extra) + (photo_path,)
+    )
 
 
 def get_profile(cursor, user_id, role):
@@ -0,0 +1,117 @@
+"""
+Counters in the statistics table
+
+The write paths in user_model and material_model adjust these counters
+with the same cursor, so they commit or roll back together with the
+change they count. All-time totals are stored under TOTAL_DATE, because
+MySQL allows any number of NULL metric_date rows under the unique key
+(metric_name, metric_date).
+
+Run reconcile_statistics.py to recount them from the base tables.
+"""
+from datetime import date
+from models.dialect import get_dialect
+
+TOTAL_DATE = date(1970, 1, 1)
+
+ROLES = ('student', 'teacher', 'admin')
+STATUSES = ('pending', 'approved', 'rejected')
+
+COUNTERS = (
+    ['users_total'] + [f'users_{role}' for role in ROLES] +
+    ['materials_total'] + [f'materials_{status}' for status in STATUSES] +
+    ['downloads_total']
+)
+
+
+def user_deltas(role, sign=1):
+    """Counter changes for creating (sign=1) or deleting (sign=-1) a user"""
+    return {'users_total': sign, f'users_{role}': sign}
+
+
+def material_deltas(status, count=1, downloads=0):
+    """Counter changes for adding (count > 0) or deleting (count < 0) materials with the given status"""
+    return {'materials_total': count, f'materials_{status}': count, 'downloads_total': downloads}
+
+
+def combine_deltas(*deltas):
+    """Sum several counter change mappings"""
+    combined = {}
+    for mapping in deltas:
+        for name, change in mapping.items():
+            combined[name] = combined.get(name, 0) + change
+    return combined
+
+
+def adjust_counters(cursor, deltas: dict, metric_date=TOTAL_DATE):
+    """
+    Add deltas ({metric_name: change}) to the counters in one batched upsert
+
+    Raises on error so the caller's transaction is rolled back with it.
+    """
+    rows = [(name, change, metric_date) for name, change in sorted(deltas.items()) if change]
+    if not rows:
+        return
+    # Sorted so concurrent writers lock counter rows in the same order
+    cursor.executemany(
+        get_dialect().upsert('statistics', ('metric_name', 'metric_value', 'metric_date'),
+                             key=('metric_name', 'metric_date'), increment=('metric_value',)),
+        rows
+    )
+
+
+def get_counters(cursor, names=COUNTERS) -> dict:
+    """Current all-time counters (0 for counters never written)"""
+    names = list(names)
+    cursor.execute(
+        f"""SELECT metric_name, metric_value FROM statistics
+            WHERE metric_date = %s AND metric_name IN ({', '.join(['%s'] * len(names))})""",
+        [TOTAL_DATE] + names
+    )
+    stored = {row['metric_name']: int(row['metric_value'] or 0) for row in cursor.fetchall()}
+    return {name: stored.get(name, 0) for name in names}
+
+
+def compute_counters(cursor) -> dict:
+    """Recount every counter from users and study_materials"""
+    counters = dict.fromkeys(COUNTERS, 0)
+
+    cursor.execute("SELECT role, COUNT(*) AS total FROM users GROUP BY role")
+    for row in cursor.fetchall():
+        counters['users_total'] += int(row['total'])
+        if row['role'] in ROLES:
+            counters[f"users_{row['role']}"] = int(row['total'])
+
+    cursor.execute(
+        """SELECT approval_status, COUNT(*) AS total, COALESCE(SUM(download_count), 0) AS downloads
+           FROM study_materials GROUP BY approval_status"""
+    )
+    for row in cursor.fetchall():
+        counters['materials_total'] += int(row['total'])
+        counters['downloads_total'] += int(row['downloads'])
+        if row['approval_status'] in STATUSES:
+            counters[f"materials_{row['approval_status']}"] = int(row['total'])
+
+    return counters
+
+
+def reconcile_counters(cursor, fix: bool = True) -> dict:
+    """
+    Compare the stored counters with a fresh recount
+
+    Returns:
+        {metric_name: (stored, actual)} for every counter that drifted;
+        with fix=True those counters are overwritten with the actual value
+    """
+    # A write committed between the recount and the fix can leave a small drift; the next run repairs it
+    actual = compute_counters(cursor)
+    stored = get_counters(cursor)
+    drift = {name: (stored[name], actual[name]) for name in COUNTERS if stored[name] != actual[name]}
+
+    if fix and drift:
+        cursor.executemany(
+            get_dialect().upsert('statistics', ('metric_name', 'metric_value', 'metric_date'),
+                                 key=('metric_name', 'metric_date')),
+            [(name, actual[name], TOTAL_DATE) for name in sorted(drift)]
+        )
+    return drift
@@ -1,6 +1,10 @@
 """User model for database operations"""
 from datetime import datetime
+from config import Config
 from models.auth_utils import hash_password, verify_password
+from models.dialect import get_dialect, like_escape
+from models.pagination import fetch_page
+from models.statistics_model import adjust_counters, combine_deltas, material_deltas, user_deltas
 
 
 def create_user(cursor, email: str, password: str, name: str, role: str) -> dict:
@@ -33,6 +37,7 @@ def create_user(cursor, email: str, password: str, name: str, role: str) -> dict
         )
         
         user_id = cursor.lastrowid
+        adjust_counters(cursor, user_deltas(role))
         return {"success": True, "user_id": user_id, "message": "User created successfully"}
     
     except Exception as e:
@@ -78,6 +83,72 @@ def authenticate_user(cursor, email: str, password: str) -> dict:
         return {"success": False, "message": "Authentication failed"}
 
 
+def get_users_page(cursor, role: str = None, after: str = None, before: str = None, per_page: int = 20) -> dict:
+    """
+    One page of users, newest first, using keyset pagination on (created_at, id)
+    
+    Returns:
+        {'rows', 'next_cursor', 'prev_cursor'} (see models.pagination.fetch_page);
+        raises ValueError for a malformed cursor
+    """
+    return fetch_page(
+        cursor,
+        "SELECT id, email, name, role, created_at FROM users",
+        ["role = %s"] if role else [], [role] if role else [],
+        'created_at', 'id', after=after, before=before, per_page=per_page
+    )
+
+
+def search_users(cursor, query: str, role: str = None, limit: int = None) -> list:
+    """
+    Users for a typeahead lookup: email prefix matches by email, then name matches by name
+    
+    A query containing '@' matches email prefixes only; anything else matches
+    email prefixes and name substrings. Each part is one indexed query capped
+    at limit rows: the email (or role, email) index for prefixes and the
+    FULLTEXT ngram index on name (see models.dialect). If that index is
+    missing the name part falls back to a LIKE scan; other errors propagate.
+    
+    Args:
+        cursor: MySQL cursor
+        query: Search text, at least Config.USER_SEARCH_MIN_CHARS characters
+        role: Optional role filter (student/teacher/admin)
+        limit: Maximum results (default Config.USER_SEARCH_LIMIT, capped at Config.USER_SEARCH_MAX_LIMIT)
+    """
+    query = (query or '').strip()
+    if len(query) < Config.USER_SEARCH_MIN_CHARS:
+        return []
+    limit = min(max(limit or Config.USER_SEARCH_LIMIT, 1), Config.USER_SEARCH_MAX_LIMIT)
+    
+    role_filter = " AND role = %s" if role else ""
+    role_params = [role] if role else []
+    select = "SELECT id, email, name, role, is_active, created_at FROM users WHERE "
+    
+    cursor.execute(
+        select + "email LIKE %s ESCAPE '!'" + role_filter + " ORDER BY email LIMIT %s",
+        [like_escape(query) + '%'] + role_params + [limit]
+    )
+    users = {row['id']: row for row in cursor.fetchall()}
+    
+    if '@' not in query:
+        dialect = get_dialect()
+        name_sql = select + "{}" + role_filter + " ORDER BY name, id LIMIT %s"
+        condition, params = dialect.contains('name', query)
+        try:
+            cursor.execute(name_sql.format(condition), params + role_params + [limit])
+        except Exception as e:
+            if not dialect.is_fulltext_error(e):
+                raise
+            # e.g. setup_database.py --upgrade has not been run: scan instead
+            print(f"Full-text user search unavailable, falling back to LIKE: {e}")
+            condition, params = dialect.contains('name', query, fulltext=False)
+            cursor.execute(name_sql.format(condition), params + role_params + [limit])
+        for row in cursor.fetchall():
+            users.setdefault(row['id'], row)
+    
+    return list(users.values())[:limit]
+
+
 def get_user(cursor, user_id: int) -> dict:
     """Get user by ID"""
     try:
@@ -153,6 +224,23 @@ def update_user(cursor, user_id: int, name: str = None, email: str = None) -> di
 def delete_user(cursor, user_id: int) -> dict:
     """Delete user from database"""
     try:
+        cursor.execute("SELECT role FROM users WHERE id = %s" + get_dialect().for_update, (user_id,))
+        user = cursor.fetchone()
+        if not user:
+            return {"success": False, "message": "User not found"}
+        
+        # Counters for the materials removed with the user
+        deltas = user_deltas(user['role'], -1)
+        cursor.execute(
+            f"""SELECT approval_status, COUNT(*) AS total, COALESCE(SUM(download_count), 0) AS downloads
+                FROM study_materials WHERE uploaded_by = %s GROUP BY approval_status{get_dialect().for_update}""",
+            (user_id,)
+        )
+        deltas = combine_deltas(deltas, *(
+            material_deltas(row['approval_status'], -int(row['total']), -int(row['downloads']))
+            for row in cursor.fetchall()
+        ))
+        
         # Delete related records first
         cursor.execute("DELETE FROM study_materials WHERE uploaded_by = %s", (user_id,))
         cursor.execute("DELETE FROM student_profiles WHERE user_id = %s AND role = %s", (user_id, 'student'))
@@ -160,6 +248,7 @@ def delete_user(cursor, user_id: int) -> dict:
         
         # Delete user
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        adjust_counters(cursor, deltas)
         
         return {"success": True, "message": "User deleted successfully"}
     
@@ -0,0 +1,95 @@
+"""
+Cold-start import profile for the app and the CLI scripts
+
+Imports each module in a fresh interpreter with `python -X importtime`,
+from an empty temporary working directory, and reports the total import
+time, the slowest modules, and any files the import created there (an
+import should have no side effects). Each module is measured --repeat
+times and the fastest run is kept.
+
+Usage:
+    python profile_imports.py
+    python profile_imports.py --modules app,seed_sample_data --top 15 --output imports.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_MODULES = 'app,materials_store,enrollments_store,insert_test_data,reset_database,import_enrollments'
+
+
+def _parse_importtime(stderr):
+    """Parse -X importtime output into [(module, self_us, cumulative_us)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_module(module, repo_root):
+    """Import module once in a fresh interpreter; return (rows, created files)"""
+    workdir = tempfile.mkdtemp(prefix='lms-importtime-')
+    try:
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [repo_root, env.get('PYTHONPATH')]))
+        env['PYTHONDONTWRITEBYTECODE'] = '1'
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=workdir, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+        return _parse_importtime(result.stderr), sorted(os.listdir(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time")
+    parser.add_argument('--modules', default=DEFAULT_MODULES, help=f"comma-separated modules (default {DEFAULT_MODULES})")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per module, fastest kept (default 3)")
+    parser.add_argument('--top', type=int, default=10, help="slowest modules to list (default 10)")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.abspath(__file__))
+    report = []
+    for module in [m for m in args.modules.split(',') if m]:
+        try:
+            runs = [profile_module(module, repo_root) for _ in range(max(args.repeat, 1))]
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            report.append({'module': module, 'error': str(e)})
+            continue
+
+        rows, created = min(runs, key=lambda run: sum(r[1] for r in run[0]))
+        total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+        slowest = sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]
+
+        print(f"{module}: {total_ms:.1f} ms, {len(rows)} modules imported")
+        for name, self_us, cumulative_us in slowest:
+            print(f"  {cumulative_us / 1000:9.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name}")
+        if created:
+            print(f"  ✗ import created files: {', '.join(created)}")
+
+        report.append({
+            'module': module,
+            'total_ms': round(total_ms, 2),
+            'modules_imported': len(rows),
+            'slowest': [{'module': n, 'self_ms': s / 1000, 'cumulative_ms': c / 1000} for n, s, c in slowest],
+            'created_files': created
+        })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Wrote import profile to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Bulk user provisioning from CSV or NDJSON
+
+Each record needs email, name, role (student/teacher/admin) and password;
+CSV files take them as header columns, NDJSON files as keys of one JSON
+object per line. Records are processed in chunks of
+Config.USER_PROVISION_CHUNK_SIZE:
+1. validate every row and drop emails repeated within the file
+2. look up the chunk's emails in one SELECT ... WHERE email IN (...)
+3. hash the remaining passwords in parallel on a process pool
+   (Config.PASSWORD_HASH_WORKERS processes; bcrypt dominates the cost)
+4. insert the chunk with one executemany and commit it together with the
+   statistics counters
+
+The hashing processes are started once per worker process and reused.
+The admin endpoint POST /admin/users/provision hashes on the request, so it
+accepts at most Config.USER_PROVISION_MAX_ROWS rows per file; larger
+imports go through the command line:
+    python provision_users.py students.csv
+    python provision_users.py staff.ndjson --workers 8
+"""
+import argparse
+import atexit
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from itertools import islice
+from config import Config
+from import_enrollments import FORMATS, detect_format, iter_records
+from models.auth_utils import hash_password, validate_password
+from models.statistics_model import adjust_counters, combine_deltas, user_deltas
+
+MAX_REPORTED_ERRORS = 100
+ROLES = ('student', 'teacher', 'admin')
+
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _validate(record):
+    """(email, name, role, password) from a record; raises ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+    email = str(record.get('email') or '').strip()
+    name = str(record.get('name') or '').strip()
+    role = str(record.get('role') or '').strip().lower()
+    password = str(record.get('password') or '')
+
+    if not _EMAIL.match(email) or len(email) > 255:
+        raise ValueError('Invalid email')
+    if not name or len(name) > 255:
+        raise ValueError('Name is required')
+    if role not in ROLES:
+        raise ValueError(f"Invalid role '{role}'")
+    is_valid, message = validate_password(password)
+    if not is_valid:
+        raise ValueError(message)
+    return email, name, role, password
+
+
+def _existing_emails(cursor, emails):
+    """Lower-cased emails already registered, in one query"""
+    if not emails:
+        return set()
+    cursor.execute(
+        f"SELECT email FROM users WHERE email IN ({', '.join(['%s'] * len(emails))})",
+        list(emails)
+    )
+    return {row['email'].lower() for row in cursor.fetchall()}
+
+
+def _get_executor(workers):
+    """Shared hashing pool with this many processes, started on first use"""
+    with _executors_lock:
+        if workers not in _executors:
+            # spawn: safe to start from a threaded web worker and on Windows
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(executor.shutdown, wait=True)
+            _executors[workers] = executor
+        return _executors[workers]
+
+
+def _discard_executor(workers, executor):
+    """Drop a broken pool so the next call starts a new one"""
+    with _executors_lock:
+        if _executors.get(workers) is executor:
+            del _executors[workers]
+    executor.shutdown(wait=False)
+
+
+def provision_users(stream, fmt, connection, cursor, chunk_size=None, workers=None, progress=None, max_rows=None):
+    """
+    Create the users listed in a text stream, one chunk at a time
+
+    Args:
+        stream: Text file object (CSV or NDJSON)
+        fmt: 'csv' or 'ndjson'
+        connection, cursor: Database connection and a dict cursor on it; each chunk is committed
+        chunk_size: Records per batch (default Config.USER_PROVISION_CHUNK_SIZE)
+        workers: Hashing processes (default Config.PASSWORD_HASH_WORKERS, 0 = one per CPU)
+        progress: Optional callable receiving the running summary after each chunk
+        max_rows: Reject the whole file with ValueError, before creating anyone, if it has more records
+
+    Returns:
+        Dictionary with rows, created, failed and the first MAX_REPORTED_ERRORS errors
+    """
+    chunk_size = chunk_size or Config.USER_PROVISION_CHUNK_SIZE
+    workers = workers or Config.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+    summary = {'rows': 0, 'created': 0, 'failed': 0, 'errors': []}
+    seen = set()
+
+    def report(line, email, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'email': email, 'message': message})
+
+    records = iter_records(stream, fmt)
+    if max_rows is not None:
+        head = list(islice(records, max_rows + 1))
+        if len(head) > max_rows:
+            raise ValueError(f"At most {max_rows} users per upload; use provision_users.py for larger files")
+        records = iter(head)
+
+    executor = _get_executor(workers)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        summary['rows'] += len(chunk)
+
+        # 1. Validate and drop repeats within the file
+        valid = []
+        for line, record in chunk:
+            email = record.get('email') if isinstance(record, dict) else None
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                email, name, role, password = _validate(record)
+            except ValueError as e:
+                report(line, email, str(e))
+                continue
+            if email.lower() in seen:
+                report(line, email, 'Email repeated in file')
+                continue
+            seen.add(email.lower())
+            valid.append((line, email, name, role, password))
+
+        # 2. One existence check for the whole chunk
+        try:
+            existing = _existing_emails(cursor, [row[1] for row in valid])
+        except Exception as e:
+            for line, email, *_ in valid:
+                report(line, email, f'Database error: {e}')
+            continue
+        pending = []
+        for row in valid:
+            if row[1].lower() in existing:
+                report(row[0], row[1], 'Email already registered')
+            else:
+                pending.append(row)
+
+        # 3. Hash in parallel (map keeps the input order)
+        try:
+            hashes = list(executor.map(hash_password, [row[4] for row in pending],
+                                       chunksize=max(len(pending) // (4 * workers), 1)))
+        except BrokenProcessPool:
+            _discard_executor(workers, executor)
+            raise
+
+        # 4. One multi-row insert plus the counters, committed together
+        if pending:
+            now = datetime.now()
+            try:
+                cursor.executemany(
+                    "INSERT INTO users (email, password, name, role, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s)",
+                    [(email, hashed, name, role, now, now)
+                     for (line, email, name, role, password), hashed in zip(pending, hashes)]
+                )
+                adjust_counters(cursor, combine_deltas(*(user_deltas(row[3]) for row in pending)))
+                connection.commit()
+                summary['created'] += len(pending)
+            except Exception as e:
+                # e.g. an email registered concurrently since the existence check
+                connection.rollback()
+                print(f"Error provisioning users: {e}")
+                for line, email, *_ in pending:
+                    report(line, email, f'Not created, batch failed: {e}')
+
+        if progress:
+            progress(summary)
+
+    summary['errors'].sort(key=lambda error: error['line'])
+    return summary
+
+
+def provision_upload(file_storage, connection, cursor, fmt=None, chunk_size=None, max_rows=None):
+    """Provision users from an uploaded werkzeug FileStorage (at most max_rows, default Config.USER_PROVISION_MAX_ROWS)"""
+    fmt = fmt or detect_format(file_storage.filename)
+    if fmt not in FORMATS:
+        raise ValueError('Unsupported file type. Upload a .csv or .ndjson file')
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    try:
+        return provision_users(stream, fmt, connection, cursor, chunk_size,
+                               max_rows=max_rows or Config.USER_PROVISION_MAX_ROWS)
+    finally:
+        stream.detach()
+
+
+if __name__ == "__main__":
+    from db_pool import get_pool
+
+    parser = argparse.ArgumentParser(description="Create users from a CSV or NDJSON file")
+    parser.add_argument('path', help="file to import")
+    parser.add_argument('--format', choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, help=f"records per batch (default {Config.USER_PROVISION_CHUNK_SIZE})")
+    parser.add_argument('--workers', type=int, help="password hashing processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    def show_progress(summary):
+        print(f"  {summary['rows']} rows read, {summary['created']} created, {summary['failed']} failed", flush=True)
+
+    with open(args.path, 'r', encoding='utf-8-sig', newline='') as f, get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            summary = provision_users(f, fmt, connection, cursor, args.chunk_size, args.workers, progress=show_progress)
+        finally:
+            cursor.close()
+
+    for error in summary['errors']:
+        print(f"  line {error['line']} ({error['email']}): {error['message']}")
+    if summary['failed'] > len(summary['errors']):
+        print(f"  ... and {summary['failed'] - len(summary['errors'])} more errors")
+    print(f"✓ Created {summary['created']} of {summary['rows']} users")
@@ -0,0 +1,30 @@
+"""
+Check or rebuild the per-course enrollment counts
+
+enrollments_store keeps these counts up to date on every write; this
+script recounts from the enrollments themselves to detect and repair
+drift (e.g. after editing enrollments_data.json by hand).
+
+Usage:
+    python rebuild_course_counts.py [--check]
+"""
+import argparse
+import sys
+from enrollments_store import verify_course_counts, rebuild_course_counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or rebuild the per-course enrollment counts")
+    parser.add_argument('--check', action='store_true', help="only report drift, do not rebuild")
+    args = parser.parse_args()
+
+    drift = verify_course_counts()
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"  {name}: stored {stored}, actual {actual}")
+
+    if args.check:
+        print("✓ Course counts are consistent" if not drift else f"✗ {len(drift)} course(s) drifted")
+        sys.exit(1 if drift else 0)
+
+    counts = rebuild_course_counts()
+    print(f"✓ Rebuilt counts for {len(counts)} courses")
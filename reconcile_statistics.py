@@ -0,0 +1,43 @@
+"""
+Check or repair the counters in the statistics table
+
+The write paths keep these counters up to date transactionally; this
+script recounts them from users and study_materials to report drift
+(e.g. after rows were changed by hand in a SQL client) and repair it.
+setup_database.py --upgrade runs the same recount to initialize them
+on an existing database.
+
+Usage:
+    python reconcile_statistics.py [--check]
+"""
+import argparse
+import sys
+from db_pool import get_pool
+from models.statistics_model import reconcile_counters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or repair the counters in the statistics table")
+    parser.add_argument('--check', action='store_true', help="only report drift, do not repair")
+    args = parser.parse_args()
+
+    with get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            drift = reconcile_counters(cursor, fix=not args.check)
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            print(f"✗ Error reconciling statistics: {e}")
+            sys.exit(2)
+        finally:
+            cursor.close()
+
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"  {name}: stored {stored}, actual {actual}")
+
+    if args.check:
+        print("✓ Statistics counters are consistent" if not drift else f"✗ {len(drift)} counter(s) drifted")
+        sys.exit(1 if drift else 0)
+
+    print("✓ Statistics counters are consistent" if not drift else f"✓ Repaired {len(drift)} counter(s)")
@@ -0,0 +1,58 @@
+"""
+Refresh the daily analytics rollups read by /admin/analytics
+
+Only the days touched since the previous run are recomputed (see
+models/analytics_model.py); --full rebuilds everything.
+
+Usage:
+    python rollup_analytics.py [--full]              # one run, e.g. from cron:
+        */5 * * * * cd /path/to/LMS && python rollup_analytics.py
+    python rollup_analytics.py --every [SECONDS]     # keep running (default ANALYTICS_ROLLUP_INTERVAL)
+"""
+import argparse
+import sys
+import time
+from config import Config
+from db_pool import get_pool
+from models.analytics_model import rollup
+
+
+def run_once(full=False):
+    """One rollup in its own transaction; returns the summary or None on error"""
+    with get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            started = time.perf_counter()
+            summary = rollup(cursor, full=full)
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            print(f"✗ Error rolling up analytics: {e}")
+            return None
+        finally:
+            cursor.close()
+
+    elapsed = (time.perf_counter() - started) * 1000
+    for name, result in summary.items():
+        days = result['days'] if result['days'] == 'all' else f"{len(result['days'])} day(s)"
+        note = f" (rebuilt: {result['rebuilt']})" if result['rebuilt'] else ''
+        print(f"✓ {name}: {days}{note}")
+    print(f"  done in {elapsed:.1f} ms")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the daily analytics rollups")
+    parser.add_argument('--full', action='store_true', help="rebuild every day")
+    parser.add_argument('--every', type=float, nargs='?', const=Config.ANALYTICS_ROLLUP_INTERVAL,
+                        metavar='SECONDS', help="run repeatedly")
+    args = parser.parse_args()
+
+    if args.every is None:
+        sys.exit(0 if run_once(full=args.full) is not None else 1)
+
+    full = args.full
+    while True:
+        run_once(full=full)
+        full = False
+        time.sleep(args.every)
@@ -2,12 +2,18 @@
 from flask import Blueprint, render_template, request, redirect, session, jsonify, url_for
 from werkzeug.utils import secure_filename
 import os
-import pymysql
-from pymysql.cursors import DictCursor
 from config import Config
-from models.user_model import get_users_by_role, delete_user, create_user
-from models.material_model import get_all_materials, get_pending_materials, update_material, delete_material
+from db_utils import get_db_connection, get_cursor, transaction
+from db_routing import read_only
+import audit_log
+from audit_log import audit
+import dashboard_stats
+from material_files import remove_files_later
+from models.user_model import get_users_by_role, get_users_page, search_users, delete_user, create_user
+from models.material_model import get_all_materials, get_pending_materials, claim_pending_materials, release_claims, get_materials_page, update_material, delete_material, delete_materials, set_material_status, set_materials_status
 from models.profile_model import create_profile, get_profile
+from models.statistics_model import STATUSES, get_counters
+from models.analytics_model import get_user_growth, get_material_status, get_top_subjects
 from routes.auth_routes import login_required, role_required
 from datetime import datetime
 
@@ -66,52 +72,16 @@ def settings():
 @admin.route('/dashboard')
 @login_required
 @role_required('admin')
+@read_only
 def dashboard():
     """Admin dashboard with system statistics"""
     try:
         # Ensure session is persistent
         session.permanent = True
         
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
+        stats = dashboard_stats.get_stats(get_cursor())
         
-        cursor = connection.cursor()
-        
-        # Get statistics
-        cursor.execute("SELECT COUNT(*) as total FROM users")
-        total_users = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM users WHERE role = 'student'")
-        total_students = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM users WHERE role = 'teacher'")
-        total_teachers = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM study_materials")
-        total_materials = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM study_materials WHERE approval_status = 'pending'")
-        pending_materials = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM study_materials WHERE approval_status = 'approved'")
-        approved_materials = cursor.fetchone()['total']
-        
-        cursor.close()
-        connection.close()
-        
-        return render_template('admin_dashboard.html',
-                             total_users=total_users,
-                             total_students=total_students,
-                             total_teachers=total_teachers,
-                             total_materials=total_materials,
-                             pending_materials=pending_materials,
-                             approved_materials=approved_materials)
+        return render_template('admin_dashboard.html', **stats)
     
     except Exception as e:
         print(f"Error loading admin dashboard: {e}")
@@ -121,42 +91,38 @@ def dashboard():
 @admin.route('/users')
 @login_required
 @role_required('admin')
+@read_only
 def manage_users():
     """View and manage all users"""
     try:
-        from app import mysql
-        
         role_filter = request.args.get('role', 'all')
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = 20
+        role = role_filter if role_filter in ['student', 'teacher', 'admin'] else None
         
-        cursor = mysql.connection.cursor()
-        
-        if role_filter in ['student', 'teacher', 'admin']:
-            cursor.execute(
-                "SELECT id, email, name, role, created_at FROM users WHERE role = %s ORDER BY created_at DESC",
-                (role_filter,)
-            )
-        else:
-            cursor.execute(
-                "SELECT id, email, name, role, created_at FROM users ORDER BY created_at DESC"
-            )
-        
-        all_users = cursor.fetchall()
-        total_users = len(all_users)
+        cursor = get_cursor()
         
-        # Paginate
-        start = (page - 1) * per_page
-        end = start + per_page
-        users = all_users[start:end]
+        # Seek to the page by (created_at, id) instead of loading every user
+        try:
+            result = get_users_page(cursor, role, after=request.args.get('after'),
+                                    before=request.args.get('before'), per_page=per_page)
+        except ValueError as e:
+            return render_template('error.html', message=str(e)), 400
+        
+        # Total from the maintained counters instead of COUNT(*)
+        counter = f'users_{role}' if role else 'users_total'
+        total_users = get_counters(cursor, [counter])[counter]
         total_pages = (total_users + per_page - 1) // per_page
         
         cursor.close()
         
         return render_template('admin_manage_users.html',
-                             users=users,
+                             users=result['rows'],
                              page=page,
                              total_pages=total_pages,
+                             total_users=total_users,
+                             next_cursor=result['next_cursor'],
+                             prev_cursor=result['prev_cursor'],
                              role_filter=role_filter)
     
     except Exception as e:
@@ -164,16 +130,47 @@ def manage_users():
         return render_template('error.html', message='Error loading users'), 500
 
 
+@admin.route('/users/search')
+@login_required
+@role_required('admin')
+@read_only
+def search_users_route():
+    """Typeahead user lookup by email prefix or name substring (JSON)"""
+    try:
+        query = request.args.get('q', '').strip()
+        role = request.args.get('role') or None
+        if role is not None and role not in ['student', 'teacher', 'admin']:
+            return jsonify({'success': False, 'message': 'Invalid role'}), 400
+        try:
+            limit = int(request.args.get('limit', Config.USER_SEARCH_LIMIT))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'limit must be an integer'}), 400
+        
+        if len(query) < Config.USER_SEARCH_MIN_CHARS:
+            return jsonify({'success': True, 'users': [],
+                            'message': f'Type at least {Config.USER_SEARCH_MIN_CHARS} characters'})
+        
+        users = search_users(get_cursor(), query, role, limit)
+        for user in users:
+            user['is_active'] = bool(user['is_active'])
+            if hasattr(user['created_at'], 'isoformat'):
+                user['created_at'] = user['created_at'].isoformat()
+        
+        return jsonify({'success': True, 'users': users})
+    
+    except Exception as e:
+        print(f"Error searching users: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @admin.route('/users/delete/<int:user_id>', methods=['POST'])
 @login_required
 @role_required('admin')
 def delete_user_route(user_id):
     """Delete a user"""
     try:
-        from app import mysql
-        
         # Prevent deleting admin accounts
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         cursor.execute("SELECT role FROM users WHERE id = %s", (user_id,))
         user = cursor.fetchone()
         
@@ -184,10 +181,12 @@ def delete_user_route(user_id):
             return jsonify({'success': False, 'message': 'Cannot delete admin accounts'}), 403
         
         result = delete_user(cursor, user_id)
-        mysql.connection.commit()
         cursor.close()
         
         if result['success']:
+            get_db_connection().commit()
+            dashboard_stats.invalidate()
+            audit('user_delete', 'user', user_id, old_value={'role': user['role']})
             return jsonify({'success': True, 'message': 'User deleted successfully'})
         else:
             return jsonify({'success': False, 'message': result['message']}), 500
@@ -206,8 +205,6 @@ def create_user_admin():
         return render_template('admin_create_user.html')
     
     try:
-        from app import mysql
-        
         email = request.form.get('email', '').strip()
         password = request.form.get('password', '').strip()
         name = request.form.get('name', '').strip()
@@ -219,12 +216,13 @@ def create_user_admin():
         if role not in ['student', 'teacher', 'admin']:
             return jsonify({'success': False, 'message': 'Invalid role'}), 400
         
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         result = create_user(cursor, email, password, name, role)
-        mysql.connection.commit()
         cursor.close()
         
         if result['success']:
+            get_db_connection().commit()
+            dashboard_stats.invalidate()
             return jsonify({'success': True, 'message': f'User created successfully (ID: {result["user_id"]})'})
         else:
             return jsonify({'success': False, 'message': result['message']}), 400
@@ -234,52 +232,70 @@ def create_user_admin():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@admin.route('/users/provision', methods=['POST'])
+@login_required
+@role_required('admin')
+def provision_users_route():
+    """Create users in bulk from an uploaded CSV or NDJSON file"""
+    try:
+        from provision_users import provision_upload
+        
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({'success': False, 'message': 'No file provided'}), 400
+        
+        summary = provision_upload(request.files['file'], get_db_connection(), get_cursor(),
+                                   fmt=request.form.get('format') or None)
+        if summary['created']:
+            dashboard_stats.invalidate()
+        
+        return jsonify({
+            'success': True,
+            'message': f"Created {summary['created']} of {summary['rows']} users",
+            'summary': summary
+        })
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error provisioning users: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @admin.route('/materials')
 @login_required
 @role_required('admin')
+@read_only
 def manage_materials():
     """View and manage study materials"""
     try:
-        from app import mysql
-        
         status_filter = request.args.get('status', 'all')
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = 20
+        status = status_filter if status_filter in STATUSES else None
         
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
-        if status_filter in ['pending', 'approved', 'rejected']:
-            cursor.execute(
-                """SELECT m.*, u.name as uploader_name 
-                   FROM study_materials m 
-                   JOIN users u ON m.uploaded_by = u.id 
-                   WHERE m.approval_status = %s 
-                   ORDER BY m.upload_date DESC""",
-                (status_filter,)
-            )
-        else:
-            cursor.execute(
-                """SELECT m.*, u.name as uploader_name 
-                   FROM study_materials m 
-                   JOIN users u ON m.uploaded_by = u.id 
-                   ORDER BY m.upload_date DESC"""
-            )
-        
-        all_materials = cursor.fetchall()
-        total_materials = len(all_materials)
-        
-        # Paginate
-        start = (page - 1) * per_page
-        end = start + per_page
-        materials = all_materials[start:end]
+        # Seek to the page by (upload_date, id) instead of loading every material
+        try:
+            result = get_materials_page(cursor, status, after=request.args.get('after'),
+                                        before=request.args.get('before'), per_page=per_page)
+        except ValueError as e:
+            return render_template('error.html', message=str(e)), 400
+        
+        # Total from the maintained counters instead of COUNT(*)
+        counter = f'materials_{status}' if status else 'materials_total'
+        total_materials = get_counters(cursor, [counter])[counter]
         total_pages = (total_materials + per_page - 1) // per_page
         
         cursor.close()
         
         return render_template('admin_manage_materials.html',
-                             materials=materials,
+                             materials=result['rows'],
                              page=page,
                              total_pages=total_pages,
+                             total_materials=total_materials,
+                             next_cursor=result['next_cursor'],
+                             prev_cursor=result['prev_cursor'],
                              status_filter=status_filter)
     
     except Exception as e:
@@ -293,20 +309,18 @@ def manage_materials():
 def approve_material(material_id):
     """Approve a material"""
     try:
-        from app import mysql
-        
         admin_id = session.get('user_id')
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
-        # Update material
-        cursor.execute(
-            """UPDATE study_materials SET approval_status = %s, approved_by = %s, approval_date = %s 
-               WHERE id = %s""",
-            ('approved', admin_id, datetime.now(), material_id)
-        )
+        # Update material and the status counters
+        result = set_material_status(cursor, material_id, 'approved', approved_by=admin_id, reviewer_id=admin_id)
+        if not result['success']:
+            return jsonify({'success': False, 'message': result['message']}), 409 if result.get('claimed') else 500
         
-        mysql.connection.commit()
+        get_db_connection().commit()
         cursor.close()
+        dashboard_stats.invalidate()
+        audit('material_approve', 'study_material', material_id, new_value='approved')
         
         return jsonify({'success': True, 'message': 'Material approved successfully'})
     
@@ -321,21 +335,19 @@ def approve_material(material_id):
 def reject_material(material_id):
     """Reject a material"""
     try:
-        from app import mysql
-        
         reason = request.form.get('reason', 'No reason provided').strip()
         admin_id = session.get('user_id')
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
-        # Update material
-        cursor.execute(
-            """UPDATE study_materials SET approval_status = %s, approved_by = %s, approval_date = %s 
-               WHERE id = %s""",
-            ('rejected', admin_id, datetime.now(), material_id)
-        )
+        # Update material and the status counters
+        result = set_material_status(cursor, material_id, 'rejected', approved_by=admin_id, reviewer_id=admin_id)
+        if not result['success']:
+            return jsonify({'success': False, 'message': result['message']}), 409 if result.get('claimed') else 500
         
-        mysql.connection.commit()
+        get_db_connection().commit()
         cursor.close()
+        dashboard_stats.invalidate()
+        audit('material_reject', 'study_material', material_id, new_value={'status': 'rejected', 'reason': reason})
         
         return jsonify({'success': True, 'message': 'Material rejected successfully'})
     
@@ -350,9 +362,7 @@ def reject_material(material_id):
 def delete_material_admin(material_id):
     """Delete material as admin"""
     try:
-        from app import mysql
-        
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Get file path
         cursor.execute("SELECT file_path FROM study_materials WHERE id = %s", (material_id,))
@@ -362,6 +372,14 @@ def delete_material_admin(material_id):
             cursor.close()
             return jsonify({'success': False, 'message': 'Material not found'}), 404
         
+        # Delete from database (refused while another reviewer holds a claim on it)
+        result = delete_material(cursor, material_id, reviewer_id=session.get('user_id'))
+        cursor.close()
+        
+        if not result['success']:
+            return jsonify({'success': False, 'message': result['message']}), 409 if result.get('claimed') else 500
+        get_db_connection().commit()
+        
         # Delete file
         try:
             file_path = material['file_path']
@@ -375,49 +393,178 @@ def delete_material_admin(material_id):
         except Exception as e:
             print(f"Error deleting file: {e}")
         
-        # Delete from database
-        result = delete_material(cursor, material_id)
-        mysql.connection.commit()
-        cursor.close()
-        
-        if result['success']:
-            return jsonify({'success': True, 'message': 'Material deleted successfully'})
-        else:
-            return jsonify({'success': False, 'message': result['message']}), 500
+        dashboard_stats.invalidate()
+        audit('material_delete', 'study_material', material_id, old_value={'file_path': material['file_path']})
+        return jsonify({'success': True, 'message': 'Material deleted successfully'})
     
     except Exception as e:
         print(f"Error deleting material: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+def _json_object():
+    """The request's JSON body, None without one; ValueError unless it is an object"""
+    data = request.get_json(silent=True)
+    if data is not None and not isinstance(data, dict):
+        raise ValueError('JSON body must be an object')
+    return data
+
+
+def _bulk_material_ids():
+    """Material IDs from a JSON body {"ids": [...]} or form fields ids=1&ids=2 / ids=1,2"""
+    data = _json_object()
+    if data is not None:
+        raw = data.get('ids') or []
+    else:
+        raw = [part for value in request.form.getlist('ids') for part in value.split(',') if part.strip()]
+    if not isinstance(raw, list):
+        raise ValueError('ids must be a list')
+    try:
+        ids = [int(value) for value in raw]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+    if not ids:
+        raise ValueError('No material IDs given')
+    if len(ids) > Config.BULK_MODERATION_MAX_IDS:
+        raise ValueError(f'At most {Config.BULK_MODERATION_MAX_IDS} materials per request')
+    return ids
+
+
+@admin.route('/materials/bulk/<action>', methods=['POST'])
+@login_required
+@role_required('admin')
+def bulk_moderate_materials(action):
+    """Approve, reject or delete many materials in one transaction"""
+    if action not in ('approve', 'reject', 'delete'):
+        return jsonify({'success': False, 'message': 'Unknown action'}), 404
+    
+    try:
+        ids = _bulk_material_ids()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        admin_id = session.get('user_id')
+        unique_ids = sorted(set(ids))
+        batch_size = max(Config.BULK_MODERATION_BATCH_SIZE, 1)
+        done, claimed, file_paths = set(), set(), []
+        
+        # One set-based statement per batch, all batches in one transaction
+        with transaction() as cursor:
+            for start in range(0, len(unique_ids), batch_size):
+                batch = unique_ids[start:start + batch_size]
+                if action == 'delete':
+                    result = delete_materials(cursor, batch, reviewer_id=admin_id)
+                else:
+                    status = 'approved' if action == 'approve' else 'rejected'
+                    result = set_materials_status(cursor, batch, status, approved_by=admin_id, reviewer_id=admin_id)
+                if not result['success']:
+                    raise RuntimeError(result['message'])
+                
+                claimed.update(result['claimed'])
+                if action == 'delete':
+                    done.update(result['deleted'])
+                    file_paths.extend(result['deleted'].values())
+                else:
+                    done.update(result['updated'])
+        
+        dashboard_stats.invalidate()
+        if file_paths:
+            remove_files_later(file_paths)
+        for material_id in sorted(done):
+            audit(f'material_{action}', 'study_material', material_id, new_value={'bulk': True})
+        
+        past = {'approve': 'approved', 'reject': 'rejected', 'delete': 'deleted'}[action]
+        results = [
+            {'id': material_id, 'success': True, 'message': f'Material {past}'} if material_id in done
+            else {'id': material_id, 'success': False, 'message': 'Claimed by another reviewer'} if material_id in claimed
+            else {'id': material_id, 'success': False, 'message': 'Material not found'}
+            for material_id in unique_ids
+        ]
+        return jsonify({
+            'success': True,
+            'message': f'{len(done)} of {len(unique_ids)} materials {past}',
+            'results': results
+        })
+    
+    except Exception as e:
+        print(f"Error in bulk {action} of materials: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@admin.route('/materials/claim', methods=['POST'])
+@login_required
+@role_required('admin')
+def claim_materials():
+    """Lease the next pending materials to the current admin for review"""
+    try:
+        try:
+            data = _json_object()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        data = data if data is not None else request.form
+        try:
+            limit = int(data.get('limit', 10))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'limit must be an integer'}), 400
+        limit = min(max(limit, 1), Config.MODERATION_CLAIM_MAX)
+        
+        with transaction() as cursor:
+            result = claim_pending_materials(cursor, session.get('user_id'), limit,
+                                             Config.MODERATION_LEASE_SECONDS)
+            if not result['success']:
+                raise RuntimeError(result['message'])
+        
+        return jsonify({
+            'success': True,
+            'message': result['message'],
+            'lease_expires_at': result['expires_at'].isoformat(),
+            'materials': result['materials']
+        })
+    
+    except Exception as e:
+        print(f"Error claiming materials: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@admin.route('/materials/release', methods=['POST'])
+@login_required
+@role_required('admin')
+def release_materials():
+    """Give back the current admin's claims (all, or the given ids) to the queue"""
+    try:
+        material_ids = None
+        try:
+            if (_json_object() or {}).get('ids') is not None or request.form.get('ids'):
+                material_ids = _bulk_material_ids()
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        with transaction() as cursor:
+            result = release_claims(cursor, session.get('user_id'), material_ids)
+            if not result['success']:
+                raise RuntimeError(result['message'])
+        
+        return jsonify({'success': True, 'message': result['message'], 'released': result['released']})
+    
+    except Exception as e:
+        print(f"Error releasing materials: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @admin.route('/analytics')
 @login_required
 @role_required('admin')
+@read_only
 def analytics():
     """Analytics and reporting"""
     try:
-        from app import mysql
-        
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
-        # Get various statistics
-        cursor.execute(
-            """SELECT COUNT(*) as count, DATE(created_at) as date 
-               FROM users GROUP BY DATE(created_at) ORDER BY date DESC LIMIT 30"""
-        )
-        user_growth = cursor.fetchall()
-        
-        cursor.execute(
-            """SELECT COUNT(*) as count, approval_status 
-               FROM study_materials GROUP BY approval_status"""
-        )
-        material_status = cursor.fetchall()
-        
-        cursor.execute(
-            """SELECT subject, COUNT(*) as count 
-               FROM study_materials GROUP BY subject ORDER BY count DESC LIMIT 10"""
-        )
-        top_subjects = cursor.fetchall()
+        # Precomputed by rollup_analytics.py
+        user_growth = get_user_growth(cursor, days=30)
+        material_status = get_material_status(cursor)
+        top_subjects = get_top_subjects(cursor, limit=10)
         
         cursor.close()
         
@@ -435,6 +582,52 @@ def analytics():
     return render_template('upload.html')
 
 
+@admin.route('/sql-profile', methods=['GET', 'POST'])
+@login_required
+@role_required('admin')
+def sql_profile():
+    """Per-request SQL summaries collected by sql_profiler (this worker only); POST clears them"""
+    import sql_profiler
+    
+    if request.method == 'POST':
+        sql_profiler.reset()
+    return jsonify(sql_profiler.report())
+
+
+@admin.route('/audit/metrics')
+@login_required
+@role_required('admin')
+def audit_metrics():
+    """Audit log queue depth, dropped events and write counts (this worker only)"""
+    return jsonify(audit_log.metrics())
+
+
+@admin.route('/enrollments/import', methods=['POST'])
+@login_required
+@role_required('admin')
+def import_enrollments_route():
+    """Bulk-import enrollments from an uploaded CSV or NDJSON file"""
+    try:
+        from import_enrollments import import_upload
+
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({'success': False, 'message': 'No file provided'}), 400
+
+        summary = import_upload(request.files['file'], fmt=request.form.get('format') or None)
+
+        return jsonify({
+            'success': True,
+            'message': f"Imported {summary['added']} of {summary['rows']} enrollments",
+            'summary': summary
+        })
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error importing enrollments: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @admin.route('/dashboard')
 def admin_dashboard():
     return render_template('admin_dashboard.html')
@@ -475,16 +668,8 @@ def profile():
                                  user_name=user_name)
         
         # POST request - update profile
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        connection = get_db_connection()
+        cursor = get_cursor()
         
         # Handle photo upload
         photo_path = None
@@ -506,7 +691,6 @@ def profile():
         
         if not all([name, email, phone, department, designation]):
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'All fields are required'}), 400
         
         # Create or update profile
@@ -519,7 +703,6 @@ def profile():
             
             connection.commit()
             cursor.close()
-            connection.close()
             
             return jsonify({'success': True, 'message': 'Profile updated successfully'})
         
@@ -527,7 +710,6 @@ def profile():
             connection.rollback()
             print(f"Error updating admin profile: {e}")
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': str(e)}), 500
     
     except Exception as e:
@@ -5,6 +5,9 @@ from functools import wraps
 from models.user_model import authenticate_user, create_user
 from models.auth_utils import validate_password
 from config import Config
+from db_utils import get_db_connection, get_cursor
+from audit_log import audit
+import dashboard_stats
 
 auth = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -65,8 +68,6 @@ def login(role):
     
     # POST request - handle login
     try:
-        from app import mysql
-        
         email = request.form.get('email', '').strip()
         password = request.form.get('password', '').strip()
         
@@ -75,13 +76,14 @@ def login(role):
                                  role=role, 
                                  error='Email and password are required'), 400
         
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Authenticate user
         result = authenticate_user(cursor, email, password)
         cursor.close()
         
         if not result['success']:
+            audit('login_failed', 'user', new_value={'email': email, 'role': role})
             return render_template('login.html', 
                                  role=role, 
                                  error=result['message']), 401
@@ -101,6 +103,7 @@ def login(role):
         session['user_name'] = result['name']
         session['user_role'] = result['role']
         session['login_time'] = datetime.now()
+        audit('login', 'user', result['user_id'])
         
         # Redirect to appropriate dashboard
         if result['role'] == 'student':
@@ -133,8 +136,6 @@ def register(role):
     
     # POST request - handle registration
     try:
-        from app import mysql
-        
         email = request.form.get('email', '').strip()
         password = request.form.get('password', '').strip()
         confirm_password = request.form.get('confirm_password', '').strip()
@@ -158,7 +159,7 @@ def register(role):
                                  role=role, 
                                  error=message), 400
         
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Create user
         result = create_user(cursor, email, password, name, role)
@@ -169,8 +170,9 @@ def register(role):
                                  role=role, 
                                  error=result['message']), 400
         
-        mysql.connection.commit()
+        get_db_connection().commit()
         cursor.close()
+        dashboard_stats.invalidate()
         
         # Redirect to login page
         return redirect(url_for('auth.login', role=role))
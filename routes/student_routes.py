@@ -2,11 +2,13 @@
 from flask import Blueprint, render_template, session, request, jsonify, url_for, send_file
 from werkzeug.utils import secure_filename
 import os
-import pymysql
-from pymysql.cursors import DictCursor
 from config import Config
+from db_utils import get_db_connection, get_cursor
+from db_routing import read_only
 from models.material_model import get_all_materials
+from models.statistics_model import get_counters
 from routes.auth_routes import login_required, role_required
+from download_counters import db_downloads
 from datetime import datetime
 
 student = Blueprint('student', __name__, url_prefix='/student')
@@ -39,6 +41,7 @@ def allowed_file(filename):
 @student.route('/dashboard')
 @login_required
 @role_required('student')
+@read_only
 def dashboard():
     """Student dashboard showing approved study materials"""
     try:
@@ -47,20 +50,11 @@ def dashboard():
         user_id = session.get('user_id')
         user_name = session.get('user_name')
         
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        cursor = get_cursor()
         
         # Get all approved materials
         cursor.execute(
-            """SELECT id, title, subject, description, file_path, upload_date, download_count, 
+            """SELECT m.id, m.title, m.subject, m.description, m.file_path, m.upload_date, m.download_count,
                       CONCAT(u.name) as uploader_name
                FROM study_materials m
                JOIN users u ON m.uploaded_by = u.id
@@ -77,10 +71,7 @@ def dashboard():
         subjects = cursor.fetchall()
         
         # Get statistics
-        cursor.execute(
-            "SELECT COUNT(*) as total FROM study_materials WHERE approval_status = 'approved'"
-        )
-        total_materials = cursor.fetchone()['total']
+        total_materials = get_counters(cursor, ['materials_approved'])['materials_approved']
         
         cursor.execute(
             "SELECT COUNT(DISTINCT subject) as total FROM study_materials WHERE approval_status = 'approved'"
@@ -88,7 +79,6 @@ def dashboard():
         total_subjects = cursor.fetchone()['total']
         
         cursor.close()
-        connection.close()
         
         return render_template('student_dashboard.html',
                              user_name=user_name,
@@ -105,25 +95,17 @@ def dashboard():
 @student.route('/materials/filter')
 @login_required
 @role_required('student')
+@read_only
 def filter_materials():
     """Filter materials by subject"""
     try:
         subject = request.args.get('subject', '').strip()
         
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        cursor = get_cursor()
         
         if subject:
             cursor.execute(
-                """SELECT id, title, subject, description, file_path, upload_date, download_count, 
+                """SELECT m.id, m.title, m.subject, m.description, m.file_path, m.upload_date, m.download_count,
                           CONCAT(u.name) as uploader_name
                    FROM study_materials m
                    JOIN users u ON m.uploaded_by = u.id
@@ -133,7 +115,7 @@ def filter_materials():
             )
         else:
             cursor.execute(
-                """SELECT id, title, subject, description, file_path, upload_date, download_count,
+                """SELECT m.id, m.title, m.subject, m.description, m.file_path, m.upload_date, m.download_count,
                           CONCAT(u.name) as uploader_name
                    FROM study_materials m
                    JOIN users u ON m.uploaded_by = u.id
@@ -143,7 +125,6 @@ def filter_materials():
         
         materials = cursor.fetchall()
         cursor.close()
-        connection.close()
         
         return render_template('student_materials_list.html', materials=materials, selected_subject=subject)
     
@@ -155,19 +136,11 @@ def filter_materials():
 @student.route('/materials/<int:material_id>/download')
 @login_required
 @role_required('student')
+@read_only
 def download_material(material_id):
     """Download material"""
     try:
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        cursor = get_cursor()
         
         # Get material info
         cursor.execute(
@@ -176,19 +149,13 @@ def download_material(material_id):
         )
         material = cursor.fetchone()
         
+        cursor.close()
+        
         if not material:
-            cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Material not found'}), 404
         
-        # Increment download count
-        cursor.execute(
-            "UPDATE study_materials SET download_count = download_count + 1 WHERE id = %s",
-            (material_id,)
-        )
-        connection.commit()
-        cursor.close()
-        connection.close()
+        # Count the download (written to study_materials in batches)
+        db_downloads.record(material_id)
         
         # Send file
         file_path = material['file_path']
@@ -246,16 +213,8 @@ def profile():
                                  enrollments=enrollments)
         
         # POST request - update profile
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        connection = get_db_connection()
+        cursor = get_cursor()
         
         # Handle photo upload
         photo_path = None
@@ -309,21 +268,17 @@ def profile():
             
             connection.commit()
             cursor.close()
-            connection.close()
             return jsonify({'success': True, 'message': 'Profile updated successfully'})
         
         except Exception as e:
             connection.rollback()
             print(f"Error updating student profile: {e}")
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': str(e)}), 500
         
         finally:
             if cursor:
                 cursor.close()
-            if connection:
-                connection.close()
     
     except Exception as e:
         print(f"Error in student profile: {e}")
@@ -3,9 +3,12 @@ from flask import Blueprint, render_template, session, request, jsonify, redirec
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
-import pymysql
-from pymysql.cursors import DictCursor
 from config import Config
+from db_utils import get_db_connection, get_cursor
+from db_routing import read_only
+from audit_log import audit
+import dashboard_stats
+from models.material_model import add_material, update_material, delete_material
 from models.profile_model import create_profile, get_profile
 from routes.auth_routes import login_required, role_required
 
@@ -39,22 +42,14 @@ def allowed_material_file(filename):
 @teacher.route('/dashboard')
 @login_required
 @role_required('teacher')
+@read_only
 def dashboard():
     """Teacher dashboard showing uploaded materials"""
     try:
         user_id = session.get('user_id')
         user_name = session.get('user_name')
         
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        cursor = get_cursor()
         
         # Get materials uploaded by this teacher
         cursor.execute(
@@ -64,18 +59,12 @@ def dashboard():
         )
         materials = cursor.fetchall()
         
-        # Get statistics
-        cursor.execute("SELECT COUNT(*) as total FROM study_materials WHERE uploaded_by = %s", (user_id,))
-        total_materials = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as pending FROM study_materials WHERE uploaded_by = %s AND approval_status = 'pending'", (user_id,))
-        pending_materials = cursor.fetchone()['pending']
-        
-        cursor.execute("SELECT COUNT(*) as approved FROM study_materials WHERE uploaded_by = %s AND approval_status = 'approved'", (user_id,))
-        approved_materials = cursor.fetchone()['approved']
+        # Statistics from the materials already loaded
+        total_materials = len(materials)
+        pending_materials = sum(1 for m in materials if m['approval_status'] == 'pending')
+        approved_materials = sum(1 for m in materials if m['approval_status'] == 'approved')
         
         cursor.close()
-        connection.close()
         
         return render_template('teacher_dashboard.html',
                              user_name=user_name,
@@ -98,8 +87,6 @@ def upload_material():
         return render_template('upload_material.html')
     
     try:
-        from app import mysql
-        
         user_id = session.get('user_id')
         
         # Get form data
@@ -134,15 +121,18 @@ def upload_material():
         file_path = f"/static/uploads/materials/{filename}"
         file_type = filename.rsplit('.', 1)[1].lower()
         
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Add material to database
         result = add_material(cursor, title, subject, description, file_path, user_id, 'pending')
         
-        mysql.connection.commit()
         cursor.close()
         
         if result['success']:
+            get_db_connection().commit()
+            dashboard_stats.invalidate()
+            audit('material_upload', 'study_material', result['material_id'],
+                  new_value={'title': title, 'subject': subject, 'file_path': file_path})
             return jsonify({'success': True, 'message': 'Material uploaded successfully and pending approval'})
         else:
             return jsonify({'success': False, 'message': result['message']}), 500
@@ -158,10 +148,8 @@ def upload_material():
 def edit_material(material_id):
     """Edit material details"""
     try:
-        from app import mysql
-        
         user_id = session.get('user_id')
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Check if material belongs to current teacher
         cursor.execute("SELECT * FROM study_materials WHERE id = %s AND uploaded_by = %s", (material_id, user_id))
@@ -183,7 +171,7 @@ def edit_material(material_id):
             return jsonify({'success': False, 'message': 'Title and subject are required'}), 400
         
         result = update_material(cursor, material_id, title=title, subject=subject, description=description)
-        mysql.connection.commit()
+        get_db_connection().commit()
         cursor.close()
         
         if result['success']:
@@ -202,10 +190,8 @@ def edit_material(material_id):
 def delete_material_route(material_id):
     """Delete material"""
     try:
-        from app import mysql
-        
         user_id = session.get('user_id')
-        cursor = mysql.connection.cursor()
+        cursor = get_cursor()
         
         # Check if material belongs to current teacher
         cursor.execute("SELECT file_path FROM study_materials WHERE id = %s AND uploaded_by = %s", (material_id, user_id))
@@ -230,10 +216,12 @@ def delete_material_route(material_id):
         
         # Delete from database
         result = delete_material(cursor, material_id)
-        mysql.connection.commit()
         cursor.close()
         
         if result['success']:
+            get_db_connection().commit()
+            dashboard_stats.invalidate()
+            audit('material_delete', 'study_material', material_id, old_value={'file_path': material['file_path']})
             return jsonify({'success': True, 'message': 'Material deleted successfully'})
         else:
             return jsonify({'success': False, 'message': result['message']}), 500
@@ -283,16 +271,8 @@ def profile():
                                  courses=courses)
         
         # POST request - update profile
-        connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DB,
-            charset='utf8mb4',
-            cursorclass=DictCursor
-        )
-        
-        cursor = connection.cursor()
+        connection = get_db_connection()
+        cursor = get_cursor()
         
         # Handle photo upload
         photo_path = None
@@ -316,13 +296,11 @@ def profile():
         
         if not all([name, email, phone, department, posting]):
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Required fields are missing'}), 400
         
         # Validate phone number
         if not phone.isdigit() or len(phone) < 10:
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': 'Invalid phone number'}), 400
         
         try:
@@ -353,7 +331,6 @@ def profile():
             
             connection.commit()
             cursor.close()
-            connection.close()
             
             return jsonify({'success': True, 'message': 'Profile updated successfully'})
         
@@ -361,7 +338,6 @@ def profile():
             connection.rollback()
             print(f"Error updating teacher profile: {e}")
             cursor.close()
-            connection.close()
             return jsonify({'success': False, 'message': str(e)}), 500
     
     except Exception as e:
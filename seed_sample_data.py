@@ -0,0 +1,14 @@
+"""
+Seed the file-based stores with sample data
+
+Run once on a fresh install (the stores no longer seed themselves on import):
+    python seed_sample_data.py
+"""
+from enrollments_store import init_sample_data
+
+
+if __name__ == "__main__":
+    if init_sample_data():
+        print("✓ Sample enrollments created")
+    else:
+        print("Enrollments store already has data, nothing to seed")
@@ -3,6 +3,7 @@ Database schema setup script for Educational Management System
 This creates all necessary tables for the LMS application
 """
 
+import sys
 import mysql.connector
 from config import Config
 from datetime import datetime
@@ -115,8 +116,11 @@ def create_tables():
                 download_count INT DEFAULT 0,
                 approved_by INT,
                 approval_date TIMESTAMP NULL,
+                claimed_by INT NULL,
+                claim_expires_at DATETIME NULL,
                 FOREIGN KEY (uploaded_by) REFERENCES users(id) ON DELETE CASCADE,
                 FOREIGN KEY (approved_by) REFERENCES users(id) ON DELETE SET NULL,
+                FOREIGN KEY (claimed_by) REFERENCES users(id) ON DELETE SET NULL,
                 INDEX idx_subject (subject),
                 INDEX idx_uploaded_by (uploaded_by),
                 INDEX idx_approval_status (approval_status)
@@ -157,6 +161,33 @@ def create_tables():
         """)
         print("✓ Statistics table created")
         
+        # Daily analytics rollups (maintained by rollup_analytics.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_daily_signups (
+                day DATE NOT NULL,
+                role ENUM('student', 'teacher', 'admin') NOT NULL,
+                signups INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, role)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_daily_materials (
+                day DATE NOT NULL,
+                subject VARCHAR(255) NOT NULL,
+                approval_status ENUM('pending', 'approved', 'rejected') NOT NULL,
+                materials INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, subject, approval_status)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+                name VARCHAR(50) PRIMARY KEY,
+                watermark DATETIME(6),
+                updated_at DATETIME
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        print("✓ Analytics rollup tables created")
+        
         connection.commit()
         cursor.close()
         connection.close()
@@ -168,10 +199,112 @@ def create_tables():
         raise
 
 
+# Columns added after the first release: (table, column, definition)
+COLUMNS = [
+    ('study_materials', 'claimed_by', 'INT NULL, ADD FOREIGN KEY (claimed_by) REFERENCES users(id) ON DELETE SET NULL'),
+    ('study_materials', 'claim_expires_at', 'DATETIME NULL'),
+]
+
+
+def add_columns():
+    """Add any missing columns (safe to run on an existing database)"""
+    try:
+        connection = mysql.connector.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=Config.MYSQL_DB
+        )
+        cursor = connection.cursor()
+        
+        for table, column, definition in COLUMNS:
+            cursor.execute(
+                """SELECT 1 FROM information_schema.columns 
+                   WHERE table_schema = %s AND table_name = %s AND column_name = %s LIMIT 1""",
+                (Config.MYSQL_DB, table, column)
+            )
+            if cursor.fetchone():
+                continue
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            print(f"✓ Column {table}.{column} added")
+        
+        cursor.close()
+        connection.close()
+    
+    except Exception as e:
+        print(f"✗ Error adding columns: {e}")
+        raise
+
+
+# Secondary indexes added after the tables (keyset pagination, analytics rollups)
+INDEXES = [
+    ('users', 'idx_users_created', '(created_at, id)'),
+    ('users', 'idx_users_role_created', '(role, created_at, id)'),
+    ('study_materials', 'idx_materials_upload_date', '(upload_date, id)'),
+    ('study_materials', 'idx_materials_status_upload_date', '(approval_status, upload_date, id)'),
+    # Changed-since scans of the analytics rollup job
+    ('study_materials', 'idx_materials_updated', '(updated_date)'),
+    # Email prefix search within a role (GET /admin/users/search)
+    ('users', 'idx_users_role_email', '(role, email)'),
+]
+
+# Name substring search. The ngram parser indexes every 2-character sequence
+# (ngram_token_size), so MATCH ... AGAINST('"text"') finds names containing text.
+FULLTEXT_INDEXES = [
+    ('users', 'ft_users_name', '(name) WITH PARSER ngram'),
+]
+
+
+def _index_exists(cursor, table, name):
+    cursor.execute(
+        """SELECT 1 FROM information_schema.statistics 
+           WHERE table_schema = %s AND table_name = %s AND index_name = %s LIMIT 1""",
+        (Config.MYSQL_DB, table, name)
+    )
+    return cursor.fetchone() is not None
+
+
+def create_indexes():
+    """Add any missing secondary indexes (safe to run on an existing database)"""
+    try:
+        connection = mysql.connector.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=Config.MYSQL_DB
+        )
+        cursor = connection.cursor()
+        
+        for table, name, columns in INDEXES:
+            if _index_exists(cursor, table, name):
+                print(f"Index {name} already exists")
+                continue
+            cursor.execute(f"CREATE INDEX {name} ON {table} {columns}")
+            print(f"✓ Index {name} created on {table} {columns}")
+        
+        # The default stopword list holds single letters such as 'a'; the ngram
+        # parser would drop every bigram containing one, so build without it
+        cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        for table, name, columns in FULLTEXT_INDEXES:
+            if _index_exists(cursor, table, name):
+                print(f"Index {name} already exists")
+                continue
+            cursor.execute(f"CREATE FULLTEXT INDEX {name} ON {table} {columns}")
+            print(f"✓ Full-text index {name} created on {table} {columns}")
+        
+        cursor.close()
+        connection.close()
+    
+    except Exception as e:
+        print(f"✗ Error creating indexes: {e}")
+        raise
+
+
 def insert_admin_user():
     """Insert default admin user"""
     try:
         from models.auth_utils import hash_password
+        from models.statistics_model import adjust_counters, user_deltas
         
         connection = mysql.connector.connect(
             host=Config.MYSQL_HOST,
@@ -196,6 +329,7 @@ def insert_admin_user():
                VALUES (%s, %s, %s, %s, %s, %s)""",
             ('admin@aves.edu', admin_password, 'System Administrator', 'admin', datetime.now(), datetime.now())
         )
+        adjust_counters(cursor, user_deltas('admin'))
         
         connection.commit()
         cursor.close()
@@ -209,7 +343,42 @@ def insert_admin_user():
         raise
 
 
+def seed_counters():
+    """Set the dashboard counters from the existing rows (safe to run again)"""
+    try:
+        from models.statistics_model import reconcile_counters
+        
+        connection = mysql.connector.connect(
+            host=Config.MYSQL_HOST,
+            user=Config.MYSQL_USER,
+            password=Config.MYSQL_PASSWORD,
+            database=Config.MYSQL_DB
+        )
+        cursor = connection.cursor(dictionary=True)
+        
+        drift = reconcile_counters(cursor, fix=True)
+        connection.commit()
+        cursor.close()
+        connection.close()
+        
+        for name, (stored, actual) in sorted(drift.items()):
+            print(f"✓ Counter {name} set to {actual} (was {stored})")
+        if not drift:
+            print("Statistics counters already up to date")
+    
+    except Exception as e:
+        print(f"✗ Error seeding statistics counters: {e}")
+        raise
+
+
 if __name__ == "__main__":
+    # Existing installations: python setup_database.py --upgrade
+    if '--upgrade' in sys.argv[1:]:
+        add_columns()
+        create_indexes()
+        seed_counters()
+        sys.exit(0)
+    
     print("\n" + "="*60)
     print("  Educational Management System - Database Setup")
     print("="*60 + "\n")
@@ -220,7 +389,10 @@ if __name__ == "__main__":
     print("\nStep 2: Creating tables...")
     create_tables()
     
-    print("\nStep 3: Inserting default admin user...")
+    print("\nStep 3: Creating indexes...")
+    create_indexes()
+    
+    print("\nStep 4: Inserting default admin user...")
     insert_admin_user()
     
     print("\n" + "="*60)
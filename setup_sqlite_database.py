@@ -0,0 +1,74 @@
+"""
+Database setup for the embedded SQLite engine (DB_ENGINE=sqlite)
+Creates Config.DB_SQLITE_PATH with every table and the default admin user
+"""
+
+import sys
+from config import Config
+from datetime import datetime
+from models.dialect import connect_sqlite, create_sqlite_schema
+
+
+def create_tables(connection):
+    """Create all tables"""
+    try:
+        create_sqlite_schema(connection)
+        connection.commit()
+        print(f"✓ All tables created in {Config.DB_SQLITE_PATH}")
+    except Exception as e:
+        print(f"✗ Error creating tables: {e}")
+        raise
+
+
+def insert_admin_user(connection):
+    """Insert default admin user"""
+    try:
+        from models.auth_utils import hash_password
+        from models.statistics_model import adjust_counters, user_deltas
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT id FROM users WHERE email = %s", ('admin@aves.edu',))
+        if cursor.fetchone():
+            print("Admin user already exists")
+            cursor.close()
+            return
+
+        admin_password = hash_password('Admin@123456')
+        cursor.execute(
+            """INSERT INTO users (email, password, name, role, created_at, updated_at)
+               VALUES (%s, %s, %s, %s, %s, %s)""",
+            ('admin@aves.edu', admin_password, 'System Administrator', 'admin', datetime.now(), datetime.now())
+        )
+        adjust_counters(cursor, user_deltas('admin'))
+        connection.commit()
+        cursor.close()
+
+        print("✓ Default admin user created (Email: admin@aves.edu, Password: Admin@123456)")
+        print("  ⚠️  IMPORTANT: Change this password on first login!")
+
+    except Exception as e:
+        print(f"✗ Error inserting admin user: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        Config.DB_SQLITE_PATH = sys.argv[1]
+
+    print("\n" + "="*60)
+    print("  Educational Management System - SQLite Setup")
+    print("="*60 + "\n")
+
+    connection = connect_sqlite()
+    try:
+        print("Step 1: Creating tables...")
+        create_tables(connection)
+
+        print("\nStep 2: Inserting default admin user...")
+        insert_admin_user(connection)
+    finally:
+        connection.close()
+
+    print("\n" + "="*60)
+    print("  Start the app with DB_ENGINE=sqlite to use this database")
+    print("="*60 + "\n")
@@ -0,0 +1,229 @@
+"""
+Opt-in per-request SQL profiler
+
+Enabled with SQL_PROFILER_ENABLED=true. db_utils.get_cursor() then wraps
+the request cursor in ProfilingCursor, which records for every statement
+its fingerprint (the SQL with literals replaced by ?), time, row count
+and the line of application code that issued it.
+
+When a request finishes:
+- fingerprints run SQL_PROFILER_REPEAT_THRESHOLD or more times are flagged
+  as repeated (usually an N+1 loop, or several queries that could be one)
+- requests slower than SQL_PROFILER_SLOW_REQUEST_MS are printed with their
+  query breakdown
+- a summary is kept in memory (last SQL_PROFILER_HISTORY requests plus
+  per-fingerprint totals) for the admin endpoint GET /admin/sql-profile
+
+Everything is per worker process.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from flask import g, request
+from config import Config
+
+_REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {os.path.abspath(__file__), os.path.join(_REPO_ROOT, 'db_utils.py')}
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|%\(\w+\)s|\?')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize a statement so that executions differing only in values compare equal"""
+    sql = _COMMENTS.sub(' ', sql)
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _LISTS.sub('(?+)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _call_site():
+    """file:line of the innermost application frame outside the database layer"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename not in _SKIP_FILES and filename.startswith(_REPO_ROOT):
+            return f"{os.path.relpath(filename, _REPO_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class ProfilingCursor:
+    """Cursor wrapper that records every statement into the current request's profile"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _record(self, sql, started, executions):
+        g.setdefault('sql_queries', []).append({
+            'fingerprint': fingerprint(sql),
+            'ms': (time.perf_counter() - started) * 1000,
+            'rows': max(self._cursor.rowcount or 0, 0),
+            'executions': executions,
+            'site': _call_site()
+        })
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            self._record(query, started, 1)
+
+    def executemany(self, query, seq_params):
+        seq_params = list(seq_params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, seq_params)
+        finally:
+            self._record(query, started, len(seq_params))
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ----------------------------------------------------------------------
+# Per-process summaries
+# ----------------------------------------------------------------------
+
+_lock = threading.Lock()
+_recent = deque(maxlen=Config.SQL_PROFILER_HISTORY)
+_fingerprints = {}  # fingerprint -> totals
+_MAX_FINGERPRINTS = 1000
+
+
+def _group(queries):
+    """Aggregate one request's statements by fingerprint, slowest total first"""
+    groups = {}
+    for query in queries:
+        group = groups.setdefault(query['fingerprint'], {
+            'fingerprint': query['fingerprint'], 'count': 0, 'ms': 0.0, 'rows': 0, 'sites': []
+        })
+        group['count'] += 1
+        group['ms'] += query['ms']
+        group['rows'] += query['rows']
+        if query['site'] not in group['sites']:
+            group['sites'].append(query['site'])
+    return sorted(groups.values(), key=lambda group: group['ms'], reverse=True)
+
+
+def summarize_request(method, path, endpoint, request_ms, queries):
+    """Build the summary for one finished request"""
+    groups = _group(queries)
+    for group in groups:
+        group['ms'] = round(group['ms'], 3)
+    repeated = [group for group in groups if group['count'] >= Config.SQL_PROFILER_REPEAT_THRESHOLD]
+    return {
+        'method': method,
+        'path': path,
+        'endpoint': endpoint,
+        'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'request_ms': round(request_ms, 3),
+        'sql_ms': round(sum(q['ms'] for q in queries), 3),
+        'queries': len(queries),
+        'rows': sum(q['rows'] for q in queries),
+        'repeated': [{'fingerprint': r['fingerprint'], 'count': r['count'], 'sites': r['sites']} for r in repeated],
+        'breakdown': groups
+    }
+
+
+def _remember(summary):
+    with _lock:
+        _recent.append(summary)
+        for group in summary['breakdown']:
+            totals = _fingerprints.get(group['fingerprint'])
+            if totals is None:
+                if len(_fingerprints) >= _MAX_FINGERPRINTS:
+                    continue
+                totals = _fingerprints[group['fingerprint']] = {
+                    'fingerprint': group['fingerprint'], 'count': 0, 'ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'requests': 0, 'repeated_in_requests': 0
+                }
+            totals['count'] += group['count']
+            totals['ms'] += group['ms']
+            totals['max_ms'] = max(totals['max_ms'], group['ms'] / group['count'])
+            totals['rows'] += group['rows']
+            totals['requests'] += 1
+            if group['count'] >= Config.SQL_PROFILER_REPEAT_THRESHOLD:
+                totals['repeated_in_requests'] += 1
+
+
+def _log_slow(summary):
+    print(f"Slow request {summary['method']} {summary['path']}: {summary['request_ms']:.1f} ms, "
+          f"{summary['queries']} queries in {summary['sql_ms']:.1f} ms")
+    for group in summary['breakdown']:
+        flag = '  [repeated]' if group['count'] >= Config.SQL_PROFILER_REPEAT_THRESHOLD else ''
+        print(f"  {group['count']:>4} x {group['ms']:9.2f} ms  {group['fingerprint'][:120]}{flag}")
+        print(f"         at {', '.join(group['sites'][:3])}")
+
+
+def report():
+    """Recent request summaries, per-fingerprint totals and flagged requests"""
+    with _lock:
+        recent = list(_recent)
+        fingerprints = [dict(totals) for totals in _fingerprints.values()]
+    for totals in fingerprints:
+        totals['ms'] = round(totals['ms'], 3)
+        totals['avg_ms'] = round(totals['ms'] / totals['count'], 3) if totals['count'] else 0
+        totals['max_ms'] = round(totals['max_ms'], 3)
+    return {
+        'enabled': Config.SQL_PROFILER_ENABLED,
+        'slow_request_ms': Config.SQL_PROFILER_SLOW_REQUEST_MS,
+        'repeat_threshold': Config.SQL_PROFILER_REPEAT_THRESHOLD,
+        'fingerprints': sorted(fingerprints, key=lambda t: t['ms'], reverse=True),
+        'repeated': [s for s in reversed(recent) if s['repeated']],
+        'slow': [s for s in reversed(recent) if s['request_ms'] >= Config.SQL_PROFILER_SLOW_REQUEST_MS],
+        'recent': list(reversed(recent))
+    }
+
+
+def reset():
+    """Forget all collected summaries"""
+    with _lock:
+        _recent.clear()
+        _fingerprints.clear()
+
+
+# ----------------------------------------------------------------------
+# Flask hooks
+# ----------------------------------------------------------------------
+
+def _start_request():
+    g.sql_profile_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.get('sql_profile_started')
+    queries = g.pop('sql_queries', None)
+    if started is None or not queries:
+        return response
+
+    summary = summarize_request(request.method, request.path, request.endpoint,
+                                (time.perf_counter() - started) * 1000, queries)
+    _remember(summary)
+    if summary['request_ms'] >= Config.SQL_PROFILER_SLOW_REQUEST_MS:
+        _log_slow(summary)
+    elif summary['repeated']:
+        for repeated in summary['repeated']:
+            print(f"Repeated query in {request.method} {request.path}: {repeated['count']} x "
+                  f"{repeated['fingerprint'][:120]} at {', '.join(repeated['sites'][:3])}")
+    return response
+
+
+def init_app(app):
+    """Profile every request's SQL when SQL_PROFILER_ENABLED is set"""
+    if Config.SQL_PROFILER_ENABLED:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
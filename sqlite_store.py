@@ -0,0 +1,291 @@
+"""
+SQLite engine for the file-based stores used by app.py
+
+Implements the same operations as materials_store and enrollments_store
+on top of the standard library sqlite3 module. Selected with
+MATERIALS_STORE_BACKEND=sqlite and/or ENROLLMENTS_STORE_BACKEND=sqlite;
+both stores share the database file at Config.STORE_SQLITE_PATH.
+
+The database runs in WAL mode, so readers never block the single writer
+and writers from several gunicorn workers queue on SQLite's own lock.
+Existing JSON data is copied in once with migrate_to_sqlite.py.
+"""
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    filename TEXT,
+    original_name TEXT,
+    file_path TEXT,
+    teacher TEXT,
+    uploaded_at TEXT,
+    downloads INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS enrollments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id TEXT NOT NULL,
+    student_name TEXT,
+    course_name TEXT NOT NULL,
+    enrollment_date TEXT,
+    status TEXT
+);
+
+-- Enrollments per course, maintained by SqliteEnrollments.add in the same transaction
+CREATE TABLE IF NOT EXISTS course_counts (
+    course_name TEXT PRIMARY KEY,
+    students_count INTEGER NOT NULL,
+    first_enrollment_id INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_materials_title ON materials (title COLLATE NOCASE, id);
+CREATE INDEX IF NOT EXISTS idx_materials_downloads ON materials (downloads DESC, id);
+CREATE INDEX IF NOT EXISTS idx_enrollments_student_id ON enrollments (student_id);
+CREATE INDEX IF NOT EXISTS idx_enrollments_course_name ON enrollments (course_name COLLATE NOCASE);
+"""
+
+MATERIAL_COLUMNS = ('id', 'title', 'description', 'filename', 'original_name',
+                    'file_path', 'teacher', 'uploaded_at', 'downloads')
+ENROLLMENT_COLUMNS = ('id', 'student_id', 'student_name', 'course_name',
+                      'enrollment_date', 'status')
+
+
+class SqliteDatabase:
+    """One sqlite3 connection per thread to a WAL-mode database file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self):
+        """Connection for the current thread (usable as a transaction context manager)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the current thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SqliteMaterials:
+    """materials_store operations backed by the materials table"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def add(self, material):
+        """Insert a new material and return it with its assigned ID"""
+        columns = MATERIAL_COLUMNS[1:]
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO materials ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [material[c] for c in columns]
+            )
+        material['id'] = cursor.lastrowid
+        return dict(material)
+
+    def get(self, material_id):
+        """Get one material, or None"""
+        row = self.db.connection().execute(
+            "SELECT * FROM materials WHERE id = ?", (int(material_id),)
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def all(self):
+        """Get all materials in upload order"""
+        rows = self.db.connection().execute("SELECT * FROM materials ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def page(self, offset, cursor, limit, sort, fields, before=None):
+        """
+        One page of materials, plus the total count
+
+        Returns:
+            Tuple of (materials, total, has_more, has_previous)
+        """
+        order_by = {
+            'newest': 'id DESC',
+            'oldest': 'id ASC',
+            'title': 'title COLLATE NOCASE, id',
+            'downloads': 'downloads DESC, id',
+        }[sort]
+        where, params = '', []
+        if cursor is not None:
+            where = 'WHERE id < ?' if sort == 'newest' else 'WHERE id > ?'
+            params.append(cursor)
+            offset = 0
+        elif before is not None:
+            # Walk backwards from `before`, then restore the page order
+            where = 'WHERE id > ?' if sort == 'newest' else 'WHERE id < ?'
+            order_by = 'id ASC' if sort == 'newest' else 'id DESC'
+            params.append(before)
+            offset = 0
+
+        conn = self.db.connection()
+        total = conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0]
+        # Fetch one extra row to learn whether another page follows
+        rows = conn.execute(
+            f"SELECT {', '.join(fields)} FROM materials {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [limit + 1, offset]
+        ).fetchall()
+        page = [dict(row) for row in rows[:limit]]
+        if before is not None:
+            page.reverse()
+            return page, total, True, len(rows) > limit
+        return page, total, len(rows) > limit, cursor is not None or offset > 0
+
+    def delete(self, material_id):
+        """Delete a material"""
+        with self.db.connection() as conn:
+            conn.execute("DELETE FROM materials WHERE id = ?", (int(material_id),))
+        return True
+
+    def increment_downloads(self, material_id, count=1):
+        """Increment one material's download count"""
+        self.add_downloads({material_id: count})
+
+    def add_downloads(self, deltas):
+        """Add a batch of {material_id: count} download counts in one transaction"""
+        with self.db.connection() as conn:
+            conn.executemany(
+                "UPDATE materials SET downloads = downloads + ? WHERE id = ?",
+                [(count, int(material_id)) for material_id, count in deltas.items()]
+            )
+
+
+class SqliteEnrollments:
+    """enrollments_store operations backed by the enrollments table"""
+
+    def __init__(self, db):
+        self.db = db
+        conn = self.db.connection()
+        has_counts = conn.execute("SELECT 1 FROM course_counts LIMIT 1").fetchone()
+        if not has_counts and not self.is_empty():
+            self.rebuild_course_counts()
+
+    def add(self, enrollment):
+        """Insert a new enrollment and return it with its assigned ID"""
+        columns = ENROLLMENT_COLUMNS[1:]
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO enrollments ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [enrollment[c] for c in columns]
+            )
+            self._adjust_course_count(conn, enrollment['course_name'], 1, cursor.lastrowid)
+        enrollment['id'] = cursor.lastrowid
+        return dict(enrollment)
+
+    def add_many(self, enrollments):
+        """Insert a batch of new enrollments in one transaction and return them with their IDs"""
+        columns = ENROLLMENT_COLUMNS[1:]
+        sql = f"INSERT INTO enrollments ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        first_ids, counts = {}, {}
+        with self.db.connection() as conn:
+            for enrollment in enrollments:
+                enrollment['id'] = conn.execute(sql, [enrollment[c] for c in columns]).lastrowid
+                first_ids.setdefault(enrollment['course_name'], enrollment['id'])
+                counts[enrollment['course_name']] = counts.get(enrollment['course_name'], 0) + 1
+            for course_name, count in counts.items():
+                self._adjust_course_count(conn, course_name, count, first_ids[course_name])
+        return [dict(e) for e in enrollments]
+
+    def _adjust_course_count(self, conn, course_name, delta, enrollment_id):
+        """Apply an O(1) change to course_counts inside the caller's transaction"""
+        conn.execute(
+            """INSERT INTO course_counts (course_name, students_count, first_enrollment_id)
+               VALUES (?, ?, ?)
+               ON CONFLICT (course_name) DO UPDATE SET students_count = students_count + excluded.students_count""",
+            (course_name, delta, enrollment_id)
+        )
+        conn.execute("DELETE FROM course_counts WHERE course_name = ? AND students_count <= 0", (course_name,))
+
+    def all(self):
+        """Get all enrollments in insertion order"""
+        rows = self.db.connection().execute("SELECT * FROM enrollments ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def for_course(self, course_name):
+        """Enrollments of a course (case-insensitive)"""
+        rows = self.db.connection().execute(
+            "SELECT * FROM enrollments WHERE course_name = ? COLLATE NOCASE ORDER BY id", (course_name,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def for_student(self, student_id):
+        """Enrollments of a student"""
+        rows = self.db.connection().execute(
+            "SELECT * FROM enrollments WHERE student_id = ? ORDER BY id", (student_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_for_course(self, course_name):
+        """Number of enrollments in a course (case-insensitive)"""
+        return self.db.connection().execute(
+            "SELECT COUNT(*) FROM enrollments WHERE course_name = ? COLLATE NOCASE", (course_name,)
+        ).fetchone()[0]
+
+    def courses(self):
+        """Distinct course names with their enrollment counts, in first-enrollment order"""
+        rows = self.db.connection().execute(
+            "SELECT course_name AS name, students_count FROM course_counts ORDER BY first_enrollment_id"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _actual_course_counts(self, conn):
+        return conn.execute(
+            """SELECT course_name, COUNT(*) AS students_count, MIN(id) AS first_enrollment_id
+               FROM enrollments GROUP BY course_name"""
+        ).fetchall()
+
+    def verify_course_counts(self):
+        """Courses whose stored count differs from a fresh count, as name -> (stored, actual)"""
+        conn = self.db.connection()
+        stored = {row[0]: row[1] for row in conn.execute("SELECT course_name, students_count FROM course_counts")}
+        actual = {row[0]: row[1] for row in self._actual_course_counts(conn)}
+        return {
+            name: (stored.get(name, 0), actual.get(name, 0))
+            for name in set(stored) | set(actual)
+            if stored.get(name, 0) != actual.get(name, 0)
+        }
+
+    def rebuild_course_counts(self):
+        """Recount enrollments per course into course_counts"""
+        with self.db.connection() as conn:
+            rows = self._actual_course_counts(conn)
+            conn.execute("DELETE FROM course_counts")
+            conn.executemany(
+                "INSERT INTO course_counts (course_name, students_count, first_enrollment_id) VALUES (?, ?, ?)",
+                [tuple(row) for row in rows]
+            )
+        return {row[0]: row[1] for row in sorted(rows, key=lambda row: row[2])}
+
+    def is_empty(self):
+        """True if there are no enrollments yet"""
+        return self.db.connection().execute("SELECT 1 FROM enrollments LIMIT 1").fetchone() is None
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path):
+    """Shared SqliteDatabase for a file path"""
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = SqliteDatabase(path)
+        return _databases[path]
@@ -0,0 +1,108 @@
+"""
+Shared helpers for the JSON file stores (materials_store, enrollments_store)
+
+- locked(path): exclusive lock around a read-modify-write of a store file,
+  held across processes (gunicorn workers) via fcntl.flock on a sidecar
+  '<name>.lock' file. Readers never take it.
+- atomic_write_json(path, data): write to a temp file and rename it over
+  the target, so readers see either the old or the new file, never a
+  half-written one.
+- allocate_id(path, floor): monotonic IDs from a persisted high-water mark
+  in '<name>.seq', so deleted IDs are never handed out again.
+  read_high_water / raise_high_water let other backends of the same store
+  (the materials journal) share that mark.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _sidecar(path, suffix):
+    """Path of a helper file next to a store file (materials_data.json -> materials_data.lock)"""
+    return os.path.splitext(path)[0] + suffix
+
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        if path not in _thread_locks:
+            _thread_locks[path] = threading.Lock()
+        return _thread_locks[path]
+
+
+@contextmanager
+def locked(path):
+    """Hold the exclusive write lock of a store file"""
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+
+        with open(_sidecar(path, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_write_json(path, data):
+    """Replace path with data serialized as indented JSON"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_high_water(path):
+    """Highest ID ever handed out for a store file (its '.seq' file), or 0"""
+    seq_file = _sidecar(path, '.seq')
+    if not os.path.exists(seq_file):
+        return 0
+    try:
+        with open(seq_file, 'r') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def raise_high_water(path, high_water):
+    """Move the persisted high-water mark up to high_water (never down). Caller holds locked(path)."""
+    if high_water > read_high_water(path):
+        atomic_write_json(_sidecar(path, '.seq'), high_water)
+
+
+def allocate_id(path, floor=0, count=1):
+    """
+    Reserve count consecutive IDs for a store file
+
+    Must be called while holding locked(path).
+
+    Args:
+        path: Store file the IDs belong to
+        floor: Highest ID already in the store (used before the first allocation)
+        count: Number of IDs to reserve
+
+    Returns:
+        The first reserved ID
+    """
+    first_id = max(read_high_water(path), floor) + 1
+    atomic_write_json(_sidecar(path, '.seq'), first_id + count - 1)
+    return first_id
@@ -1,11 +1,11 @@
 """Test MySQL Connection"""
 from app import app
-from app import mysql
+from db_utils import get_cursor
 
 if __name__ == "__main__":
     with app.app_context():
         try:
-            cursor = mysql.cursor()
+            cursor = get_cursor()
             cursor.execute('SELECT DATABASE();')
             result = cursor.fetchone()
             
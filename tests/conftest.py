@@ -0,0 +1,46 @@
+"""Test fixtures: the app on a throwaway SQLite database"""
+import os
+import sys
+import tempfile
+
+# Config reads the environment when it is first imported
+_db_dir = tempfile.mkdtemp(prefix='lms-test-')
+os.environ['DB_ENGINE'] = 'sqlite'
+os.environ['DB_SQLITE_PATH'] = os.path.join(_db_dir, 'lms.db')
+os.environ['AUDIT_LOG_ENABLED'] = 'false'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from config import Config
+from models.dialect import connect_sqlite, create_sqlite_schema
+
+
+@pytest.fixture(scope='session')
+def app():
+    connection = connect_sqlite(Config.DB_SQLITE_PATH)
+    create_sqlite_schema(connection)
+    connection.close()
+
+    from app import app as flask_app
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def db():
+    """A connection to the test database"""
+    connection = connect_sqlite(Config.DB_SQLITE_PATH)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def login_as(client, user_id, role):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['user_role'] = role
@@ -0,0 +1,20 @@
+import os
+import benchmark_stores
+
+
+def test_journal_case_skips_multi_process_runs(tmp_path, monkeypatch):
+    # Spawned children import the stores from the repository root
+    repo_root = os.path.dirname(os.path.abspath(benchmark_stores.__file__))
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, [repo_root, os.environ.get('PYTHONPATH')])))
+    directory = str(tmp_path)
+
+    benchmark_stores._run_in_child(benchmark_stores.generate, 'journal', 50, directory)
+    results = benchmark_stores._run_in_child(benchmark_stores.run_case, 'journal', 50, directory,
+                                             ['get_material', 'add_material'], 5, 1.0, 2, 2, 60.0)
+
+    assert [(r['operation'], r['mode']) for r in results] == [
+        ('get_material', 'serial'), ('get_material', 'threads'), ('get_material', 'processes'),
+        ('add_material', 'serial'), ('add_material', 'threads'), ('add_material', 'processes'),
+    ]
+    assert all(r['iterations'] > 0 for r in results if r['mode'] != 'processes')
+    assert all('skipped' in r for r in results if r['mode'] == 'processes')
@@ -0,0 +1,22 @@
+import pytest
+from flask import g
+from db_utils import get_cursor
+
+
+def test_writes_on_a_replica_connection_raise(app, db):
+    with app.test_request_context():
+        # As if db_routing.read_only had routed the request to a replica
+        g.db_connection, g.db_connection_target = db, 'replica-1'
+        try:
+            cursor = get_cursor()
+            cursor.execute("SELECT COUNT(*) AS total FROM users")
+            assert cursor.fetchone()['total'] >= 0
+
+            with pytest.raises(RuntimeError):
+                cursor.execute("UPDATE users SET name = name WHERE id = %s", (0,))
+            with pytest.raises(RuntimeError):
+                cursor.executemany("DELETE FROM users WHERE id = %s", [(0,)])
+            assert not g.get('db_wrote')
+        finally:
+            g.pop('db_connection')
+            g.pop('db_connection_target')
@@ -0,0 +1,40 @@
+import io
+import enrollments_store
+from config import Config
+from conftest import login_as
+from import_enrollments import import_enrollments
+
+HEADER = 'student_id,student_name,course_name\n'
+
+
+def _csv(count):
+    return HEADER + ''.join(f'S{i:04d},Student {i},Course {i % 2}\n' for i in range(count))
+
+
+def _json_store(tmp_path, monkeypatch, max_rows):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(enrollments_store, 'STORE_BACKEND', 'json')
+    monkeypatch.setattr(Config, 'ENROLLMENT_IMPORT_JSON_MAX_ROWS', max_rows)
+
+
+def test_json_backend_imports_in_one_write(tmp_path, monkeypatch):
+    _json_store(tmp_path, monkeypatch, 5)
+    writes = []
+    add_enrollments = enrollments_store.add_enrollments
+    monkeypatch.setattr(enrollments_store, 'add_enrollments', lambda batch: writes.append(len(batch)) or add_enrollments(batch))
+
+    summary = import_enrollments(io.StringIO(_csv(5)), 'csv', chunk_size=2)
+    assert (summary['rows'], summary['added'], writes) == (5, 5, [5])
+
+
+def test_json_backend_rejects_imports_above_the_limit(app, db, tmp_path, monkeypatch):
+    _json_store(tmp_path, monkeypatch, 3)
+    client = app.test_client()
+    login_as(client, 1, 'admin')
+    response = client.post('/admin/enrollments/import', data={
+        'file': (io.BytesIO(_csv(4).encode()), 'enrollments.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert 'ENROLLMENTS_STORE_BACKEND=sqlite' in response.get_json()['message']
+    assert not (tmp_path / enrollments_store.ENROLLMENTS_FILE).exists()
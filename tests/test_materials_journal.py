@@ -0,0 +1,88 @@
+import json
+import os
+import pytest
+import materials_journal
+from materials_journal import MaterialsJournal
+from store_files import allocate_id, read_high_water
+
+
+def _material(title):
+    return {'title': title, 'description': '', 'filename': 'f.pdf', 'original_name': 'f.pdf',
+            'file_path': '/uploads/f.pdf', 'teacher': 'T', 'uploaded_at': '2024-01-01', 'downloads': 0}
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return str(tmp_path / 'materials_data.json')
+
+
+def test_failed_compaction_is_retried_at_the_next_threshold(snapshot, monkeypatch):
+    journal = MaterialsJournal(snapshot, compact_every=2)
+    real_dump = json.dump
+    calls = []
+
+    def failing_dump(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError('disk full')
+        return real_dump(*args, **kwargs)
+
+    monkeypatch.setattr(materials_journal.json, 'dump', failing_dump)
+    journal.add(_material('a'))
+    journal.add(_material('b'))
+    journal._compactor.join()
+    assert len(calls) == 1
+    assert os.path.exists(journal.compacting_file)
+
+    journal.add(_material('c'))
+    journal.add(_material('d'))
+    journal.close()
+    monkeypatch.setattr(materials_journal.json, 'dump', real_dump)
+    assert not os.path.exists(journal.compacting_file)
+
+    with open(snapshot) as f:
+        assert [m['title'] for m in json.load(f)] == ['a', 'b', 'c', 'd']
+    reopened = MaterialsJournal(snapshot)
+    assert [m['id'] for m in reopened.all()] == [1, 2, 3, 4]
+    reopened.close()
+
+
+def test_close_leaves_no_compaction_files(snapshot, tmp_path):
+    journal = MaterialsJournal(snapshot, compact_every=1)
+    for title in 'abc':
+        journal.add(_material(title))
+    journal.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'materials_data.journal', 'materials_data.journal.lock', 'materials_data.json',
+        'materials_data.lock', 'materials_data.seq']
+
+
+def test_only_one_process_may_open_a_journal(snapshot):
+    journal = MaterialsJournal(snapshot)
+    with pytest.raises(RuntimeError):
+        MaterialsJournal(snapshot)
+    journal.close()
+    MaterialsJournal(snapshot).close()
+
+
+def test_ids_deleted_under_the_json_store_are_not_reused(snapshot):
+    with open(snapshot, 'w') as f:
+        json.dump([dict(_material('a'), id=1), dict(_material('b'), id=2)], f)
+    allocate_id(snapshot, floor=2)  # id 3, deleted again before the switch
+
+    journal = MaterialsJournal(snapshot)
+    assert journal.add(_material('c'))['id'] == 4
+    journal.close()
+
+
+def test_ids_deleted_before_a_compaction_are_not_reused(snapshot):
+    journal = MaterialsJournal(snapshot)
+    journal.add(_material('a'))
+    journal.delete(journal.add(_material('b'))['id'])
+    journal.compact()
+    journal.close()
+    assert read_high_water(snapshot) == 2
+
+    reopened = MaterialsJournal(snapshot)
+    assert reopened.add(_material('c'))['id'] == 3
+    reopened.close()
@@ -0,0 +1,87 @@
+import pytest
+import materials_store
+from sqlite_store import SqliteMaterials, get_database
+
+
+def _material(n):
+    return {'title': f'Material {n}', 'description': '', 'filename': f'm{n}.pdf', 'original_name': f'm{n}.pdf',
+            'file_path': f'/uploads/m{n}.pdf', 'teacher': 'T', 'uploaded_at': '2024-01-01', 'downloads': 0}
+
+
+def _walk(get_page, sort):
+    """IDs of every page going forward with next_cursor, then back again with prev_cursor"""
+    forward, backward = [], []
+    page = get_page(sort=sort)
+    forward.append([m['id'] for m in page['materials']])
+    while page['next_cursor'] is not None:
+        page = get_page(cursor=page['next_cursor'], sort=sort)
+        forward.append([m['id'] for m in page['materials']])
+    backward.append([m['id'] for m in page['materials']])
+    while page['prev_cursor'] is not None:
+        page = get_page(before=page['prev_cursor'], sort=sort)
+        backward.append([m['id'] for m in page['materials']])
+    return forward, backward[::-1]
+
+
+@pytest.fixture
+def in_memory(monkeypatch):
+    materials = [dict(_material(n), id=n) for n in range(1, 24)]
+    monkeypatch.setattr(materials_store, 'STORE_BACKEND', 'json')
+    monkeypatch.setattr(materials_store, '_cached_materials', lambda: (materials, None))
+    monkeypatch.setitem(materials_store._cache, 'signature', object())
+    return materials_store.get_materials_page
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    engine = SqliteMaterials(get_database(str(tmp_path / 'store.db')))
+    for n in range(1, 24):
+        engine.add(_material(n))
+    monkeypatch.setattr(materials_store, 'STORE_BACKEND', 'sqlite')
+    monkeypatch.setattr(materials_store, '_engine_instance', engine)
+    return materials_store.get_materials_page
+
+
+@pytest.mark.parametrize('store', ['in_memory', 'sqlite_engine'])
+@pytest.mark.parametrize('sort', ['newest', 'oldest'])
+def test_cursor_pages_walk_forward_and_back(store, sort, request):
+    get_materials_page = request.getfixturevalue(store)
+
+    def get_page(**kwargs):
+        return get_materials_page(limit=5, **kwargs)
+
+    forward, backward = _walk(get_page, sort)
+    ids = list(range(1, 24)) if sort == 'oldest' else list(range(23, 0, -1))
+    assert forward == [ids[i:i + 5] for i in range(0, 23, 5)]
+    assert backward == forward
+    assert get_page(sort=sort)['prev_cursor'] is None
+
+
+def test_offset_pages_report_no_cursor_for_other_sorts(in_memory):
+    page = in_memory(offset=5, limit=5, sort='title')
+    assert page['next_cursor'] is None and page['prev_cursor'] is None
+    assert page['offset'] == 5
+
+
+def test_dashboard_paging_clamps_limit_before_offset(app, in_memory):
+    from app import materials_page_from_request
+
+    with app.test_request_context('/?limit=500&page=2&sort=title'):
+        result = materials_page_from_request()
+    assert (result['limit'], result['offset'], result['page']) == (100, 100, 2)
+
+    with app.test_request_context('/?cursor=10&limit=5'):
+        result = materials_page_from_request()
+    assert result['page'] is None and result['keyset'] is True
+    assert [m['id'] for m in result['materials']] == [9, 8, 7, 6, 5]
+
+
+def test_json_store_returns_copies_of_cached_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(materials_store, 'STORE_BACKEND', 'json')
+    added = materials_store.add_material('Notes', '', 'n.pdf', 'n.pdf', '/uploads/n.pdf')
+    added['title'] = 'Changed'
+    materials_store.get_all_materials()[0]['downloads'] = 99
+
+    assert materials_store.get_material(added['id'])['title'] == 'Notes'
+    assert materials_store.get_all_materials()[0]['downloads'] == 0
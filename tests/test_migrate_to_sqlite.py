@@ -0,0 +1,34 @@
+import json
+import migrate_to_sqlite
+from config import Config
+from sqlite_store import get_database
+
+
+def _material(material_id, downloads=0):
+    return {'id': material_id, 'title': f'Material {material_id}', 'description': '', 'filename': 'f.pdf',
+            'original_name': 'f.pdf', 'file_path': '/uploads/f.pdf', 'teacher': 'T',
+            'uploaded_at': '2024-01-01', 'downloads': downloads}
+
+
+def test_migrate_replays_the_materials_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, 'STORE_SQLITE_PATH', str(tmp_path / 'store.db'))
+    (tmp_path / 'materials_data.json').write_text(json.dumps([_material(1), _material(2)]))
+    records = [
+        {'op': 'put', 'material': _material(3)},
+        {'op': 'put', 'material': _material(4)},
+        {'op': 'delete', 'id': 1},
+        {'op': 'delete', 'id': 4},
+        {'op': 'downloads', 'id': 2, 'downloads': 7},
+    ]
+    (tmp_path / 'materials_data.journal').write_text(''.join(json.dumps(r) + '\n' for r in records))
+
+    assert migrate_to_sqlite.migrate() is True
+
+    conn = get_database(Config.STORE_SQLITE_PATH).connection()
+    rows = conn.execute("SELECT id, downloads FROM materials ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [(2, 7), (3, 0)]
+    # Deleted ID 4 is never handed out again
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'materials'").fetchone()[0] == 4
+    # The journal was folded into the snapshot
+    assert [m['id'] for m in json.loads((tmp_path / 'materials_data.json').read_text())] == [2, 3]
@@ -0,0 +1,90 @@
+import uuid
+from conftest import login_as
+from models.material_model import add_material, claim_pending_materials
+from models.user_model import create_user
+
+
+def _user(db, role):
+    cursor = db.cursor()
+    result = create_user(cursor, f"{uuid.uuid4().hex}@example.edu", 'Review@123456', role.title(), role)
+    db.commit()
+    return result['user_id']
+
+
+def _pending(db, count):
+    teacher_id = _user(db, 'teacher')
+    cursor = db.cursor()
+    ids = [add_material(cursor, f'Claim {i}', 'Maths', '', f'/static/uploads/claim{i}.pdf', teacher_id)['material_id']
+           for i in range(count)]
+    db.commit()
+    return ids
+
+
+def _claim_all(db, reviewer_id):
+    cursor = db.cursor()
+    result = claim_pending_materials(cursor, reviewer_id, 1000, 600)
+    db.commit()
+    assert result['success'], result['message']
+    return result
+
+
+def test_claim_returns_exactly_the_claimed_rows(app, db):
+    material_ids = _pending(db, 3)
+    first, second = _user(db, 'admin'), _user(db, 'admin')
+
+    claimed = _claim_all(db, first)
+    assert set(material_ids) <= set(claimed['ids'])
+    assert claimed['ids'] == [m['id'] for m in claimed['materials']]
+
+    # Another reviewer in the same second gets none of them
+    assert not set(material_ids) & set(_claim_all(db, second)['ids'])
+    # The same reviewer renews the same rows
+    assert set(material_ids) <= set(_claim_all(db, first)['ids'])
+
+
+def test_other_reviewers_cannot_moderate_claimed_materials(app, db):
+    material_ids = _pending(db, 2)
+    owner, other = _user(db, 'admin'), _user(db, 'admin')
+    _claim_all(db, owner)
+
+    client = app.test_client()
+    login_as(client, other, 'admin')
+    response = client.post(f'/admin/materials/approve/{material_ids[0]}')
+    assert response.status_code == 409
+
+    response = client.post('/admin/materials/bulk/reject', json={'ids': material_ids})
+    assert [r['message'] for r in response.get_json()['results']] == ['Claimed by another reviewer'] * 2
+
+    cursor = db.cursor()
+    cursor.execute(f"SELECT approval_status FROM study_materials WHERE id IN ({', '.join(['%s'] * 2)})", material_ids)
+    assert [row['approval_status'] for row in cursor.fetchall()] == ['pending', 'pending']
+
+    login_as(client, owner, 'admin')
+    assert client.post(f'/admin/materials/approve/{material_ids[0]}').status_code == 200
+    response = client.post('/admin/materials/bulk/reject', json={'ids': [material_ids[1]]})
+    assert response.get_json()['results'][0]['success'] is True
+
+
+def test_claim_and_release_reject_non_object_json(app, db):
+    client = app.test_client()
+    login_as(client, _user(db, 'admin'), 'admin')
+    for path in ('/admin/materials/claim', '/admin/materials/release', '/admin/materials/bulk/approve'):
+        response = client.post(path, json=[1, 2])
+        assert response.status_code == 400, path
+        assert response.get_json()['message'] == 'JSON body must be an object'
+
+
+def test_other_reviewers_cannot_delete_a_claimed_material(app, db):
+    [material_id] = _pending(db, 1)
+    owner, other = _user(db, 'admin'), _user(db, 'admin')
+    _claim_all(db, owner)
+
+    client = app.test_client()
+    login_as(client, other, 'admin')
+    assert client.post(f'/admin/materials/delete/{material_id}').status_code == 409
+
+    login_as(client, owner, 'admin')
+    assert client.post(f'/admin/materials/delete/{material_id}').status_code == 200
+    cursor = db.cursor()
+    cursor.execute("SELECT id FROM study_materials WHERE id = %s", (material_id,))
+    assert cursor.fetchone() is None
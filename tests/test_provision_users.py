@@ -0,0 +1,52 @@
+import io
+import uuid
+import pytest
+import provision_users
+from config import Config
+from conftest import login_as
+
+
+@pytest.fixture
+def admin_client(app, monkeypatch):
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(Config, 'USER_PROVISION_MAX_ROWS', 3)
+    client = app.test_client()
+    login_as(client, 1, 'admin')
+    return client
+
+
+def _csv(count):
+    tag = uuid.uuid4().hex[:8]
+    rows = ''.join(f'{tag}{n}@example.edu,Student {n},student,Pass@12345{n}\n' for n in range(count))
+    return tag, ('email,name,role,password\n' + rows).encode()
+
+
+def _upload(client, data):
+    return client.post('/admin/users/provision', data={'file': (io.BytesIO(data), 'users.csv')},
+                       content_type='multipart/form-data')
+
+
+def test_provision_upload_creates_users(admin_client, db):
+    tag, data = _csv(3)
+    response = _upload(admin_client, data)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['summary']['created'] == 3
+
+    cursor = db.cursor()
+    cursor.execute("SELECT COUNT(*) AS n FROM users WHERE email LIKE %s", (tag + '%',))
+    assert cursor.fetchone()['n'] == 3
+
+
+def test_provision_upload_rejects_files_over_the_row_cap(admin_client, db):
+    tag, data = _csv(4)
+    response = _upload(admin_client, data)
+    assert response.status_code == 400
+    assert 'At most 3 users' in response.get_json()['message']
+
+    cursor = db.cursor()
+    cursor.execute("SELECT COUNT(*) AS n FROM users WHERE email LIKE %s", (tag + '%',))
+    assert cursor.fetchone()['n'] == 0
+
+
+def test_hashing_pool_is_reused():
+    assert provision_users._get_executor(1) is provision_users._get_executor(1)
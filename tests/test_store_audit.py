@@ -0,0 +1,29 @@
+import io
+import audit_log
+import materials_store
+from audit_log import AuditLog
+from config import Config
+from sqlite_store import SqliteMaterials, get_database
+
+
+def test_store_upload_and_delete_are_audited(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(materials_store, 'STORE_BACKEND', 'sqlite')
+    monkeypatch.setattr(materials_store, '_engine_instance', SqliteMaterials(get_database(str(tmp_path / 'store.db'))))
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    written = []
+    monkeypatch.setattr(audit_log, 'audit_log', AuditLog(written.extend, interval=0))
+    monkeypatch.setattr(Config, 'AUDIT_LOG_ENABLED', True)
+
+    client = app.test_client()
+    response = client.post('/teacher/upload-material', data={
+        'title': 'Handout', 'file': (io.BytesIO(b'notes'), 'handout.pdf')
+    }, content_type='multipart/form-data')
+    material = response.get_json()['material']
+    assert client.post(f"/teacher/delete-material/{material['id']}").status_code == 200
+    audit_log.audit_log.stop()
+
+    # (user_id, action, entity_type, entity_id, ...)
+    assert [row[1:4] for row in written] == [
+        ('material_upload', 'stored_material', material['id']),
+        ('material_delete', 'stored_material', material['id']),
+    ]
@@ -0,0 +1,57 @@
+import io
+import uuid
+from conftest import login_as
+from models.statistics_model import get_counters
+from models.user_model import create_user
+
+
+def _teacher(db):
+    cursor = db.cursor()
+    result = create_user(cursor, f"{uuid.uuid4().hex}@example.edu", 'Teach@123456', 'Teacher', 'teacher')
+    db.commit()
+    return result['user_id']
+
+
+def test_upload_material_creates_pending_material(app, db, upload_folder):
+    teacher_id = _teacher(db)
+    before = get_counters(db.cursor(), ['materials_pending'])['materials_pending']
+
+    client = app.test_client()
+    login_as(client, teacher_id, 'teacher')
+    response = client.post('/teacher/upload', data={
+        'title': 'Vectors',
+        'subject': 'Physics',
+        'description': 'Week 1',
+        'file': (io.BytesIO(b'%PDF-1.4 test'), 'vectors.pdf')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['success'] is True
+
+    cursor = db.cursor()
+    cursor.execute("SELECT id, title, approval_status, file_path FROM study_materials WHERE uploaded_by = %s",
+                   (teacher_id,))
+    materials = cursor.fetchall()
+    assert [(m['title'], m['approval_status']) for m in materials] == [('Vectors', 'pending')]
+    assert len(list(upload_folder.iterdir())) == 1
+    assert get_counters(cursor, ['materials_pending'])['materials_pending'] == before + 1
+
+
+def test_edit_and_delete_material(app, db, upload_folder):
+    teacher_id = _teacher(db)
+    client = app.test_client()
+    login_as(client, teacher_id, 'teacher')
+    client.post('/teacher/upload', data={
+        'title': 'Draft', 'subject': 'Maths', 'file': (io.BytesIO(b'notes'), 'draft.pdf')
+    }, content_type='multipart/form-data')
+    cursor = db.cursor()
+    cursor.execute("SELECT id FROM study_materials WHERE uploaded_by = %s", (teacher_id,))
+    material_id = cursor.fetchone()['id']
+
+    response = client.post(f'/teacher/edit/{material_id}', data={'title': 'Final', 'subject': 'Maths'})
+    assert response.status_code == 200, response.get_json()
+
+    response = client.post(f'/teacher/delete/{material_id}')
+    assert response.status_code == 200, response.get_json()
+    cursor.execute("SELECT COUNT(*) AS n FROM study_materials WHERE uploaded_by = %s", (teacher_id,))
+    assert cursor.fetchone()['n'] == 0
@@ -0,0 +1,51 @@
+import uuid
+import pytest
+import models.user_model as user_model
+from models.dialect import MySQLDialect
+from models.user_model import create_user, search_users
+
+
+class MissingFulltextCursor:
+    """Cursor that fails MATCH ... AGAINST the way MySQL does without the FULLTEXT index"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, query, params=None):
+        if 'MATCH(' in query:
+            raise Exception(1191, "Can't find FULLTEXT index matching the column list")
+        return self.cursor.execute(query, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+@pytest.fixture
+def users(app, db):
+    tag = uuid.uuid4().hex[:8]
+    cursor = db.cursor()
+    create_user(cursor, f'zed{tag}@example.edu', 'Pass@123456', f'Zed {tag}', 'student')
+    create_user(cursor, f'amy{tag}@example.edu', 'Pass@123456', f'Amy Zed{tag}son', 'teacher')
+    db.commit()
+    return tag
+
+
+def test_search_matches_email_prefix_and_name_substring(db, users):
+    results = search_users(db.cursor(), f'zed{users}')
+    assert [u['email'] for u in results] == [f'zed{users}@example.edu', f'amy{users}@example.edu']
+    assert [u['role'] for u in search_users(db.cursor(), f'zed{users}', role='teacher')] == ['teacher']
+
+
+def test_search_falls_back_to_like_without_the_fulltext_index(db, users, monkeypatch):
+    monkeypatch.setattr(user_model, 'get_dialect', lambda: MySQLDialect())
+    results = search_users(MissingFulltextCursor(db.cursor()), f'zed{users}')
+    assert len(results) == 2
+
+
+def test_search_does_not_hide_other_errors(db, users):
+    class BrokenCursor(MissingFulltextCursor):
+        def execute(self, query, params=None):
+            raise RuntimeError('connection lost')
+
+    with pytest.raises(RuntimeError):
+        search_users(BrokenCursor(db.cursor()), 'zed')